@@ -1,9 +1,19 @@
-from fastapi import APIRouter, HTTPException, Depends
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Optional, Tuple
+from app.services.inference_client import InferenceError
 from app.services.llm_service import llm_service
 from app.services.tts_service import tts_service
 from app.models.database import get_db_connection
+from app.core.config import settings
+from app.core.executors import run_in
+from app.services.llm_scheduler import PRIORITIES, SchedulerError, llm_scheduler, llm_schedulers
+from app.services.audio_prerender import audio_prerenderer
+from app.services.lesson_segments import lesson_segmenter
 import sqlite3
 
 router = APIRouter()
@@ -12,9 +22,16 @@ router = APIRouter()
 class ChatRequest(BaseModel):
     message: str
     context: Optional[str] = None
+    # 请求类型: word(单词释义) / sentence(整句分析) / free(自由提问)
+    kind: Optional[str] = None
+    # 显式优先级: high / normal / low, 未指定时按 kind 与长度推断
+    priority: Optional[str] = None
+    # 为 False 时不读写回答缓存
+    use_cache: bool = True
 
 class ChatResponse(BaseModel):
     response: str
+    cached: bool = False
 
 class TTSRequest(BaseModel):
     text: str
@@ -34,81 +51,528 @@ class LessonResponse(BaseModel):
 
 # --- 路由 ---
 
+async def _build_prompt(request: ChatRequest) -> dict:
+    """在 token 预算内组装提示词(长上下文只保留相关句子), 并按请求类型确定生成长度与模型路由。"""
+    from app.services.prompt_builder import prompt_builder
+    return await run_in("io", prompt_builder.build, request.message, request.context, request.kind)
+
+async def _prepare_prompt(request: ChatRequest) -> Tuple[dict, Optional[str]]:
+    """返回 (提示词, 缓存的回答)。
+
+    先按未裁剪的原始请求查询回答缓存, 命中时不必统计 token(remote 模式下也不请求推理服务器);
+    未命中再组装提示词, 上下文因超出预算被裁剪时按裁剪后的提示词再查一次。两次查询只计一次命中统计。
+    提示词被裁剪时 prompt["raw"] 为原始请求, 生成后用 _alias_answer 把回答也登记在它下面。
+    """
+    from app.services.answer_cache import answer_cache
+    from app.services.prompt_builder import prompt_builder
+
+    if not (request.use_cache and settings.LLM_ANSWER_CACHE_ENABLED):
+        return await _build_prompt(request), None
+    draft = prompt_builder.draft(request.message, request.context, request.kind)
+    cached = await run_in(
+        "db", llm_service.cached_answer, draft["message"], draft["system_prompt"], draft["max_tokens"],
+        draft["route"], False,
+    )
+    if cached is not None:
+        answer_cache.record(True)
+        return draft, cached
+    prompt = await _build_prompt(request)
+    if (prompt["message"], prompt["system_prompt"]) != (draft["message"], draft["system_prompt"]):
+        cached = await run_in(
+            "db", llm_service.cached_answer, prompt["message"], prompt["system_prompt"], prompt["max_tokens"],
+            prompt["route"], False,
+        )
+        prompt["raw"] = draft
+        if cached is not None:
+            await _alias_answer(prompt)
+    answer_cache.record(cached is not None)
+    return prompt, cached
+
+async def _alias_answer(prompt: dict) -> None:
+    """回答缓存以原始请求为键: 相同的长上下文请求下次在组装提示词之前即可命中。"""
+    raw = prompt.get("raw")
+    if raw is not None:
+        await run_in(
+            "db", llm_service.alias_answer, prompt["message"], prompt["system_prompt"],
+            raw["message"], raw["system_prompt"], prompt["max_tokens"], prompt["route"],
+        )
+
+def _resolve_priority(request: ChatRequest) -> str:
+    if request.priority in PRIORITIES:
+        return request.priority
+    if request.kind == "word":
+        return "high"
+    if len(request.message) + len(request.context or "") > settings.LLM_LONG_REQUEST_CHARS:
+        return "low"
+    return "normal"
+
+def _scheduler_http_error(error: SchedulerError) -> HTTPException:
+    return HTTPException(
+        status_code=error.status_code,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
 @router.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
-    system_prompt = "You are a helpful English language tutor."
-    if request.context:
-        system_prompt += f" Context: {request.context}"
-    
-    response = llm_service.chat(request.message, system_prompt)
+async def chat(request: ChatRequest, http_request: Request):
+    prompt, cached = await _prepare_prompt(request)
+    # 缓存命中时不进入调度队列, 也不占用模型
+    if cached is not None:
+        return {"response": cached, "cached": True}
+    message, system_prompt, max_tokens = prompt["message"], prompt["system_prompt"], prompt["max_tokens"]
+    route = prompt["route"]
+
+    try:
+        scheduler = llm_schedulers[route]
+        async with scheduler.slot(_resolve_priority(request), disconnected=http_request.is_disconnected):
+            response = await run_in(
+                llm_service.executor_for(route), llm_service.chat, message, system_prompt,
+                use_cache=request.use_cache, max_tokens=max_tokens, route=route,
+            )
+    except SchedulerError as e:
+        raise _scheduler_http_error(e)
+    except InferenceError as e:
+        print(f"推理服务器请求失败: {e}")
+        raise HTTPException(status_code=503, detail="Inference server unavailable")
+    await _alias_answer(prompt)
     return {"response": response}
 
+@router.get("/llm/stats")
+async def llm_stats():
+    from app.services.answer_cache import answer_cache
+    model_stats = await run_in("io", llm_service.stats)
+    routes = model_stats["routes"]
+    for route, scheduler in llm_schedulers.items():
+        if route in routes:
+            routes[route]["scheduler"] = scheduler.stats()
+    return {
+        **llm_scheduler.stats(),
+        "kv_cache": model_stats["kv_cache"],
+        "routes": routes,
+        "answer_cache": await run_in("db", answer_cache.stats),
+    }
+
+def _sse(data: dict, event: Optional[str] = None) -> str:
+    payload = json.dumps(data, ensure_ascii=False)
+    if event:
+        return f"event: {event}\ndata: {payload}\n\n"
+    return f"data: {payload}\n\n"
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """以 Server-Sent Events 逐 token 推送回答。
+
+    每个 token 为一条 `data: {"token": ...}` 事件, 结束时发送 `event: done`,
+    出错时发送 `event: error`。
+    """
+    prompt, cached = await _prepare_prompt(request)
+    message, system_prompt, max_tokens = prompt["message"], prompt["system_prompt"], prompt["max_tokens"]
+    route = prompt["route"]
+    scheduler = llm_schedulers[route]
+    priority = _resolve_priority(request)
+    if cached is not None:
+        async def cached_source():
+            yield _sse({"token": cached})
+            yield _sse({"cached": True}, event="done")
+
+        return StreamingResponse(cached_source(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    # 队列已满时直接返回 429, 而不是先建立流
+    try:
+        scheduler.check_capacity()
+    except SchedulerError as e:
+        raise _scheduler_http_error(e)
+
+    async def event_source():
+        try:
+            # 槽位在生成器内部获取, 保证无论流如何结束都会被释放
+            async with scheduler.slot(priority):
+                async for token in llm_service.astream_chat(
+                    message, system_prompt, request.use_cache, max_tokens=max_tokens, route=route
+                ):
+                    yield _sse({"token": token})
+        except SchedulerError as e:
+            yield _sse({"detail": str(e), "retry_after": e.retry_after}, event="error")
+            return
+        except Exception as e:
+            print(f"流式生成出错: {e}")
+            yield _sse({"detail": "Generation failed"}, event="error")
+            return
+        await _alias_answer(prompt)
+        yield _sse({}, event="done")
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/health")
+async def health():
+    """就绪检查: 报告各模型的加载状态与耗时。
+
+    lazy 模式下尚未加载视为就绪(首次使用时加载); 模型缺失、加载失败,
+    或 eager/background 模式下仍在加载时返回 503。
+    """
+    models = {"llm": llm_service.status(), "tts": tts_service.status()}
+    acceptable = {"ready"}
+    if settings.MODEL_LOAD_MODE == "lazy":
+        acceptable.add("not_loaded")
+    ready = all(m["state"] in acceptable for m in models.values())
+    body = {"status": "ok" if ready else "unavailable", "ready": ready, "load_mode": settings.MODEL_LOAD_MODE, "models": models}
+    return JSONResponse(body, status_code=200 if ready else 503)
+
 @router.post("/tts", response_model=TTSResponse)
 async def generate_speech(request: TTSRequest):
-    audio_url = tts_service.generate_audio(request.text)
+    """生成朗读音频, 返回音频 URL; 单个单词优先使用发音包中预先合成的音频。"""
+    from app.services.pronunciation_pack import normalize_word, pronunciation_pack
+    # 发音包的音色须与当前 TTS 一致; 先按配置推断的音色查询, 命中时无需加载模型
+    profile = tts_service.expected_voice_profile()
+    entry = await run_in("io", pronunciation_pack.lookup, request.text, profile)
+    if entry is None and normalize_word(request.text):
+        # 未命中时才加载引擎: 实际音色与推断不同(如 XTTS 回退到 edge-tts)时按实际音色再查一次,
+        # TTS 不可用时不限音色, 仍可使用发音包
+        loaded = tts_service.tts or await run_in("tts", tts_service.ensure_loaded)
+        actual = tts_service.voice_profile() if loaded else None
+        if actual != profile:
+            entry = await run_in("io", pronunciation_pack.lookup, request.text, actual)
+    if entry:
+        return {"audio_url": pronunciation_pack.url_for(entry)}
+    audio_url = await tts_service.agenerate_audio(request.text)
     if not audio_url:
         raise HTTPException(status_code=500, detail="Audio generation failed")
     return {"audio_url": audio_url}
 
+@router.get("/tts/words/{word}")
+async def get_word_audio(word: str, request: Request):
+    """从内存映射的发音包中返回单词音频。
+
+    URL 中的 v 参数为音频内容的哈希, 内容变化时 URL 随之变化, 因此可以长期缓存;
+    支持 If-None-Match 与单段 Range 请求。
+    """
+    from app.services.pronunciation_pack import MEDIA_TYPES, pronunciation_pack
+    found = await run_in("io", pronunciation_pack.read, word)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Word not in pronunciation pack")
+    entry, audio = found
+    headers = {
+        "Cache-Control": f"public, max-age={settings.TTS_AUDIO_MAX_AGE}, immutable",
+        "ETag": f'"{entry["hash"]}"',
+        "Accept-Ranges": "bytes",
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+
+    media_type = MEDIA_TYPES.get(entry["format"], "application/octet-stream")
+    byte_range = _parse_range(request.headers.get("range"), len(audio))
+    if byte_range is None:
+        return Response(content=audio, media_type=media_type, headers=headers)
+    start, end = byte_range
+    if start > end or start >= len(audio):
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{len(audio)}"})
+    headers["Content-Range"] = f"bytes {start}-{end}/{len(audio)}"
+    return Response(content=audio[start:end + 1], status_code=206, media_type=media_type, headers=headers)
+
+def _parse_range(value: Optional[str], size: int) -> Optional[tuple]:
+    """解析单段 `bytes=start-end` / `bytes=-suffix`, 无法解析或为多段时返回 None(返回完整内容)。"""
+    if not value or not value.startswith("bytes=") or "," in value:
+        return None
+    start, _, end = value[len("bytes="):].strip().partition("-")
+    try:
+        if not start:
+            return max(0, size - int(end)), size - 1
+        return int(start), min(int(end), size - 1) if end else size - 1
+    except ValueError:
+        return None
+
+@router.post("/tts/stream")
+async def generate_speech_stream(request: TTSRequest):
+    """长文本流式朗读: 按句合成, 以 NDJSON 逐行返回分段音频地址。
+
+    每行形如 `{"index": 0, "text": "...", "audio_url": "/static/audio/..."}`,
+    按原文顺序输出, 第一句合成完成即可开始播放; 最后一行为 `{"done": true, "count": n, "failed": m}`。
+    合成失败的句子 audio_url 为 null(出错时带 error)。
+    """
+    async def segments():
+        count = failed = 0
+        async for segment in tts_service.astream_audio(request.text):
+            count += 1
+            failed += segment["audio_url"] is None
+            yield json.dumps(segment, ensure_ascii=False) + "\n"
+        yield json.dumps({"done": True, "count": count, "failed": failed}) + "\n"
+
+    return StreamingResponse(
+        segments(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/tts/cache")
+async def tts_cache_stats():
+    """音频缓存命中统计、存储用量(按引擎与文件格式)与发音包状态。"""
+    from app.services.audio_cache import audio_cache
+    from app.services.audio_storage import audio_storage
+    from app.services.pronunciation_pack import pronunciation_pack
+    return {
+        **await run_in("db", audio_cache.stats),
+        "storage": await run_in("db", audio_storage.status),
+        "pronunciation_pack": await run_in("io", pronunciation_pack.status),
+    }
+
+@router.post("/tts/cache/gc")
+async def tts_cache_gc():
+    """立即执行一次音频垃圾回收(平时由后台按 TTS_AUDIO_GC_INTERVAL 定期执行)。"""
+    from app.services.audio_storage import audio_storage
+    return await run_in("io", audio_storage.collect)
+
+def _catalog_state() -> tuple:
+    conn = get_db_connection()
+    try:
+        row = conn.execute("SELECT version, updated_at FROM catalog_state WHERE id = 1").fetchone()
+    finally:
+        conn.close()
+    return row["version"], row["updated_at"]
+
+def _is_not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates or etag.removeprefix("W/") in candidates
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+async def _catalog_response(request: Request, loader, *args) -> Response:
+    """目录类只读接口的条件 GET 封装。
+
+    ETag / Last-Modified 取自 catalog_state, 课程或课时有任何变化都会改变;
+    客户端缓存仍然有效时直接返回 304, 不查询也不序列化数据。
+    """
+    version, updated_at = await run_in("db", _catalog_state)
+    etag = f'W/"catalog-{version}"'
+    last_modified = datetime.strptime(updated_at, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(last_modified, usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+    if _is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    body = await run_in("db", loader, *args)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return JSONResponse(body, headers=headers)
+
+def _page(rows: list, limit: int) -> Optional[int]:
+    """键集分页: 本页已满时返回下一页的 after_id。"""
+    return rows[-1]["id"] if len(rows) == limit else None
+
+def _fetch_courses(after_id: int, limit: int) -> dict:
+    conn = get_db_connection()
+    try:
+        courses = conn.execute(
+            """
+            SELECT id, title, description, source_url, created_at
+            FROM courses WHERE id > ? ORDER BY id LIMIT ?
+            """,
+            (after_id, limit),
+        ).fetchall()
+    finally:
+        conn.close()
+    return {"courses": [dict(c) for c in courses], "next_after_id": _page(courses, limit)}
+
 @router.get("/courses")
-async def get_courses():
+async def get_courses(request: Request, after_id: int = 0, limit: int = Query(50, ge=1, le=200)):
+    return await _catalog_response(request, _fetch_courses, after_id, limit)
+
+def _fetch_lessons(course_id: int, after_id: int, limit: int) -> dict:
     conn = get_db_connection()
-    courses = conn.execute("SELECT * FROM courses").fetchall()
-    conn.close()
-    return {"courses": [dict(c) for c in courses]}
+    try:
+        lessons = conn.execute(
+            """
+            SELECT id, course_id, title, length(content) AS length, audio_path, created_at
+            FROM lessons WHERE course_id = ? AND id > ? ORDER BY id LIMIT ?
+            """,
+            (course_id, after_id, limit),
+        ).fetchall()
+    finally:
+        conn.close()
+    return {"lessons": [dict(l) for l in lessons], "next_after_id": _page(lessons, limit)}
 
 @router.get("/courses/{course_id}/lessons")
-async def get_lessons(course_id: int):
+async def get_lessons(request: Request, course_id: int, after_id: int = 0, limit: int = Query(100, ge=1, le=500)):
+    """课时列表只返回元数据(不含正文), 正文通过 /lessons/{lesson_id} 获取。"""
+    return await _catalog_response(request, _fetch_lessons, course_id, after_id, limit)
+
+def _fetch_lesson(lesson_id: int) -> Optional[dict]:
     conn = get_db_connection()
-    lessons = conn.execute("SELECT * FROM lessons WHERE course_id = ?", (course_id,)).fetchall()
-    conn.close()
-    return {"lessons": [dict(l) for l in lessons]}
+    try:
+        lesson = conn.execute("SELECT * FROM lessons WHERE id = ?", (lesson_id,)).fetchone()
+    finally:
+        conn.close()
+    return dict(lesson) if lesson else None
+
+@router.get("/lessons/{lesson_id}")
+async def get_lesson(request: Request, lesson_id: int):
+    return await _catalog_response(request, _fetch_lesson, lesson_id)
+
+@router.get("/lessons/{lesson_id}/sentences")
+async def get_lesson_sentences(
+    request: Request,
+    lesson_id: int,
+    start: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    section: Optional[int] = None,
+):
+    """按位置分段读取课时句子(可限定章节), 每句带稳定 id 与原文字符偏移。"""
+    return await _catalog_response(request, lesson_segmenter.sentences, lesson_id, start, limit, section)
+
+@router.get("/lessons/{lesson_id}/sections")
+async def get_lesson_sections(request: Request, lesson_id: int):
+    """课时的章节目录: 标题、字符范围以及对应的句子位置范围。"""
+    return await _catalog_response(request, lesson_segmenter.sections, lesson_id)
+
+@router.get("/search")
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    type: Optional[List[str]] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
+    """全文搜索课程、课时与词汇, 按相关度(bm25)排序, 摘要中的命中词以 <mark> 标出。"""
+    from app.services.search import SEARCH_TYPES, search_service
+
+    if type and any(kind not in SEARCH_TYPES for kind in type):
+        raise HTTPException(status_code=400, detail=f"type must be one of: {', '.join(SEARCH_TYPES)}")
+    return await run_in("db", search_service.search, q, type, limit, offset)
+
+@router.get("/lessons/{lesson_id}/audio")
+async def get_lesson_audio(lesson_id: int):
+    """预渲染的课时音频: 播放列表地址与逐句音频。"""
+    manifest = await run_in("db", audio_prerenderer.lesson_audio, lesson_id)
+    if manifest is None:
+        raise HTTPException(status_code=404, detail="Lesson not found")
+    return manifest
+
+@router.post("/courses/{course_id}/prerender", status_code=202)
+async def prerender_course_audio(course_id: int, background_tasks: BackgroundTasks):
+    """在后台预渲染整门课程的音频(已完成的句子会被跳过)。"""
+    background_tasks.add_task(audio_prerenderer.prerender_course, course_id)
+    return {"message": "Prerendering scheduled", "course_id": course_id}
 
 @router.post("/courses/init_demo")
 async def init_demo_course():
     """初始化演示课程(如果为空)"""
+    return await run_in("db", _init_demo_course)
+
+def _init_demo_course() -> dict:
     conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # 检查是否存在
-    existing = cursor.execute("SELECT * FROM courses WHERE title = 'Demo Course'").fetchone()
-    if existing:
+    try:
+        cursor = conn.cursor()
+
+        # 检查是否存在
+        existing = cursor.execute("SELECT * FROM courses WHERE title = 'Demo Course'").fetchone()
+        if existing:
+            return {"message": "演示课程已存在"}
+
+        cursor.execute("INSERT INTO courses (title, description) VALUES (?, ?)",
+                       ("Demo Course", "A sample course to demonstrate features."))
+        course_id = cursor.lastrowid
+
+        demo_text = "Hello! Welcome to your English learning assistant. Click any word to hear it. Ask the AI questions about grammar."
+        cursor.execute("INSERT INTO lessons (course_id, title, content) VALUES (?, ?, ?)",
+                       (course_id, "Introduction", demo_text))
+        lesson_segmenter.segment(conn, cursor.lastrowid, demo_text)
+
+        conn.commit()
+    finally:
         conn.close()
-        return {"message": "演示课程已存在"}
-    
-    cursor.execute("INSERT INTO courses (title, description) VALUES (?, ?)", 
-                   ("Demo Course", "A sample course to demonstrate features."))
-    course_id = cursor.lastrowid
-    
-    demo_text = "Hello! Welcome to your English learning assistant. Click any word to hear it. Ask the AI questions about grammar."
-    cursor.execute("INSERT INTO lessons (course_id, title, content) VALUES (?, ?, ?)",
-                   (course_id, "Introduction", demo_text))
-    
-    conn.commit()
-    conn.close()
     return {"message": "演示课程已创建"}
 
 class ImportRequest(BaseModel):
     url: str
 
+class BulkImportRequest(BaseModel):
+    urls: List[str]
+    force: bool = False
+
+def _schedule_prerender(background_tasks: BackgroundTasks, results: List[dict]) -> None:
+    if not settings.PRERENDER_ON_IMPORT:
+        return
+    for result in results:
+        if result["status"] in ("imported", "updated"):
+            background_tasks.add_task(audio_prerenderer.prerender_course, result["course_id"])
+
 @router.post("/courses/import")
-async def import_course(request: ImportRequest):
-    from app.services.content_service import content_service
-    
-    data = content_service.fetch_url(request.url)
-    if not data:
+async def import_course(request: ImportRequest, background_tasks: BackgroundTasks):
+    from app.services.course_importer import course_importer
+
+    result = await course_importer.import_url(request.url)
+    if result["status"] == "failed":
         raise HTTPException(status_code=400, detail="Failed to fetch content from URL")
-        
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("INSERT INTO courses (title, description, source_url) VALUES (?, ?, ?)", 
-                   (data["title"], f"Imported from {request.url}", request.url))
-    course_id = cursor.lastrowid
-    
-    cursor.execute("INSERT INTO lessons (course_id, title, content) VALUES (?, ?, ?)",
-                   (course_id, "Main Article", data["content"]))
-    
-    conn.commit()
-    conn.close()
-    return {"message": "Course imported successfully", "course_id": course_id}
+
+    _schedule_prerender(background_tasks, [result])
+    return {"message": "Course imported successfully", "course_id": result["course_id"], "status": result["status"]}
+
+@router.post("/courses/import/bulk")
+async def import_courses_bulk(request: BulkImportRequest, background_tasks: BackgroundTasks):
+    """批量导入网页: 并发抓取, 未变化的页面跳过, 每个 URL 单独返回结果。"""
+    from app.services.course_importer import course_importer
+
+    if len(request.urls) > settings.IMPORT_BULK_MAX_URLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many URLs (max {settings.IMPORT_BULK_MAX_URLS})",
+        )
+    results = await course_importer.import_urls(request.urls, force=request.force)
+    _schedule_prerender(background_tasks, results)
+    return {"summary": course_importer.summarize(results), "results": results}
+
+class VocabularyItem(BaseModel):
+    word: str
+    context_sentence: Optional[str] = None
+    definition: Optional[str] = None
+
+class VocabularyBulkRequest(BaseModel):
+    items: List[VocabularyItem]
+    # 为 False 时只保存, 不触发后台批量释义
+    define: bool = True
+
+@router.post("/vocabulary/bulk")
+async def save_vocabulary_bulk(request: VocabularyBulkRequest, background_tasks: BackgroundTasks):
+    """批量保存单词(同一单词在同一例句下只保存一条), 没有释义的单词在后台批量生成释义。"""
+    from app.services.vocabulary import vocabulary_store
+    from app.services.vocabulary_definer import vocabulary_definer
+
+    if len(request.items) > settings.VOCAB_BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Too many items (max {settings.VOCAB_BULK_MAX_ITEMS})")
+    result = await run_in("db", vocabulary_store.save_many, [item.model_dump() for item in request.items])
+    result["defining"] = request.define and settings.VOCAB_DEFINE_ON_SAVE and result["inserted"] > 0
+    if result["defining"]:
+        background_tasks.add_task(vocabulary_definer.run)
+    return result
+
+@router.get("/vocabulary")
+async def get_vocabulary(after_id: int = 0, limit: int = Query(100, ge=1, le=500), pending: Optional[bool] = None):
+    """生词列表(键集分页); pending=true 只返回尚无释义的单词。"""
+    from app.services.vocabulary import vocabulary_store
+
+    return await run_in("db", vocabulary_store.list, after_id, limit, pending)
+
+@router.post("/vocabulary/define", status_code=202)
+async def define_vocabulary(background_tasks: BackgroundTasks):
+    """在后台为所有尚无释义的单词批量生成释义(已在运行时不会重复启动)。"""
+    from app.services.vocabulary_definer import vocabulary_definer
+
+    background_tasks.add_task(vocabulary_definer.run)
+    return await run_in("db", vocabulary_definer.status)
+
+@router.get("/vocabulary/define")
+async def vocabulary_define_status():
+    from app.services.vocabulary_definer import vocabulary_definer
+
+    return await run_in("db", vocabulary_definer.status)
@@ -1,4 +1,5 @@
 import os
+from typing import Dict, List
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -12,10 +13,142 @@ class Settings(BaseSettings):
     MODEL_DIR: str = os.path.join(DATA_DIR, "models")
     TTS_MODEL_PATH: str = os.path.join(MODEL_DIR, "tts")
     DB_PATH: str = os.path.join(DATA_DIR, "learning.db")
+    # SQLite 连接调优
+    DB_BUSY_TIMEOUT: float = 5.0
+    DB_SYNCHRONOUS: str = "NORMAL"
+    DB_CACHE_SIZE_KB: int = 64 * 1024
+    DB_MMAP_SIZE: int = 256 * 1024 * 1024
+    DB_CACHED_STATEMENTS: int = 256
+    # 生成的音频文件目录(通过 /static/audio 对外提供)
+    AUDIO_DIR: str = os.path.join(BASE_DIR, "app", "static", "audio")
+
+    # 模型加载方式: eager(启动时同步加载) / lazy(首次使用时加载) / background(启动后后台预热)
+    MODEL_LOAD_MODE: str = "background"
+
+    # TTS 配置
+    TTS_LANGUAGE: str = "en"
+    TTS_XTTS_SPEAKER: str = "female-en-5"
+    TTS_EDGE_VOICE: str = "en-US-AriaNeural"
+    # XTTS(CPU)推理: torch 线程数(0 表示使用 torch 默认值), 以及加载后是否做一次预热合成
+    TTS_TORCH_THREADS: int = 0
+    TTS_TORCH_INTEROP_THREADS: int = 0
+    TTS_WARMUP: bool = True
+    TTS_WARMUP_TEXT: str = "Hello, this is a warm-up sentence."
+    # TTS 音频缓存: 相同文本/引擎/音色/语言直接复用已生成的文件
+    TTS_CACHE_ENABLED: bool = True
+    # 条目数与字节上限只计未固定的条目, 预渲染的课时音频(pinned)不计入
+    TTS_CACHE_MAX_ENTRIES: int = 20000
+    TTS_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+    # 音频存储: XTTS 输出的 WAV 转码格式(mp3 / opus / wav 表示不转码)与码率, 需要 ffmpeg
+    TTS_AUDIO_CODEC: str = "mp3"
+    TTS_AUDIO_BITRATE: str = "48k"
+    FFMPEG_PATH: str = "ffmpeg"
+    # 后台垃圾回收: 执行间隔(秒, 0 表示关闭), 超出配额时淘汰到配额的这个比例,
+    # 以及临时文件 / 孤立文件至少保留的时间(秒)
+    TTS_AUDIO_GC_INTERVAL: int = 600
+    TTS_AUDIO_GC_LOW_WATERMARK: float = 0.9
+    TTS_AUDIO_ORPHAN_GRACE: int = 3600
+    # 内容寻址的音频文件在浏览器中的缓存时间(秒)
+    TTS_AUDIO_MAX_AGE: int = 365 * 24 * 3600
+    # 单词发音包(scripts/build_pronunciation_pack.py 生成): 单个单词的朗读直接从中取音频
+    PRONUNCIATION_PACK_PATH: str = os.path.join(DATA_DIR, "pronunciations.pack")
+    # 流式朗读长文本时同时合成的句子数
+    TTS_STREAM_CONCURRENCY: int = 3
+    # 课时音频预渲染: 导入课程后自动预渲染, 以及同时合成的句子数
+    PRERENDER_ON_IMPORT: bool = True
+    PRERENDER_CONCURRENCY: int = 2
+    # 同时运行的 edge-tts 合成任务上限
+    EDGE_TTS_MAX_CONCURRENCY: int = 4
+
+    # 网页导入: 总并发(同时也是 fetch 线程池的线程数) / 单站点并发、单页字节上限、请求超时(秒)与批量导入的 URL 数上限
+    IMPORT_MAX_CONCURRENCY: int = 16
+    IMPORT_PER_HOST_CONCURRENCY: int = 4
+    IMPORT_MAX_BYTES: int = 5 * 1024 * 1024
+    IMPORT_TIMEOUT: float = 10.0
+    IMPORT_BULK_MAX_URLS: int = 1000
+    # 正文提取使用的 HTML 解析后端: auto(有 lxml 时用 lxml) / lxml / html.parser
+    EXTRACTION_BACKEND: str = "auto"
+
+    # 全文搜索: 匹配结果超过该数量的宽泛查询只对最新的这么多条计算相关度(0 表示不限制)
+    SEARCH_MAX_RANKED: int = 1000
+
+    # 词汇表: 单次批量保存的条目上限; 后台批量释义每批的单词数、每个单词预留的生成 token 数、
+    # 每个单词最多尝试的次数, 以及保存新单词后是否自动开始释义
+    VOCAB_BULK_MAX_ITEMS: int = 1000
+    VOCAB_DEFINE_BATCH_SIZE: int = 20
+    VOCAB_DEFINE_TOKENS_PER_WORD: int = 60
+    VOCAB_DEFINE_MAX_ATTEMPTS: int = 3
+    VOCAB_DEFINE_ON_SAVE: bool = True
+
+    # llama.cpp 参数: 上下文窗口(token)、CPU 线程数(0 为 llama.cpp 默认)与提示词评估的批大小
+    LLM_N_CTX: int = 4096
+    LLM_N_THREADS: int = 0
+    LLM_N_BATCH: int = 512
+    # 生成长度上限: 默认值, 以及按请求类型(word / sentence / free)分别设置的值
+    LLM_MAX_TOKENS: int = 512
+    LLM_MAX_TOKENS_BY_KIND: Dict[str, int] = {"word": 160, "sentence": 384, "free": 512}
+    # 提示词(系统提示词 + 上下文 + 问题)的 token 预算; 上下文超出时只保留与问题最相关的句子。
+    # 实际预算不超过 LLM_N_CTX 减去生成长度上限
+    LLM_PROMPT_MAX_TOKENS: int = 1536
+
+    # LLM 提示词前缀 KV 缓存的内存预算(字节), 0 表示关闭
+    LLM_KV_CACHE_BYTES: int = 1024 * 1024 * 1024
+
+    # 小模型路由: MODEL_DIR/llm_small 中有 GGUF 模型时, 这些类型的请求以及没有上下文的简短查询
+    # (不超过 LLM_SMALL_MAX_CHARS 个字符的单词/短语、翻译或释义)交给小模型, 其余仍由大模型处理。
+    # 小模型有独立的调度队列与线程池, 不会排在大模型的长回答之后
+    LLM_SMALL_KINDS: List[str] = ["word"]
+    LLM_SMALL_MAX_CHARS: int = 80
+    LLM_SMALL_KV_CACHE_BYTES: int = 256 * 1024 * 1024
+    LLM_SMALL_MAX_CONCURRENCY: int = 1
+    # 大模型的推测解码: off / prompt_lookup(从提示词中匹配候选 token, 适合引用原文的讲解) /
+    # draft(由小模型起草, 需与大模型使用同一分词器, 如 Qwen2.5 系列); 每次最多起草的 token 数
+    LLM_SPECULATIVE_MODE: str = "off"
+    LLM_SPECULATIVE_TOKENS: int = 8
+
+    # LLM 回答缓存: 相同的问题/上下文直接返回已生成的回答
+    LLM_ANSWER_CACHE_ENABLED: bool = True
+    LLM_ANSWER_CACHE_TTL: int = 7 * 24 * 3600
+    LLM_ANSWER_CACHE_MAX_ENTRIES: int = 50000
+
+    # LLM 请求调度: 并发槽位、等待队列长度与最长排队时间(秒)
+    LLM_MAX_CONCURRENCY: int = 1
+    LLM_QUEUE_MAX_SIZE: int = 32
+    LLM_QUEUE_TIMEOUT: float = 60.0
+    # 超过该长度(字符)的自由提问以低优先级排队
+    LLM_LONG_REQUEST_CHARS: int = 400
+
+    # 监控: 是否提供 /metrics(Prometheus 文本格式)并统计 HTTP 请求,
+    # 以及是否在响应头中附带 Server-Timing(各阶段耗时, 便于在浏览器开发者工具中查看)
+    METRICS_ENABLED: bool = True
+    METRICS_SERVER_TIMING: bool = False
+
+    # 推理方式: local(本进程加载模型) / remote(模型由独立的推理服务器进程持有, 见 app/inference_server.py,
+    # 多个 API worker 共用一份模型内存)。推理服务器地址为 unix:///path/to.sock 或 http://host:port
+    INFERENCE_MODE: str = "local"
+    INFERENCE_SERVER_URL: str = "unix://" + os.path.join(DATA_DIR, "inference.sock")
+    # 连接推理服务器的超时, 以及等待响应(流式响应为每个数据块)的超时, 单位秒
+    INFERENCE_CONNECT_TIMEOUT: float = 2.0
+    INFERENCE_TIMEOUT: float = 300.0
+
+    # 阻塞任务执行器: 各类工作在独立线程池中运行, 互不挤占
+    EXECUTOR_LLM_WORKERS: int = 1
+    EXECUTOR_LLM_SMALL_WORKERS: int = 1
+    EXECUTOR_TTS_WORKERS: int = 2
+    EXECUTOR_DB_WORKERS: int = 4
+    EXECUTOR_IO_WORKERS: int = 8
     
     @property
     def LLM_MODEL_PATH(self) -> str:
-        llm_dir = os.path.join(self.MODEL_DIR, "llm")
+        return self._gguf_path(os.path.join(self.MODEL_DIR, "llm"))
+
+    @property
+    def LLM_SMALL_MODEL_PATH(self) -> str:
+        """小模型路径; 未下载小模型时为空字符串(所有请求都由大模型处理)。"""
+        path = self._gguf_path(os.path.join(self.MODEL_DIR, "llm_small"))
+        return path if os.path.exists(path) else ""
+
+    def _gguf_path(self, llm_dir: str) -> str:
         info_path = os.path.join(llm_dir, "model_info.txt")
         if os.path.exists(info_path):
             with open(info_path, "r") as f:
@@ -0,0 +1,87 @@
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from app.core.config import settings
+from app.core.metrics import db_query_seconds, executor_queue_seconds, executor_tasks_in_flight, record_timing
+
+
+def _pool_sizes() -> Dict[str, int]:
+    return {
+        "llm": settings.EXECUTOR_LLM_WORKERS,
+        "llm_small": settings.EXECUTOR_LLM_SMALL_WORKERS,
+        "tts": settings.EXECUTOR_TTS_WORKERS,
+        "db": settings.EXECUTOR_DB_WORKERS,
+        "io": settings.EXECUTOR_IO_WORKERS,
+        # 网页导入的下载与解析: 线程数与 IMPORT_MAX_CONCURRENCY 一致, 并发上限不会被线程数截断
+        "fetch": settings.IMPORT_MAX_CONCURRENCY,
+    }
+
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_lock = threading.Lock()
+
+
+def get_executor(name: str) -> ThreadPoolExecutor:
+    """按名称获取(首次使用时创建)专用线程池: llm / llm_small / tts / db / io / fetch。
+
+    推理、合成、数据库和网络请求各自使用独立的线程池,
+    这样长时间的推理不会占满事件循环或其他端点所需的线程。
+    """
+    executor = _executors.get(name)
+    if executor is not None:
+        return executor
+    with _lock:
+        if name not in _executors:
+            sizes = _pool_sizes()
+            if name not in sizes:
+                raise ValueError(f"未知的执行器: {name}")
+            _executors[name] = ThreadPoolExecutor(
+                max_workers=max(1, sizes[name]),
+                thread_name_prefix=f"{name}-worker",
+            )
+        return _executors[name]
+
+
+def _instrumented(name: str, func: Callable[..., Any], submitted: float) -> Callable[[], Any]:
+    def call() -> Any:
+        started = time.perf_counter()
+        executor_queue_seconds.observe(started - submitted, executor=name)
+        try:
+            return func()
+        finally:
+            elapsed = time.perf_counter() - started
+            record_timing(name, elapsed)
+            if name == "db":
+                operation = getattr(func.func, "__qualname__", None) or repr(func.func)
+                db_query_seconds.observe(elapsed, operation=operation)
+
+    return call
+
+
+async def run_in(name: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """在指定线程池中运行阻塞函数并等待结果。
+
+    函数在复制的上下文中运行(与 asyncio.to_thread 相同), 以便把耗时记到所属请求;
+    同时记录排队时间、在途任务数, 以及 db 线程池中各数据库操作的耗时。
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_executor(name)
+    call = _instrumented(name, functools.partial(func, *args, **kwargs), time.perf_counter())
+    executor_tasks_in_flight.inc(executor=name)
+    try:
+        return await loop.run_in_executor(executor, contextvars.copy_context().run, call)
+    finally:
+        executor_tasks_in_flight.dec(executor=name)
+
+
+def shutdown_executors(wait: bool = False) -> None:
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,383 @@
+import bisect
+import contextvars
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# 延迟类直方图的默认分桶(秒)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+RTF_BUCKETS = (0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric(ABC):
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        if len(labels) != len(self.label_names):
+            raise ValueError(f"{self.name} 需要标签 {self.label_names}, 实际为 {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """本指标的样本行(不含 HELP / TYPE)。"""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        return lines + self.samples()
+
+
+class Counter(_Metric):
+    """只增不减的计数器。"""
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def items(self) -> List[Tuple[Tuple[str, ...], float]]:
+        with self._lock:
+            return list(self._values.items())
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in sorted(self.items())
+        ]
+
+
+class Gauge(Counter):
+    """可增可减、也可直接设置的当前值。"""
+
+    type_name = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def _prepare(self, values: Iterable[Tuple[Dict[str, object], float]]) -> Dict[Tuple[str, ...], float]:
+        return {self._key(labels): value for labels, value in values}
+
+
+class Histogram(_Metric):
+    """按固定分桶累计观测值, 输出 _bucket / _sum / _count。"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # 每个桶只记本桶的次数, 输出时再累加为 Prometheus 的累计计数
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            snapshot = [(key, (list(state[0]), state[1], state[2])) for key, state in self._values.items()]
+        lines = []
+        for key, (counts, total, count) in sorted(snapshot):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """进程内的指标注册表, 以 Prometheus 文本格式(0.0.4)输出。
+
+    计数器与直方图在事件发生处直接更新; 队列深度、缓存命中率这类可以从服务状态
+    直接读出的值由采集回调(add_collector)在每次抓取前刷新, 热路径上不做额外工作。
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"指标 {metric.name} 已注册")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(
+        self, name: str, documentation: str, labels: Iterable[str] = (), buckets=LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        self._collectors.append(collector)
+
+    def replace(self, updates: Dict[Gauge, Iterable[Tuple[Dict[str, object], float]]]) -> None:
+        """整体替换若干仪表的全部值(没有出现的标签组合被删除)。
+
+        新值先在锁外构建, 再在注册表锁内一次换入; 输出同样持有该锁, 抓取不会看到
+        清空了一半或只更新了其中一个仪表的结果。
+        """
+        prepared = [(gauge, gauge._prepare(values)) for gauge, values in updates.items()]
+        with self._lock:
+            for gauge, values in prepared:
+                with gauge._lock:
+                    gauge._values = values
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                print(f"指标采集失败: {e}")
+        lines = []
+        with self._lock:
+            for metric in sorted(self._metrics.values(), key=lambda metric: metric.name):
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# --- HTTP ---
+http_requests_total = registry.counter(
+    "http_requests_total", "HTTP requests by method, route template and status code.", ("method", "route", "status")
+)
+http_request_seconds = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request duration until the response body is complete (including streamed bodies).",
+    ("method", "route"),
+)
+http_requests_in_flight = registry.gauge("http_requests_in_flight", "HTTP requests currently being served.")
+
+# --- 线程池 ---
+executor_queue_seconds = registry.histogram(
+    "executor_queue_seconds", "Time a blocking task waited for a worker thread.", ("executor",)
+)
+executor_tasks_in_flight = registry.gauge(
+    "executor_tasks_in_flight", "Blocking tasks submitted and not yet finished (queued + running).", ("executor",)
+)
+db_query_seconds = registry.histogram(
+    "db_query_seconds", "Duration of database operations run on the db executor.", ("operation",)
+)
+
+# --- LLM ---
+llm_queue_wait_seconds = registry.histogram(
+    "llm_queue_wait_seconds", "Time spent waiting for an LLM slot.", ("route", "priority")
+)
+llm_queue_depth = registry.gauge("llm_queue_depth", "Requests waiting for an LLM slot.", ("route",))
+llm_requests_in_flight = registry.gauge("llm_requests_in_flight", "Requests holding an LLM slot.", ("route",))
+llm_requests_total = registry.counter(
+    "llm_requests_total", "Finished LLM generations by model route (small / large) and mode (chat / stream).",
+    ("route", "mode"),
+)
+llm_prompt_tokens_total = registry.counter(
+    "llm_prompt_tokens_total", "Prompt tokens submitted to the model (including prefix-cache hits).", ("route",)
+)
+llm_prompt_eval_tokens_total = registry.counter(
+    "llm_prompt_eval_tokens_total", "Prompt tokens actually evaluated (not restored from the KV cache).", ("route",)
+)
+llm_generated_tokens_total = registry.counter(
+    "llm_generated_tokens_total", "Tokens generated by the model.", ("route",)
+)
+llm_prompt_eval_seconds = registry.histogram(
+    "llm_prompt_eval_seconds", "Prompt evaluation time per request.", ("route",)
+)
+llm_generation_seconds = registry.histogram(
+    "llm_generation_seconds", "Token generation time per request.", ("route",)
+)
+llm_tokens_per_second = registry.histogram(
+    "llm_tokens_per_second", "Throughput per request: prompt evaluation and generation.", ("route", "phase"),
+    RATE_BUCKETS,
+)
+llm_prompt_context_total = registry.counter(
+    "llm_prompt_context_total",
+    "Chat prompts by how the supplied context was used (none / full / selected / dropped).",
+    ("outcome",),
+)
+llm_kv_reuse_ratio = registry.gauge(
+    "llm_kv_cache_reuse_ratio", "Share of prompt tokens restored from the prefix KV cache.", ("route",)
+)
+
+# --- TTS ---
+tts_syntheses_total = registry.counter(
+    "tts_syntheses_total", "Speech syntheses by engine and outcome (ok / error).", ("engine", "outcome")
+)
+tts_synthesis_seconds = registry.histogram(
+    "tts_synthesis_seconds", "Speech synthesis time per request.", ("engine",)
+)
+tts_audio_seconds_total = registry.counter(
+    "tts_audio_seconds_total", "Seconds of audio synthesized.", ("engine",)
+)
+tts_real_time_factor = registry.histogram(
+    "tts_real_time_factor", "Synthesis time divided by audio duration (below 1 is faster than real time).",
+    ("engine",), RTF_BUCKETS,
+)
+
+# --- 音频存储 ---
+audio_transcode_seconds = registry.histogram(
+    "audio_transcode_seconds", "Time to transcode synthesized WAV audio.", ("codec",)
+)
+audio_storage_bytes = registry.gauge(
+    "audio_storage_bytes", "Bytes of cached audio by engine and file format (as of the last GC pass).",
+    ("engine", "format"),
+)
+audio_storage_files = registry.gauge(
+    "audio_storage_files", "Cached audio files by engine and file format (as of the last GC pass).",
+    ("engine", "format"),
+)
+audio_gc_removed_files_total = registry.counter(
+    "audio_gc_removed_files_total",
+    "Audio files or index entries removed by the garbage collector (evicted / missing / temp / orphan).",
+    ("reason",),
+)
+
+# --- 缓存 ---
+cache_requests_total = registry.counter(
+    "cache_requests_total", "Cache lookups by cache (answer / audio / pronunciation) and result (hit / miss).", ("cache", "result")
+)
+cache_hit_ratio = registry.gauge("cache_hit_ratio", "Hits / lookups since start, per cache.", ("cache",))
+
+
+def _collect_cache_ratios() -> None:
+    totals: Dict[str, Dict[str, float]] = {}
+    for (cache, result), value in cache_requests_total.items():
+        totals.setdefault(cache, {})[result] = value
+    for cache, counts in totals.items():
+        lookups = counts.get("hit", 0.0) + counts.get("miss", 0.0)
+        cache_hit_ratio.set(counts.get("hit", 0.0) / lookups if lookups else 0.0, cache=cache)
+
+
+registry.add_collector(_collect_cache_ratios)
+
+
+# --- 单个请求的分阶段耗时(Server-Timing) ---
+# 中间件为每个请求放入一个字典, 各处通过 record_timing 累加; 不在请求中时为 None, 记录被忽略。
+# run_in 把上下文复制到工作线程, 因此线程池中的代码也能记录到所属请求。
+_request_timings: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+def record_timing(name: str, seconds: float) -> None:
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+def server_timing_header(timings: Dict[str, float], total: float) -> str:
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def _route_label(scope: dict, root_path: str) -> str:
+    """用路由模板(如 /api/lessons/{lesson_id})而不是实际路径作为标签, 避免标签数量无限增长。"""
+    template = getattr(scope.get("route"), "path", None)
+    if template is None:
+        # 挂载的子应用(/static)不设置 route, 以挂载点作为标签
+        mount = scope.get("root_path", "")[len(root_path):]
+        return mount or "unmatched"
+    # 新版 FastAPI 中 include_router 的路由模板不含前缀(/api), 按路径段数从实际路径补回
+    segments = scope["path"].strip("/").split("/")
+    depth = len([segment for segment in template.strip("/").split("/") if segment])
+    prefix = segments[: len(segments) - depth]
+    if prefix == [""]:
+        prefix = []
+    return ("/" + "/".join(prefix) if prefix else "") + template
+
+
+class MetricsMiddleware:
+    """记录每个 HTTP 请求的次数、耗时与并发数的 ASGI 中间件。
+
+    直接包装 ASGI 的 send, 流式响应的耗时和在途计数覆盖到最后一块数据发出为止。
+    server_timing=True 时在响应头中加入 Server-Timing(db / llm / tts 等阶段耗时),
+    流式响应的头部在生成开始前发出, 只包含此前的阶段。
+    """
+
+    def __init__(self, app, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        root_path = scope.get("root_path", "")
+        timings: Dict[str, float] = {}
+        token = _request_timings.set(timings)
+        status = 500
+
+        async def send_with_metrics(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    header = server_timing_header(timings, time.perf_counter() - started)
+                    message = {**message, "headers": list(message.get("headers", [])) + [
+                        (b"server-timing", header.encode("latin-1"))
+                    ]}
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            http_requests_in_flight.dec()
+            _request_timings.reset(token)
+            route = _route_label(scope, root_path)
+            http_request_seconds.observe(time.perf_counter() - started, method=scope["method"], route=route)
+            http_requests_total.inc(method=scope["method"], route=route, status=status)
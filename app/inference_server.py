@@ -0,0 +1,205 @@
+"""
+Inference server: one long-lived process that owns the Llama model and the TTS engine.
+
+API workers started with INFERENCE_MODE=remote forward generation and synthesis here,
+so `uvicorn app.main:app --workers N` keeps a single copy of the model weights in memory.
+
+Usage:
+    python -m app.inference_server                                # listens on INFERENCE_SERVER_URL
+    python -m app.inference_server --url http://127.0.0.1:8100
+"""
+
+import os
+
+# 推理服务器自身总是在本进程加载模型
+os.environ["INFERENCE_MODE"] = "local"
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from typing import List, Optional
+from urllib.parse import urlsplit
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.executors import run_in, shutdown_executors
+from app.core.metrics import MetricsMiddleware, registry
+from app.models.database import close_all_connections, init_db
+from app.services.llm_service import DEFAULT_ROUTE, DEFAULT_SYSTEM_PROMPT, llm_service
+from app.services.tts_service import _audio_duration, tts_service
+
+app = FastAPI(title=f"{settings.PROJECT_NAME} Inference Server")
+app.add_middleware(MetricsMiddleware, server_timing=False)
+
+
+class GenerateRequest(BaseModel):
+    prompt: str
+    system_prompt: str = DEFAULT_SYSTEM_PROMPT
+    use_cache: bool = True
+    max_tokens: Optional[int] = None
+    route: str = DEFAULT_ROUTE
+
+
+class LoadRequest(BaseModel):
+    route: Optional[str] = None
+
+
+class TokenizeRequest(BaseModel):
+    texts: List[str]
+    route: str = DEFAULT_ROUTE
+
+
+class SynthesizeRequest(BaseModel):
+    text: str
+    speaker: str
+    language: str
+
+
+@app.on_event("startup")
+async def startup_event():
+    os.makedirs(settings.DATA_DIR, exist_ok=True)
+    init_db()
+    if settings.MODEL_LOAD_MODE == "eager":
+        await asyncio.gather(run_in("llm", llm_service.ensure_loaded), run_in("tts", tts_service.ensure_loaded))
+    elif settings.MODEL_LOAD_MODE == "background":
+        app.state.warmup_tasks = [
+            asyncio.create_task(run_in("llm", llm_service.ensure_loaded)),
+            asyncio.create_task(run_in("tts", tts_service.ensure_loaded)),
+        ]
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    shutdown_executors()
+    close_all_connections()
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/health")
+async def health():
+    return {"llm": llm_service.status(), "tts": tts_service.status()}
+
+
+@app.post("/llm/load")
+async def llm_load(request: LoadRequest):
+    await run_in("llm", llm_service.ensure_loaded, request.route)
+    return llm_service.status()
+
+
+@app.post("/llm/chat")
+async def llm_chat(request: GenerateRequest):
+    answer = await run_in(
+        llm_service.executor_for(request.route), llm_service.chat, request.prompt, request.system_prompt,
+        use_cache=request.use_cache, max_tokens=request.max_tokens, route=request.route,
+    )
+    return {"answer": answer}
+
+
+@app.post("/llm/stream")
+async def llm_stream(request: GenerateRequest):
+    """以 NDJSON 逐行返回 `{"token": ...}`, 结束时为 `{"done": true}`, 出错时为 `{"error": ...}`。
+
+    客户端断开连接时生成器被关闭, 生成在下一个 token 处停止。
+    """
+    async def lines():
+        try:
+            tokens = llm_service.astream_chat(
+                request.prompt, request.system_prompt, request.use_cache,
+                max_tokens=request.max_tokens, route=request.route,
+            )
+            async for token in tokens:
+                yield json.dumps({"token": token}, ensure_ascii=False) + "\n"
+        except Exception as e:
+            print(f"流式生成出错: {e}")
+            yield json.dumps({"error": str(e)}, ensure_ascii=False) + "\n"
+            return
+        yield json.dumps({"done": True}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.post("/llm/tokenize")
+async def llm_tokenize(request: TokenizeRequest):
+    return {"counts": await run_in("io", llm_service.count_tokens, request.texts, request.route)}
+
+
+@app.get("/llm/stats")
+async def llm_stats():
+    return llm_service.stats()
+
+
+@app.post("/tts/load")
+async def tts_load():
+    await run_in("tts", tts_service.ensure_loaded)
+    return tts_service.status()
+
+
+def _synthesize(text: str, speaker: str, language: str) -> dict:
+    if tts_service.xtts is not None:
+        return tts_service.xtts.synthesize(text, speaker, language)
+    # 没有 XTTSEngine 时走 tts_to_file, 经临时文件取回 WAV 数据
+    fd, path = tempfile.mkstemp(suffix=".wav")
+    os.close(fd)
+    try:
+        started = time.perf_counter()
+        tts_service.tts_to_file(text, path, speaker, language)
+        seconds = time.perf_counter() - started
+        with open(path, "rb") as f:
+            audio = f.read()
+        duration = _audio_duration(path) or 0.0
+    finally:
+        os.remove(path)
+    return {"audio": audio, "sample_rate": 0, "duration": duration, "seconds": seconds}
+
+
+@app.post("/tts/synthesize")
+async def tts_synthesize(request: SynthesizeRequest):
+    """合成一段文本, 返回 WAV 数据; 采样率、音频时长与合成耗时放在响应头中。"""
+    if not await run_in("tts", tts_service.ensure_loaded) or tts_service.engine != "xtts":
+        raise HTTPException(status_code=503, detail="XTTS is not available on the inference server")
+    try:
+        result = await run_in("tts", _synthesize, request.text, request.speaker, request.language)
+    except Exception as e:
+        print(f"生成音频时出错: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return Response(
+        content=result["audio"],
+        media_type="audio/wav",
+        headers={
+            "X-Sample-Rate": str(result["sample_rate"]),
+            "X-Duration": f"{result['duration']:.4f}",
+            "X-Synthesis-Seconds": f"{result['seconds']:.4f}",
+        },
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve LLM generation and TTS synthesis to API workers")
+    parser.add_argument("--url", default=settings.INFERENCE_SERVER_URL, help="unix:///path/to.sock or http://host:port")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    parts = urlsplit(args.url)
+    if parts.scheme == "unix":
+        # 上次异常退出时遗留的套接字文件会导致绑定失败
+        if os.path.exists(parts.path):
+            os.remove(parts.path)
+        uvicorn.run(app, uds=parts.path)
+    elif parts.scheme == "http":
+        uvicorn.run(app, host=parts.hostname, port=parts.port or 80)
+    else:
+        parser.error(f"unsupported URL: {args.url}")
+
+
+if __name__ == "__main__":
+    main()
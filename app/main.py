@@ -1,14 +1,33 @@
+import asyncio
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from app.core.config import settings
-from app.models.database import init_db
+from app.core.metrics import MetricsMiddleware, registry
+from app.models.database import close_all_connections, init_db
 from app.api.endpoints import router as api_router
+from app.core.executors import run_in, shutdown_executors
+from app.services.audio_cache import AUDIO_URL_PREFIX
+from app.services.audio_storage import AudioFiles, audio_storage
+from app.services.llm_service import llm_service
+from app.services.tts_service import tts_service
 import os
 
 app = FastAPI(title=settings.PROJECT_NAME)
 
 app.include_router(api_router, prefix="/api")
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, server_timing=settings.METRICS_SERVER_TIMING)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics():
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# 生成的音频: 内容寻址的文件可被浏览器永久缓存, 并支持 Range 请求; 需先于 /static 挂载
+os.makedirs(settings.AUDIO_DIR, exist_ok=True)
+app.mount(AUDIO_URL_PREFIX, AudioFiles(directory=settings.AUDIO_DIR, max_age=settings.TTS_AUDIO_MAX_AGE), name="audio")
+
 # 挂载静态文件
 static_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
 if not os.path.exists(static_dir):
@@ -22,6 +41,26 @@ async def startup_event():
         os.makedirs(settings.DATA_DIR)
     init_db()
 
+    if settings.MODEL_LOAD_MODE == "eager":
+        await asyncio.gather(run_in("llm", llm_service.ensure_loaded), run_in("tts", tts_service.ensure_loaded))
+    elif settings.MODEL_LOAD_MODE == "background":
+        # 服务立即可用, 模型在后台预热; 保留任务引用避免被回收
+        app.state.warmup_tasks = [
+            asyncio.create_task(run_in("llm", llm_service.ensure_loaded)),
+            asyncio.create_task(run_in("tts", tts_service.ensure_loaded)),
+        ]
+
+    if settings.TTS_AUDIO_GC_INTERVAL > 0:
+        app.state.audio_gc_task = asyncio.create_task(audio_storage.run_gc(settings.TTS_AUDIO_GC_INTERVAL))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    gc_task = getattr(app.state, "audio_gc_task", None)
+    if gc_task is not None:
+        gc_task.cancel()
+    shutdown_executors()
+    close_all_connections()
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to English Learning Assistant API"}
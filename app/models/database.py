@@ -1,49 +1,333 @@
 import sqlite3
+import threading
+from typing import List, Tuple
 from app.core.config import settings
 
-def get_db_connection():
-    conn = sqlite3.connect(settings.DB_PATH)
+
+class PooledConnection(sqlite3.Connection):
+    """按线程复用的 SQLite 连接。
+
+    调用方仍按原来的方式 get_db_connection() ... conn.close() 使用;
+    close() 不会真正关闭连接, 只回滚未提交的事务,
+    连接(及其已编译语句缓存)留给本线程下次使用。
+    调用方之间不嵌套使用连接: 持有未提交的事务时不要调用其他会获取连接的函数。
+    """
+
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+
+    def close_for_real(self):
+        self.closed = True
+        super().close()
+
+
+_local = threading.local()
+_connections: List[PooledConnection] = []
+_connections_lock = threading.Lock()
+
+
+def _connect() -> PooledConnection:
+    conn = sqlite3.connect(
+        settings.DB_PATH,
+        timeout=settings.DB_BUSY_TIMEOUT,
+        factory=PooledConnection,
+        cached_statements=settings.DB_CACHED_STATEMENTS,
+        # 连接只在创建它的线程中使用, 仅关闭时可能跨线程
+        check_same_thread=False,
+    )
     conn.row_factory = sqlite3.Row
+    # WAL 允许读与单个写者并发, 避免 "database is locked"
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={settings.DB_SYNCHRONOUS}")
+    conn.execute(f"PRAGMA cache_size=-{int(settings.DB_CACHE_SIZE_KB)}")
+    conn.execute(f"PRAGMA mmap_size={int(settings.DB_MMAP_SIZE)}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    with _connections_lock:
+        _connections.append(conn)
+    return conn
+
+
+def get_db_connection():
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(conn, "closed", False):
+        conn = _connect()
+        _local.conn = conn
     return conn
 
+
+def close_all_connections() -> None:
+    """关闭所有线程的连接(应用退出时调用)。"""
+    with _connections_lock:
+        connections = list(_connections)
+        _connections.clear()
+    for conn in connections:
+        try:
+            conn.close_for_real()
+        except sqlite3.Error:
+            pass
+    _local.__dict__.clear()
+
+
+def _catalog_trigger(table: str, event: str) -> str:
+    return f'''
+    CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_catalog AFTER {event} ON {table}
+    BEGIN
+        UPDATE catalog_state SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = 1;
+    END
+    '''
+
+
+# 全文索引: 外部内容(external content)的 FTS5 表, 只保存倒排索引, 原文仍在源表中。
+# (源表, 索引列): 触发器在增删改时增量维护索引, 只有索引列变化才触发更新
+FTS_TABLES = {
+    "courses": ("title", "description"),
+    "lessons": ("title", "content"),
+    "vocabulary": ("word", "context_sentence", "definition"),
+}
+
+
+def _fts_statements(table: str) -> List[str]:
+    columns = FTS_TABLES[table]
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    return [
+        f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5(
+            {column_list}, content='{table}', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_insert AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO {table}_fts (rowid, {column_list}) VALUES (new.id, {new_values});
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_delete AFTER DELETE ON {table}
+        BEGIN
+            INSERT INTO {table}_fts ({table}_fts, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_update AFTER UPDATE OF {column_list} ON {table}
+        BEGIN
+            INSERT INTO {table}_fts ({table}_fts, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {table}_fts (rowid, {column_list}) VALUES (new.id, {new_values});
+        END
+        ''',
+        # 为已有数据建立索引
+        f"INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild')",
+    ]
+
+
+# 版本化迁移: (版本号, 说明, SQL 语句列表), 版本号记录在 PRAGMA user_version 中。
+# 只能追加新迁移, 不要修改已发布的迁移。
+MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (1, "initial schema", [
+        # 课程表
+        '''
+        CREATE TABLE IF NOT EXISTS courses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT,
+            source_url TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        # 课时表
+        '''
+        CREATE TABLE IF NOT EXISTS lessons (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            course_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            content TEXT NOT NULL,
+            audio_path TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (course_id) REFERENCES courses (id)
+        )
+        ''',
+        # 词汇表(已保存的单词)
+        '''
+        CREATE TABLE IF NOT EXISTS vocabulary (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            word TEXT NOT NULL,
+            context_sentence TEXT,
+            definition TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        # TTS 音频缓存索引(内容寻址)
+        '''
+        CREATE TABLE IF NOT EXISTS audio_cache (
+            cache_key TEXT PRIMARY KEY,
+            engine TEXT NOT NULL,
+            voice TEXT,
+            language TEXT,
+            text TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            size_bytes INTEGER NOT NULL DEFAULT 0,
+            hit_count INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_access REAL NOT NULL
+        )
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_audio_cache_last_access ON audio_cache (last_access)",
+        # LLM 回答缓存(相同问题 + 上下文 + 模型 + 采样参数)
+        '''
+        CREATE TABLE IF NOT EXISTS llm_answer_cache (
+            cache_key TEXT PRIMARY KEY,
+            model TEXT NOT NULL,
+            response TEXT NOT NULL,
+            hit_count INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        )
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_llm_answer_cache_last_access ON llm_answer_cache (last_access)",
+    ]),
+    (2, "catalog lookup indexes", [
+        "CREATE INDEX IF NOT EXISTS idx_lessons_course_id ON lessons (course_id)",
+        "CREATE INDEX IF NOT EXISTS idx_courses_title ON courses (title)",
+    ]),
+    # 目录版本号: 课程/课时任何变化都会递增, 用于列表接口的 ETag / Last-Modified
+    (3, "catalog version tracking", [
+        '''
+        CREATE TABLE IF NOT EXISTS catalog_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL,
+            updated_at TIMESTAMP NOT NULL
+        )
+        ''',
+        "INSERT OR IGNORE INTO catalog_state (id, version, updated_at) VALUES (1, 1, CURRENT_TIMESTAMP)",
+        *[
+            _catalog_trigger(table, event)
+            for table in ("courses", "lessons")
+            for event in ("INSERT", "UPDATE", "DELETE")
+        ],
+    ]),
+    # 课时音频预渲染: 每句一条记录(可断点续跑), 预渲染音频在缓存中固定不被淘汰
+    (4, "lesson audio prerendering", [
+        '''
+        CREATE TABLE IF NOT EXISTS lesson_audio (
+            lesson_id INTEGER NOT NULL,
+            sentence_index INTEGER NOT NULL,
+            sentence_text TEXT NOT NULL,
+            audio_url TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (lesson_id, sentence_index),
+            FOREIGN KEY (lesson_id) REFERENCES lessons (id)
+        )
+        ''',
+        "ALTER TABLE audio_cache ADD COLUMN pinned INTEGER NOT NULL DEFAULT 0",
+    ]),
+    # 网页导入的条件请求状态: 重新导入时带上 ETag / Last-Modified, 未变化的页面直接跳过
+    (5, "import fetch state", [
+        '''
+        CREATE TABLE IF NOT EXISTS fetch_state (
+            source_url TEXT PRIMARY KEY,
+            course_id INTEGER,
+            etag TEXT,
+            last_modified TEXT,
+            fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (course_id) REFERENCES courses (id)
+        )
+        ''',
+    ]),
+    # 正文内容哈希: 导入时识别已存在的相同文章(旧数据由导入器按需回填)
+    (6, "lesson content hash", [
+        "ALTER TABLE lessons ADD COLUMN content_hash TEXT",
+        "CREATE INDEX IF NOT EXISTS idx_lessons_content_hash ON lessons (content_hash)",
+    ]),
+    # 课时分句: 句子按 (课时, 内容键) 唯一, 重新切分时未变化的句子保留原 id,
+    # 逐句音频与答疑都以句子 id 为键; 删除课时时一并清理
+    (7, "lesson sentences", [
+        '''
+        CREATE TABLE IF NOT EXISTS lesson_sentences (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            lesson_id INTEGER NOT NULL,
+            sentence_key TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            section_index INTEGER NOT NULL,
+            paragraph_index INTEGER NOT NULL,
+            start_offset INTEGER NOT NULL,
+            end_offset INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            UNIQUE (lesson_id, sentence_key),
+            FOREIGN KEY (lesson_id) REFERENCES lessons (id)
+        )
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_lesson_sentences_position ON lesson_sentences (lesson_id, position)",
+        '''
+        CREATE TABLE IF NOT EXISTS lesson_sections (
+            lesson_id INTEGER NOT NULL,
+            section_index INTEGER NOT NULL,
+            title TEXT,
+            start_offset INTEGER NOT NULL,
+            end_offset INTEGER NOT NULL,
+            first_position INTEGER NOT NULL,
+            sentence_count INTEGER NOT NULL,
+            PRIMARY KEY (lesson_id, section_index),
+            FOREIGN KEY (lesson_id) REFERENCES lessons (id)
+        )
+        ''',
+        "ALTER TABLE lesson_audio ADD COLUMN sentence_id INTEGER",
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_lessons_delete_segments AFTER DELETE ON lessons
+        BEGIN
+            DELETE FROM lesson_sentences WHERE lesson_id = old.id;
+            DELETE FROM lesson_sections WHERE lesson_id = old.id;
+            DELETE FROM lesson_audio WHERE lesson_id = old.id;
+        END
+        ''',
+    ]),
+    (8, "full-text search", [statement for table in FTS_TABLES for statement in _fts_statements(table)]),
+    # 词汇去重: 同一单词(不区分大小写)在同一例句下只保留最早的一条, 组内已有的释义合并到保留的记录上;
+    # define_attempts 记录后台释义的尝试次数, 多次失败的单词不再重试
+    (9, "vocabulary dedupe", [
+        '''
+        UPDATE vocabulary SET definition = (
+            SELECT d.definition FROM vocabulary d
+            WHERE d.word = vocabulary.word COLLATE NOCASE
+              AND IFNULL(d.context_sentence, '') = IFNULL(vocabulary.context_sentence, '')
+              AND d.definition IS NOT NULL
+            ORDER BY d.id LIMIT 1
+        )
+        WHERE definition IS NULL
+        ''',
+        '''
+        DELETE FROM vocabulary WHERE id NOT IN (
+            SELECT MIN(id) FROM vocabulary GROUP BY word COLLATE NOCASE, IFNULL(context_sentence, '')
+        )
+        ''',
+        '''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_vocabulary_word_context
+        ON vocabulary (word COLLATE NOCASE, IFNULL(context_sentence, ''))
+        ''',
+        "ALTER TABLE vocabulary ADD COLUMN define_attempts INTEGER NOT NULL DEFAULT 0",
+        "CREATE INDEX IF NOT EXISTS idx_vocabulary_pending ON vocabulary (id) WHERE definition IS NULL",
+    ]),
+    # 按音频 URL 查找课时音频: 垃圾回收据此取消不再被引用的预渲染音频的固定, 转码时据此改写引用
+    (10, "lesson audio url index", [
+        "CREATE INDEX IF NOT EXISTS idx_lesson_audio_url ON lesson_audio (audio_url)",
+    ]),
+]
+
+
 def init_db():
     conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # 课程表
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS courses (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        title TEXT NOT NULL,
-        description TEXT,
-        source_url TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    ''')
-    
-    # 课时表
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS lessons (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        course_id INTEGER NOT NULL,
-        title TEXT NOT NULL,
-        content TEXT NOT NULL,
-        audio_path TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (course_id) REFERENCES courses (id)
-    )
-    ''')
-    
-    # 词汇表(已保存的单词)
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS vocabulary (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        word TEXT NOT NULL,
-        context_sentence TEXT,
-        definition TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    try:
+        current = conn.execute("PRAGMA user_version").fetchone()[0]
+        for version, description, statements in MIGRATIONS:
+            if version <= current:
+                continue
+            print(f"应用数据库迁移 {version}: {description}")
+            with conn:
+                conn.execute("BEGIN")
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {version}")
+    finally:
+        conn.close()
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+from typing import Optional
+
+from app.core.config import settings
+from app.core.metrics import cache_requests_total
+from app.models.database import get_db_connection
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class AnswerCache:
+    """LLM 回答的持久化缓存。
+
+    键由 规范化问题 + 系统提示词(含上下文) + 模型 + 采样参数 计算得到,
+    保存在 learning.db 的 llm_answer_cache 表中。条目超过 TTL 视为失效,
+    超过条目上限时按最近访问时间淘汰。
+    """
+
+    def __init__(self, ttl: int, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFC", text or "")).strip()
+
+    @classmethod
+    def make_key(cls, prompt: str, system_prompt: str, model: str, sampling: dict) -> str:
+        raw = "\x1f".join([
+            cls.normalize(prompt),
+            cls.normalize(system_prompt),
+            model,
+            json.dumps(sampling, sort_keys=True),
+        ])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, record_stats: bool = True) -> Optional[str]:
+        now = time.time()
+        conn = get_db_connection()
+        try:
+            row = conn.execute(
+                "SELECT response, created_at FROM llm_answer_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row and now - row["created_at"] <= self.ttl:
+                conn.execute(
+                    "UPDATE llm_answer_cache SET last_access = ?, hit_count = hit_count + 1 WHERE cache_key = ?",
+                    (now, key),
+                )
+                conn.commit()
+                if record_stats:
+                    self.record(True)
+                return row["response"]
+
+            if row:
+                conn.execute("DELETE FROM llm_answer_cache WHERE cache_key = ?", (key,))
+                conn.commit()
+            if record_stats:
+                self.record(False)
+            return None
+        finally:
+            conn.close()
+
+    def record(self, hit: bool) -> None:
+        """计入一次命中或未命中(调用方查询了多个键、只应统计一次时使用)。"""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        cache_requests_total.inc(cache="answer", result="hit" if hit else "miss")
+
+    def put(self, key: str, model: str, response: str) -> None:
+        if not response:
+            return
+        now = time.time()
+        conn = get_db_connection()
+        try:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO llm_answer_cache (cache_key, model, response, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (key, model, response, now, now),
+            )
+            self._evict(conn, now)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _evict(self, conn, now: float) -> None:
+        evicted = conn.execute(
+            "DELETE FROM llm_answer_cache WHERE created_at < ?", (now - self.ttl,)
+        ).rowcount
+        count = conn.execute("SELECT COUNT(*) FROM llm_answer_cache").fetchone()[0]
+        if count > self.max_entries:
+            evicted += conn.execute(
+                """
+                DELETE FROM llm_answer_cache WHERE cache_key IN (
+                    SELECT cache_key FROM llm_answer_cache ORDER BY last_access ASC LIMIT ?
+                )
+                """,
+                (count - self.max_entries,),
+            ).rowcount
+        if evicted:
+            with self._lock:
+                self.evictions += evicted
+
+    def stats(self) -> dict:
+        conn = get_db_connection()
+        try:
+            count = conn.execute("SELECT COUNT(*) FROM llm_answer_cache").fetchone()[0]
+        finally:
+            conn.close()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": settings.LLM_ANSWER_CACHE_ENABLED,
+                "entries": count,
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+answer_cache = AnswerCache(
+    ttl=settings.LLM_ANSWER_CACHE_TTL,
+    max_entries=settings.LLM_ANSWER_CACHE_MAX_ENTRIES,
+)
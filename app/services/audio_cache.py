@@ -0,0 +1,235 @@
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from typing import Optional
+
+from app.core.config import settings
+from app.core.metrics import cache_requests_total
+from app.models.database import get_db_connection
+
+AUDIO_URL_PREFIX = "/static/audio"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_SINGLE_WORD_RE = re.compile(r"^[A-Za-z][A-Za-z'-]*$")
+
+
+class AudioCache:
+    """内容寻址的 TTS 音频缓存。
+
+    键由 规范化文本 + 引擎 + 音色 + 语言 计算得到, 文件名即键本身,
+    索引保存在 learning.db 的 audio_cache 表中, 因此重启后依然有效。
+    超出条目数或字节预算时按最近访问时间(LRU)淘汰; 固定(pinned)的条目既不淘汰,
+    也不计入预算, 预渲染再多课时也不会挤掉按需合成的音频; 不再被课时引用的条目由垃圾回收取消固定。
+    淘汰由后台垃圾回收执行(见 audio_storage), 写入时不做检查。
+    """
+
+    def __init__(self, audio_dir: str, max_entries: int, max_bytes: int):
+        self.audio_dir = audio_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        text = unicodedata.normalize("NFC", text)
+        text = _WHITESPACE_RE.sub(" ", text).strip()
+        # 单个单词的大小写不影响发音("The" 与 "the"), 全大写的缩写除外
+        if _SINGLE_WORD_RE.match(text) and not text.isupper():
+            text = text.lower()
+        return text
+
+    @classmethod
+    def make_key(cls, text: str, engine: str, voice: str, language: str) -> str:
+        raw = "\x1f".join([cls.normalize_text(text), engine, voice or "", language or ""])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+    def path_for(self, filename: str) -> str:
+        return os.path.join(self.audio_dir, filename)
+
+    @staticmethod
+    def url_for(filename: str) -> str:
+        return f"{AUDIO_URL_PREFIX}/{filename}"
+
+    def lookup(self, key: str, pin: bool = False) -> Optional[str]:
+        """命中时返回音频 URL 并刷新访问时间, 未命中返回 None。
+
+        pin=True 时同时把条目标记为固定(预渲染的课时音频), 固定条目不参与 LRU 淘汰。
+        """
+        conn = get_db_connection()
+        try:
+            row = conn.execute(
+                "SELECT filename FROM audio_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row and os.path.exists(self.path_for(row["filename"])):
+                conn.execute(
+                    """
+                    UPDATE audio_cache SET last_access = ?, hit_count = hit_count + 1, pinned = MAX(pinned, ?)
+                    WHERE cache_key = ?
+                    """,
+                    (time.time(), int(pin), key),
+                )
+                conn.commit()
+                with self._lock:
+                    self.hits += 1
+                cache_requests_total.inc(cache="audio", result="hit")
+                return self.url_for(row["filename"])
+
+            if row:
+                # 文件已被手动删除: 清理失效的索引
+                conn.execute("DELETE FROM audio_cache WHERE cache_key = ?", (key,))
+                conn.commit()
+            with self._lock:
+                self.misses += 1
+            cache_requests_total.inc(cache="audio", result="miss")
+            return None
+        finally:
+            conn.close()
+
+    def store(
+        self, key: str, filename: str, text: str, engine: str, voice: str, language: str, pin: bool = False
+    ) -> str:
+        """登记一个已写入 audio_dir 的文件。
+
+        单个文件就超过字节预算时不登记(否则下次垃圾回收会淘汰其他全部条目后再淘汰它本身);
+        文件仍可通过返回的 URL 播放, 之后作为孤立文件被清理。
+        """
+        path = self.path_for(filename)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size > self.max_bytes and not pin:
+            print(f"音频 {filename} 大小 {size} 字节, 超过缓存预算, 不写入缓存")
+            return self.url_for(filename)
+        conn = get_db_connection()
+        try:
+            conn.execute(
+                """
+                INSERT INTO audio_cache
+                    (cache_key, engine, voice, language, text, filename, size_bytes, last_access, pinned)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (cache_key) DO UPDATE SET
+                    filename = excluded.filename,
+                    size_bytes = excluded.size_bytes,
+                    last_access = excluded.last_access,
+                    pinned = MAX(audio_cache.pinned, excluded.pinned)
+                """,
+                (key, engine, voice, language, self.normalize_text(text), filename, size, time.time(), int(pin)),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        return self.url_for(filename)
+
+    def evict(self, max_entries: int, max_bytes: int, target_entries: int, target_bytes: int) -> tuple:
+        """未固定条目的数量或总字节数超过上限时, 按 LRU 淘汰未固定的条目直到降到目标值以下。
+
+        返回 (淘汰条目数, 释放字节数)。
+        """
+        conn = get_db_connection()
+        try:
+            count, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM audio_cache WHERE pinned = 0"
+            ).fetchone()
+            if count <= max_entries and total <= max_bytes:
+                return 0, 0
+
+            rows = conn.execute(
+                "SELECT cache_key, filename, size_bytes FROM audio_cache WHERE pinned = 0 ORDER BY last_access ASC"
+            )
+            victims = []
+            for row in rows:
+                if count <= target_entries and total <= target_bytes:
+                    break
+                victims.append(row)
+                count -= 1
+                total -= row["size_bytes"]
+
+            conn.executemany("DELETE FROM audio_cache WHERE cache_key = ?", [(row["cache_key"],) for row in victims])
+            conn.commit()
+        finally:
+            conn.close()
+        # 先提交索引再删除文件: 删除过程中到来的查询不会拿到已不存在的文件
+        for row in victims:
+            try:
+                os.remove(self.path_for(row["filename"]))
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self.evictions += len(victims)
+        return len(victims), sum(row["size_bytes"] for row in victims)
+
+    def unpin_unreferenced(self, grace: float) -> int:
+        """取消不再被 lesson_audio 引用的条目的固定, 返回取消的条数。
+
+        课时被删除、句子被修改或重新切分、更换音色后重新预渲染, 旧的音频都不再被引用,
+        取消固定后按 LRU 正常淘汰。grace 秒内访问过的条目不处理: 预渲染先固定音频, 稍后才写入 lesson_audio。
+        """
+        conn = get_db_connection()
+        try:
+            cursor = conn.execute(
+                """
+                UPDATE audio_cache SET pinned = 0
+                WHERE pinned = 1 AND last_access < ?
+                  AND NOT EXISTS (
+                      SELECT 1 FROM lesson_audio a WHERE a.audio_url = ? || '/' || audio_cache.filename
+                  )
+                """,
+                (time.time() - grace, AUDIO_URL_PREFIX),
+            )
+            conn.commit()
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+    def drop_missing(self) -> int:
+        """删除文件已不存在的索引条目, 返回删除的条数。"""
+        conn = get_db_connection()
+        try:
+            missing = [
+                (row["cache_key"],)
+                for row in conn.execute("SELECT cache_key, filename FROM audio_cache")
+                if not os.path.exists(self.path_for(row["filename"]))
+            ]
+            conn.executemany("DELETE FROM audio_cache WHERE cache_key = ?", missing)
+            conn.commit()
+        finally:
+            conn.close()
+        return len(missing)
+
+    def stats(self) -> dict:
+        conn = get_db_connection()
+        try:
+            count, total, pinned, pinned_bytes = conn.execute(
+                """
+                SELECT COUNT(*), COALESCE(SUM(size_bytes), 0), COALESCE(SUM(pinned), 0),
+                       COALESCE(SUM(CASE WHEN pinned THEN size_bytes ELSE 0 END), 0)
+                FROM audio_cache
+                """
+            ).fetchone()
+        finally:
+            conn.close()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": count,
+                "bytes": total,
+                "pinned": pinned,
+                "pinned_bytes": pinned_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+audio_cache = AudioCache(
+    audio_dir=settings.AUDIO_DIR,
+    max_entries=settings.TTS_CACHE_MAX_ENTRIES,
+    max_bytes=settings.TTS_CACHE_MAX_BYTES,
+)
@@ -0,0 +1,196 @@
+import asyncio
+import os
+from typing import Iterable, List, Optional
+
+from app.core.config import settings
+from app.core.executors import run_in
+from app.models.database import get_db_connection
+from app.services.audio_cache import AUDIO_URL_PREFIX
+from app.services.lesson_segments import lesson_segmenter
+from app.services.tts_service import tts_service
+
+PLAYLIST_SUBDIR = "lessons"
+
+
+class AudioPrerenderer:
+    """把课时逐句预先合成为音频, 播放时无需再做推理。
+
+    每完成一句就写入 lesson_audio 表, 中断后重新运行会跳过已完成的句子;
+    全部完成后生成 m3u 播放列表并写入 lessons.audio_path。
+    """
+
+    def __init__(self, concurrency: int):
+        self.concurrency = max(1, concurrency)
+
+    def _load_lesson(self, lesson_id: int) -> Optional[dict]:
+        sentences = lesson_segmenter.spoken_sentences(lesson_id)
+        if sentences is None:
+            return None
+        conn = get_db_connection()
+        try:
+            rows = conn.execute(
+                "SELECT sentence_index, sentence_text, audio_url FROM lesson_audio WHERE lesson_id = ?",
+                (lesson_id,),
+            ).fetchall()
+        finally:
+            conn.close()
+        return {
+            "id": lesson_id,
+            "sentences": sentences,
+            "done": {row["sentence_index"]: dict(row) for row in rows},
+        }
+
+    @staticmethod
+    def _audio_exists(url: str) -> bool:
+        filename = url[len(AUDIO_URL_PREFIX) + 1:]
+        return os.path.exists(os.path.join(settings.AUDIO_DIR, filename))
+
+    def _record_sentence(self, lesson_id: int, sentence: dict, audio_url: str) -> None:
+        conn = get_db_connection()
+        try:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO lesson_audio (lesson_id, sentence_index, sentence_id, sentence_text, audio_url)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (lesson_id, sentence["position"], sentence["id"], sentence["text"], audio_url),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _finish_lesson(self, lesson_id: int, sentence_count: int) -> str:
+        """清理已不存在的句子记录, 写出播放列表并更新 lessons.audio_path。"""
+        conn = get_db_connection()
+        try:
+            conn.execute(
+                "DELETE FROM lesson_audio WHERE lesson_id = ? AND sentence_index >= ?",
+                (lesson_id, sentence_count),
+            )
+            audio_path = self._write_playlist(conn, lesson_id)
+            conn.execute("UPDATE lessons SET audio_path = ? WHERE id = ?", (audio_path, lesson_id))
+            conn.commit()
+            return audio_path
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _write_playlist(conn, lesson_id: int) -> str:
+        urls = [
+            row["audio_url"]
+            for row in conn.execute(
+                "SELECT audio_url FROM lesson_audio WHERE lesson_id = ? ORDER BY sentence_index",
+                (lesson_id,),
+            )
+        ]
+        playlist_name = f"{PLAYLIST_SUBDIR}/lesson-{lesson_id}.m3u"
+        playlist_path = os.path.join(settings.AUDIO_DIR, playlist_name)
+        os.makedirs(os.path.dirname(playlist_path), exist_ok=True)
+        tmp_path = f"{playlist_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("#EXTM3U\n")
+            f.writelines(f"{url}\n" for url in urls)
+        os.replace(tmp_path, playlist_path)
+        return f"{AUDIO_URL_PREFIX}/{playlist_name}"
+
+    def write_playlist(self, lesson_id: int) -> str:
+        """按 lesson_audio 中的记录重新生成课时的播放列表(如音频文件被转码改名之后)。"""
+        conn = get_db_connection()
+        try:
+            return self._write_playlist(conn, lesson_id)
+        finally:
+            conn.close()
+
+    async def prerender_lesson(self, lesson_id: int, semaphore: Optional[asyncio.Semaphore] = None) -> dict:
+        lesson = await run_in("db", self._load_lesson, lesson_id)
+        if lesson is None:
+            return {"lesson_id": lesson_id, "error": "lesson not found"}
+
+        semaphore = semaphore or asyncio.Semaphore(self.concurrency)
+        sentences: List[dict] = lesson["sentences"]
+        done = lesson["done"]
+        pending = [
+            sentence
+            for sentence in sentences
+            if not (
+                sentence["position"] in done
+                and done[sentence["position"]]["sentence_text"] == sentence["text"]
+                and self._audio_exists(done[sentence["position"]]["audio_url"])
+            )
+        ]
+
+        async def render(sentence: dict) -> bool:
+            async with semaphore:
+                audio_url = await tts_service.agenerate_audio(sentence["text"], pin=True)
+            if not audio_url:
+                return False
+            await run_in("db", self._record_sentence, lesson_id, sentence, audio_url)
+            return True
+
+        results = await asyncio.gather(*(render(sentence) for sentence in pending))
+        failed = results.count(False)
+        summary = {
+            "lesson_id": lesson_id,
+            "sentences": len(sentences),
+            "rendered": len(pending) - failed,
+            "skipped": len(sentences) - len(pending),
+            "failed": failed,
+        }
+        if not failed:
+            summary["audio_path"] = await run_in("db", self._finish_lesson, lesson_id, len(sentences))
+        return summary
+
+    async def prerender_lessons(self, lesson_ids: Iterable[int]) -> List[dict]:
+        # 所有课时共用一个信号量, 整批任务的并发合成数受 PRERENDER_CONCURRENCY 约束
+        semaphore = asyncio.Semaphore(self.concurrency)
+        summaries = []
+        for lesson_id in lesson_ids:
+            summary = await self.prerender_lesson(lesson_id, semaphore)
+            print(f"课时 {lesson_id} 预渲染: {summary}")
+            summaries.append(summary)
+        return summaries
+
+    def _lesson_ids(self, course_id: Optional[int] = None) -> List[int]:
+        conn = get_db_connection()
+        try:
+            if course_id is None:
+                rows = conn.execute("SELECT id FROM lessons ORDER BY id").fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT id FROM lessons WHERE course_id = ? ORDER BY id", (course_id,)
+                ).fetchall()
+        finally:
+            conn.close()
+        return [row["id"] for row in rows]
+
+    async def prerender_course(self, course_id: int) -> List[dict]:
+        lesson_ids = await run_in("db", self._lesson_ids, course_id)
+        return await self.prerender_lessons(lesson_ids)
+
+    async def prerender_all(self) -> List[dict]:
+        lesson_ids = await run_in("db", self._lesson_ids)
+        return await self.prerender_lessons(lesson_ids)
+
+    def lesson_audio(self, lesson_id: int) -> Optional[dict]:
+        conn = get_db_connection()
+        try:
+            lesson = conn.execute("SELECT audio_path FROM lessons WHERE id = ?", (lesson_id,)).fetchone()
+            rows = conn.execute(
+                """
+                SELECT sentence_index, sentence_id, sentence_text, audio_url FROM lesson_audio
+                WHERE lesson_id = ? ORDER BY sentence_index
+                """,
+                (lesson_id,),
+            ).fetchall()
+        finally:
+            conn.close()
+        if lesson is None:
+            return None
+        return {
+            "lesson_id": lesson_id,
+            "audio_path": lesson["audio_path"],
+            "sentences": [dict(row) for row in rows],
+        }
+
+
+audio_prerenderer = AudioPrerenderer(concurrency=settings.PRERENDER_CONCURRENCY)
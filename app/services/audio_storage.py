@@ -0,0 +1,345 @@
+import asyncio
+import os
+import re
+import shutil
+import subprocess
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set
+
+from starlette.staticfiles import StaticFiles
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.executors import run_in
+from app.models.database import get_db_connection
+from app.services.audio_cache import AUDIO_URL_PREFIX, audio_cache
+
+# 编码 -> (文件扩展名, ffmpeg 编码参数)。edge-tts 本身输出 MP3, 只有 XTTS 的 WAV 需要转码
+CODECS = {
+    "mp3": ("mp3", ["-c:a", "libmp3lame"]),
+    "opus": ("opus", ["-c:a", "libopus", "-application", "voip"]),
+    "wav": ("wav", []),
+}
+
+# 缓存音频的文件名是内容键(32 位十六进制)本身, 同一 URL 的内容不会改变
+_CONTENT_ADDRESSED_RE = re.compile(r"^[0-9a-f]{32}\.[a-z0-9]+$")
+
+
+class AudioFiles(StaticFiles):
+    """/static/audio 的静态文件服务。
+
+    内容寻址的音频文件带 `Cache-Control: immutable`, 浏览器重播时不再请求;
+    播放列表等会被改写的文件使用 no-cache, 由 ETag 协商。
+    Range / If-Range 由 Starlette 的 FileResponse 处理, 播放器可以直接拖动进度。
+    """
+
+    def __init__(self, *args, max_age: int, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_age = max_age
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if _CONTENT_ADDRESSED_RE.match(os.path.basename(full_path)):
+            response.headers["Cache-Control"] = f"public, max-age={self.max_age}, immutable"
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        return response
+
+
+class AudioStorage:
+    """音频文件的存储管理: 转码、磁盘配额与用量报告。
+
+    - XTTS 输出的 WAV 用 ffmpeg 转为 TTS_AUDIO_CODEC(MP3 / Opus), 体积约为 WAV 的 1/8;
+      未安装 ffmpeg 或转码失败时保留 WAV
+    - 后台垃圾回收定期执行: 未固定音频的总大小或条目数超过上限(TTS_CACHE_MAX_BYTES / TTS_CACHE_MAX_ENTRIES)
+      时按 LRU 淘汰到上限的 low_watermark 比例, 留出余量, 避免每次写入都触发淘汰;
+      固定的课时音频不计入上限, 其用量单独报告(pinned_bytes), 不再被课时引用后取消固定;
+      同时清理索引中文件已丢失的条目、遗留的临时文件和不在索引中的孤立文件
+    """
+
+    def __init__(
+        self,
+        audio_dir: str,
+        max_bytes: int,
+        max_entries: int,
+        low_watermark: float,
+        codec: str,
+        bitrate: str,
+        ffmpeg: str,
+        orphan_grace: int,
+    ):
+        self.audio_dir = audio_dir
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.low_watermark = min(max(low_watermark, 0.0), 1.0)
+        self.codec = codec if codec in CODECS else "wav"
+        self.bitrate = bitrate
+        self.ffmpeg = ffmpeg
+        self.orphan_grace = orphan_grace
+        self._ffmpeg_path: Optional[str] = None
+        self._ffmpeg_checked = False
+        self.last_gc: Optional[dict] = None
+
+    # --- 转码 ---
+
+    def ffmpeg_path(self) -> Optional[str]:
+        if not self._ffmpeg_checked:
+            self._ffmpeg_path = shutil.which(self.ffmpeg)
+            self._ffmpeg_checked = True
+            if self._ffmpeg_path is None and self.codec != "wav":
+                print(f"未找到 ffmpeg({self.ffmpeg}), XTTS 音频保持 WAV 格式")
+        return self._ffmpeg_path
+
+    def output_format(self, engine: str) -> str:
+        """新合成的音频使用的文件扩展名。"""
+        if engine == "edge-tts":
+            return "mp3"
+        if self.codec == "wav" or self.ffmpeg_path() is None:
+            return "wav"
+        return CODECS[self.codec][0]
+
+    def transcode(self, source: str, target: str) -> bool:
+        """把 WAV 文件 source 转码为 target(格式由 target 的扩展名决定), 成功返回 True。"""
+        ffmpeg = self.ffmpeg_path()
+        ext = target.rsplit(".", 1)[-1]
+        codec = next((name for name, (codec_ext, _) in CODECS.items() if codec_ext == ext), None)
+        if ffmpeg is None or codec is None or codec == "wav":
+            return False
+        command = [
+            ffmpeg, "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+            "-i", source, "-map_metadata", "-1", *CODECS[codec][1], "-b:a", self.bitrate, target,
+        ]
+        started = time.perf_counter()
+        try:
+            result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=120)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"音频转码失败: {e}")
+            return False
+        seconds = time.perf_counter() - started
+        metrics.audio_transcode_seconds.observe(seconds, codec=codec)
+        metrics.record_timing("transcode", seconds)
+        if result.returncode != 0 or not os.path.exists(target):
+            print(f"音频转码失败: {result.stderr.decode(errors='ignore').strip()}")
+            if os.path.exists(target):
+                os.remove(target)
+            return False
+        return True
+
+    def transcode_legacy(self, limit: Optional[int] = None, workers: int = 4) -> dict:
+        """把缓存中已有的 WAV 文件转码为当前编码, 并更新缓存索引、课时音频记录与播放列表。"""
+        if self.output_format("xtts") == "wav":
+            return {"converted": 0, "failed": 0, "saved_bytes": 0, "error": "transcoding is disabled"}
+        ext = CODECS[self.codec][0]
+        conn = get_db_connection()
+        try:
+            rows = conn.execute(
+                "SELECT cache_key, filename, size_bytes FROM audio_cache WHERE filename LIKE '%.wav' ORDER BY cache_key"
+                + (" LIMIT ?" if limit else ""),
+                (limit,) if limit else (),
+            ).fetchall()
+        finally:
+            conn.close()
+
+        def convert(row) -> Optional[tuple]:
+            source = audio_cache.path_for(row["filename"])
+            filename = f"{row['cache_key']}.{ext}"
+            tmp_path = f"{audio_cache.path_for(filename)}.tmp.{ext}"
+            if not os.path.exists(source) or not self.transcode(source, tmp_path):
+                return None
+            os.replace(tmp_path, audio_cache.path_for(filename))
+            return row, filename, os.path.getsize(audio_cache.path_for(filename))
+
+        converted, failed, saved = 0, 0, 0
+        lessons: Set[int] = set()
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for row, result in zip(rows, pool.map(convert, rows)):
+                if result is None:
+                    failed += 1
+                    continue
+                _, filename, size = result
+                lessons.update(self._replace_file(row["cache_key"], row["filename"], filename, size))
+                os.remove(audio_cache.path_for(row["filename"]))
+                converted += 1
+                saved += row["size_bytes"] - size
+
+        from app.services.audio_prerender import audio_prerenderer  # pylint: disable=import-outside-toplevel
+
+        for lesson_id in sorted(lessons):
+            audio_prerenderer.write_playlist(lesson_id)
+        return {"converted": converted, "failed": failed, "saved_bytes": saved, "playlists": len(lessons)}
+
+    @staticmethod
+    def _replace_file(cache_key: str, old_filename: str, filename: str, size: int) -> List[int]:
+        """缓存条目改用新文件, 返回引用了旧文件且已生成播放列表的课时。"""
+        old_url, url = audio_cache.url_for(old_filename), audio_cache.url_for(filename)
+        conn = get_db_connection()
+        try:
+            conn.execute(
+                "UPDATE audio_cache SET filename = ?, size_bytes = ? WHERE cache_key = ?", (filename, size, cache_key)
+            )
+            lessons = [
+                row["lesson_id"]
+                for row in conn.execute(
+                    """
+                    SELECT DISTINCT a.lesson_id FROM lesson_audio a JOIN lessons l ON l.id = a.lesson_id
+                    WHERE a.audio_url = ? AND l.audio_path IS NOT NULL
+                    """,
+                    (old_url,),
+                )
+            ]
+            conn.execute("UPDATE lesson_audio SET audio_url = ? WHERE audio_url = ?", (url, old_url))
+            conn.commit()
+        finally:
+            conn.close()
+        return lessons
+
+    # --- 垃圾回收 ---
+
+    def _referenced_files(self) -> Set[str]:
+        conn = get_db_connection()
+        try:
+            names = {row["filename"] for row in conn.execute("SELECT filename FROM audio_cache")}
+            prefix = AUDIO_URL_PREFIX + "/"
+            names.update(
+                row["audio_url"][len(prefix):]
+                for row in conn.execute("SELECT DISTINCT audio_url FROM lesson_audio")
+                if row["audio_url"] and row["audio_url"].startswith(prefix)
+            )
+        finally:
+            conn.close()
+        return names
+
+    def _sweep(self, now: float) -> Dict[str, int]:
+        """删除超过宽限期的临时文件与孤立文件(不在缓存索引、也不被课时音频引用)。
+
+        刚写入、尚未登记的文件在宽限期内不会被删除。缓存关闭时生成的文件不登记索引, 因此只清理临时文件。
+        """
+        referenced = self._referenced_files() if settings.TTS_CACHE_ENABLED else None
+        removed = {"temp": 0, "orphan": 0, "bytes": 0}
+        if not os.path.isdir(self.audio_dir):
+            return removed
+        with os.scandir(self.audio_dir) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                if now - stat.st_mtime < self.orphan_grace:
+                    continue
+                if ".tmp." in entry.name:
+                    reason = "temp"
+                elif referenced is not None and entry.name not in referenced:
+                    reason = "orphan"
+                else:
+                    continue
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    continue
+                removed[reason] += 1
+                removed["bytes"] += stat.st_size
+        return removed
+
+    def collect(self) -> dict:
+        """执行一次垃圾回收, 返回本次清理结果与当前用量。"""
+        started = time.monotonic()
+        missing = audio_cache.drop_missing()
+        unpinned = audio_cache.unpin_unreferenced(self.orphan_grace)
+        evicted, evicted_bytes = audio_cache.evict(
+            self.max_entries,
+            self.max_bytes,
+            int(self.max_entries * self.low_watermark),
+            int(self.max_bytes * self.low_watermark),
+        )
+        swept = self._sweep(time.time())
+
+        metrics.audio_gc_removed_files_total.inc(missing, reason="missing")
+        metrics.audio_gc_removed_files_total.inc(evicted, reason="evicted")
+        metrics.audio_gc_removed_files_total.inc(swept["temp"], reason="temp")
+        metrics.audio_gc_removed_files_total.inc(swept["orphan"], reason="orphan")
+
+        usage = self.usage()
+        self.last_gc = {
+            "finished_at": time.time(),
+            "seconds": round(time.monotonic() - started, 3),
+            "missing": missing,
+            "unpinned": unpinned,
+            "evicted": evicted,
+            "temp": swept["temp"],
+            "orphan": swept["orphan"],
+            "freed_bytes": evicted_bytes + swept["bytes"],
+            "bytes": usage["bytes"],
+            "pinned_bytes": usage["pinned_bytes"],
+            "over_quota": usage["bytes"] - usage["pinned_bytes"] > self.max_bytes,
+        }
+        if self.last_gc["over_quota"]:
+            print(f"音频缓存超出配额: {usage['bytes'] - usage['pinned_bytes']} / {self.max_bytes} 字节")
+        return {**self.last_gc, "by_engine": usage["by_engine"]}
+
+    def usage(self) -> dict:
+        """按引擎与文件格式统计缓存音频的条目数与字节数, 同时更新对应的指标。"""
+        conn = get_db_connection()
+        try:
+            rows = conn.execute(
+                """
+                SELECT engine, substr(filename, instr(filename, '.') + 1) AS format,
+                       COUNT(*) AS files, COALESCE(SUM(size_bytes), 0) AS bytes, COALESCE(SUM(pinned), 0) AS pinned,
+                       COALESCE(SUM(CASE WHEN pinned THEN size_bytes ELSE 0 END), 0) AS pinned_bytes
+                FROM audio_cache GROUP BY engine, format ORDER BY engine, format
+                """
+            ).fetchall()
+        finally:
+            conn.close()
+
+        by_engine: Dict[str, dict] = defaultdict(
+            lambda: {"files": 0, "bytes": 0, "pinned": 0, "pinned_bytes": 0, "formats": {}}
+        )
+        for row in rows:
+            engine = by_engine[row["engine"]]
+            engine["files"] += row["files"]
+            engine["bytes"] += row["bytes"]
+            engine["pinned"] += row["pinned"]
+            engine["pinned_bytes"] += row["pinned_bytes"]
+            engine["formats"][row["format"]] = {"files": row["files"], "bytes": row["bytes"]}
+        labels = [({"engine": row["engine"], "format": row["format"]}, row) for row in rows]
+        metrics.registry.replace({
+            metrics.audio_storage_bytes: [(label, row["bytes"]) for label, row in labels],
+            metrics.audio_storage_files: [(label, row["files"]) for label, row in labels],
+        })
+        return {
+            "bytes": sum(engine["bytes"] for engine in by_engine.values()),
+            "pinned_bytes": sum(engine["pinned_bytes"] for engine in by_engine.values()),
+            "by_engine": dict(by_engine),
+        }
+
+    def status(self) -> dict:
+        return {
+            "codec": self.output_format("xtts"),
+            "bitrate": self.bitrate if self.output_format("xtts") != "wav" else None,
+            "max_bytes": self.max_bytes,
+            "low_watermark": self.low_watermark,
+            "last_gc": self.last_gc,
+            **self.usage(),
+        }
+
+    async def run_gc(self, interval: float) -> None:
+        """每 interval 秒执行一次垃圾回收(应用启动后立即执行第一次)。"""
+        while True:
+            try:
+                await run_in("io", self.collect)
+            except Exception as e:
+                print(f"音频垃圾回收失败: {e}")
+            await asyncio.sleep(interval)
+
+
+audio_storage = AudioStorage(
+    audio_dir=settings.AUDIO_DIR,
+    max_bytes=settings.TTS_CACHE_MAX_BYTES,
+    max_entries=settings.TTS_CACHE_MAX_ENTRIES,
+    low_watermark=settings.TTS_AUDIO_GC_LOW_WATERMARK,
+    codec=settings.TTS_AUDIO_CODEC,
+    bitrate=settings.TTS_AUDIO_BITRATE,
+    ffmpeg=settings.FFMPEG_PATH,
+    orphan_grace=settings.TTS_AUDIO_ORPHAN_GRACE,
+)
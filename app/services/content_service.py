@@ -1,33 +1,79 @@
+from typing import Optional
+
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from app.core.config import settings
+from app.services.extraction import ArticleExtractor, header_charset
+
+_CHUNK_SIZE = 64 * 1024
+
+
+class ContentTooLargeError(ValueError):
+    """响应体超过 IMPORT_MAX_BYTES。"""
+
 
 class ContentService:
-    def fetch_url(self, url: str) -> dict:
-        try:
-            response = requests.get(url, timeout=10)
+    def __init__(self):
+        # 共享 Session: 同一站点的请求复用 keep-alive 连接
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=64,
+            # 下载在 fetch 线程池中进行, 线程数即 IMPORT_MAX_CONCURRENCY
+            pool_maxsize=max(settings.IMPORT_PER_HOST_CONCURRENCY, settings.IMPORT_MAX_CONCURRENCY),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = f"{settings.PROJECT_NAME} importer"
+        self.extractor = ArticleExtractor(settings.EXTRACTION_BACKEND)
+
+    def download(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> dict:
+        """流式下载网页, 超过字节上限立即中止。
+
+        传入上次记录的 ETag / Last-Modified 时发送条件请求,
+        页面未变化时返回 {"not_modified": True}, 否则返回正文与新的校验头。
+        """
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        max_bytes = settings.IMPORT_MAX_BYTES
+        with self.session.get(url, headers=headers, timeout=settings.IMPORT_TIMEOUT, stream=True) as response:
+            if response.status_code == 304:
+                return {"not_modified": True}
             response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # 使用简单启发式方法查找主标题和内容
-            title = soup.title.string if soup.title else "无标题"
-            
-            # 尝试查找文章主体
-            # 这是通用方法;特定网站可能需要特定的选择器
-            article = soup.find('article')
-            if not article:
-                article = soup.find('main')
-            if not article:
-                article = soup.body
-                
-            # 提取文本段落
-            paragraphs = [p.get_text().strip() for p in article.find_all('p') if p.get_text().strip()]
-            content = "\n\n".join(paragraphs)
-            
+
+            declared = response.headers.get("Content-Length")
+            if declared and declared.isdigit() and int(declared) > max_bytes:
+                raise ContentTooLargeError(f"响应体 {declared} 字节, 超过上限 {max_bytes}")
+
+            body = bytearray()
+            for chunk in response.iter_content(_CHUNK_SIZE):
+                body.extend(chunk)
+                if len(body) > max_bytes:
+                    raise ContentTooLargeError(f"响应体超过上限 {max_bytes} 字节")
+
             return {
-                "title": title,
-                "content": content
+                "not_modified": False,
+                "body": bytes(body),
+                "charset": header_charset(response.headers.get("Content-Type")),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
             }
+
+    def parse_html(self, html: bytes, charset: Optional[str] = None) -> dict:
+        """提取标题与正文(段落以空行分隔), 导航、页脚、侧栏等模板内容会被过滤。
+
+        charset 为响应头 Content-Type 中的编码, 页面本身没有声明编码时依靠它正确解码。
+        """
+        return self.extractor.extract(html, charset)
+
+    def fetch_url(self, url: str) -> dict:
+        try:
+            fetched = self.download(url)
+            return self.parse_html(fetched["body"], fetched["charset"])
         except Exception as e:
             print(f"获取URL时出错: {e}")
             return None
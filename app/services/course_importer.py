@@ -0,0 +1,267 @@
+import asyncio
+import contextlib
+import hashlib
+import re
+import threading
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence
+from urllib.parse import urlsplit, urlunsplit
+
+from app.core.config import settings
+from app.core.executors import run_in
+from app.models.database import get_db_connection
+from app.services.content_service import content_service
+from app.services.lesson_segments import lesson_segmenter
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def content_hash(text: str) -> str:
+    """正文的内容哈希(忽略大小写与空白差异), 用于识别重复导入的文章。"""
+    normalized = _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFC", text or "")).strip().lower()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def normalize_url(url: str) -> str:
+    """规范化来源 URL(协议与主机名小写, 去掉片段与默认端口), 同一页面的不同写法按同一个 URL 处理。"""
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    host = parts.hostname or ""
+    if ":" in host:
+        host = f"[{host}]"
+    if port is not None and (scheme, port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{port}"
+    if parts.username is not None:
+        userinfo = parts.username + (f":{parts.password}" if parts.password is not None else "")
+        host = f"{userinfo}@{host}"
+    return urlunsplit((scheme, host, parts.path or "/", parts.query, ""))
+
+
+class CourseImporter:
+    """把网页导入为课程(一页一门课程, 正文作为一个课时)。
+
+    批量导入时并发抓取, 同一站点的并发数受 IMPORT_PER_HOST_CONCURRENCY 限制;
+    每个 source_url 记录 ETag / Last-Modified, 重新导入时未变化的页面直接跳过,
+    变化的页面原地更新已有课程, 不会产生重复课程。
+    """
+
+    def __init__(self, max_concurrency: int, per_host_concurrency: int):
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_host_concurrency = max(1, per_host_concurrency)
+        self._hashes_backfilled = False
+        # 查重与写入需要串行, 否则同时导入的两篇相同文章都会通过查重;
+        # 本进程内用锁排队, 跨进程由写事务(BEGIN IMMEDIATE)保证
+        self._save_lock = threading.Lock()
+
+    def _fetch_state(self, url: str) -> Optional[dict]:
+        conn = get_db_connection()
+        try:
+            # 课程已被删除时不再发条件请求, 按新页面重新导入
+            row = conn.execute(
+                """
+                SELECT f.course_id, f.etag, f.last_modified FROM fetch_state f
+                JOIN courses c ON c.id = f.course_id
+                WHERE f.source_url = ?
+                """,
+                (url,),
+            ).fetchone()
+        finally:
+            conn.close()
+        return dict(row) if row else None
+
+    def _backfill_hashes(self, conn) -> None:
+        """为迁移之前导入的课时补算 content_hash(只处理一次)。"""
+        if self._hashes_backfilled:
+            return
+        rows = conn.execute("SELECT id, content FROM lessons WHERE content_hash IS NULL").fetchall()
+        if rows:
+            conn.executemany(
+                "UPDATE lessons SET content_hash = ? WHERE id = ?",
+                [(content_hash(row["content"]), row["id"]) for row in rows],
+            )
+            conn.commit()
+        self._hashes_backfilled = True
+
+    def _save_course(self, url: str, data: dict, fetched: dict, course_id: Optional[int]) -> dict:
+        """写入(或原地更新)课程与课时, 并记录抓取状态, 在同一个事务中完成。
+
+        新页面的正文与已有课时完全相同时不再重复写入, 返回已有课程(status=duplicate);
+        已导入的页面正文未变化时(没有校验头或 force 重新抓取)只刷新抓取状态, 返回 not_modified;
+        抓取期间同一 URL 已被另一个请求导入时, 更新那门课程而不是再新建一门。
+        """
+        digest = content_hash(data["content"])
+        with self._save_lock:
+            return self._save_course_locked(url, data, fetched, course_id, digest)
+
+    def _save_course_locked(self, url: str, data: dict, fetched: dict, course_id: Optional[int], digest: str) -> dict:
+        conn = get_db_connection()
+        try:
+            self._backfill_hashes(conn)
+            # 先取得写锁, 查重与写入在同一个事务中完成
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.cursor()
+            concurrent = False
+            if course_id is None:
+                row = cursor.execute(
+                    """
+                    SELECT f.course_id FROM fetch_state f
+                    JOIN courses c ON c.id = f.course_id
+                    WHERE f.source_url = ?
+                    """,
+                    (url,),
+                ).fetchone()
+                if row:
+                    course_id, concurrent = row["course_id"], True
+            elif cursor.execute(
+                "SELECT 1 FROM lessons WHERE course_id = ? AND content_hash = ? LIMIT 1", (course_id, digest)
+            ).fetchone():
+                # 正文未变化: 不改写课时, 已分句的句子与预渲染的音频保持有效
+                self._record_fetch(cursor, url, course_id, fetched)
+                conn.commit()
+                return {"status": "not_modified", "course_id": course_id}
+            # 同一 URL 被并发导入时, 正文与刚写入的课时相同也算重复
+            duplicate = cursor.execute(
+                "SELECT course_id FROM lessons WHERE content_hash = ? AND (? OR course_id IS NOT ?) LIMIT 1",
+                (digest, concurrent, course_id),
+            ).fetchone()
+            if duplicate:
+                return {"status": "duplicate", "course_id": duplicate["course_id"]}
+
+            if course_id is None:
+                cursor.execute(
+                    "INSERT INTO courses (title, description, source_url) VALUES (?, ?, ?)",
+                    (data["title"], f"Imported from {url}", url),
+                )
+                course_id = cursor.lastrowid
+                cursor.execute(
+                    "INSERT INTO lessons (course_id, title, content, content_hash) VALUES (?, ?, ?, ?)",
+                    (course_id, "Main Article", data["content"], digest),
+                )
+                lesson_id = cursor.lastrowid
+                status = "imported"
+            else:
+                cursor.execute("UPDATE courses SET title = ? WHERE id = ?", (data["title"], course_id))
+                lesson = cursor.execute(
+                    "SELECT id FROM lessons WHERE course_id = ? ORDER BY id LIMIT 1", (course_id,)
+                ).fetchone()
+                if lesson:
+                    # 正文变化后旧的预渲染音频失效, 由下一次预渲染重新生成
+                    lesson_id = lesson["id"]
+                    cursor.execute(
+                        "UPDATE lessons SET content = ?, content_hash = ?, audio_path = NULL WHERE id = ?",
+                        (data["content"], digest, lesson_id),
+                    )
+                else:
+                    cursor.execute(
+                        "INSERT INTO lessons (course_id, title, content, content_hash) VALUES (?, ?, ?, ?)",
+                        (course_id, "Main Article", data["content"], digest),
+                    )
+                    lesson_id = cursor.lastrowid
+                status = "updated"
+
+            lesson_segmenter.segment(conn, lesson_id, data["content"])
+
+            self._record_fetch(cursor, url, course_id, fetched)
+            conn.commit()
+            return {"status": status, "course_id": course_id}
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _record_fetch(cursor, url: str, course_id: int, fetched: dict) -> None:
+        cursor.execute(
+            """
+            INSERT OR REPLACE INTO fetch_state (source_url, course_id, etag, last_modified, fetched_at)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """,
+            (url, course_id, fetched.get("etag"), fetched.get("last_modified")),
+        )
+
+    def _fetch(self, url: str, state: Optional[dict]) -> dict:
+        """下载并解析页面(在 fetch 线程池中运行)。"""
+        fetched = content_service.download(
+            url,
+            etag=state["etag"] if state else None,
+            last_modified=state["last_modified"] if state else None,
+        )
+        if not fetched["not_modified"]:
+            fetched["data"] = content_service.parse_html(fetched["body"], fetched["charset"])
+            del fetched["body"]
+        return fetched
+
+    async def import_url(
+        self,
+        url: str,
+        force: bool = False,
+        limits: Sequence[asyncio.Semaphore] = (),
+    ) -> dict:
+        """导入单个 URL, 返回 {url, status, course_id, error}。
+
+        status 取值: imported(新课程) / updated(已有课程内容变化) / not_modified(页面或正文未变化) /
+        duplicate(正文与已有课程相同, 未重复写入) / failed。
+        force=True 时忽略已记录的 ETag / Last-Modified, 总是重新抓取。
+        limits 中的信号量在下载前按顺序获取。
+        """
+        result = {"url": url, "status": "failed", "course_id": None, "error": None}
+        url = normalize_url(url)
+        try:
+            state = await run_in("db", self._fetch_state, url)
+            request_state = None if force else state
+            async with contextlib.AsyncExitStack() as stack:
+                for limit in limits:
+                    await stack.enter_async_context(limit)
+                fetched = await run_in("fetch", self._fetch, url, request_state)
+
+            if fetched["not_modified"]:
+                result.update(status="not_modified", course_id=state["course_id"])
+                return result
+
+            data = fetched["data"]
+            if not data["content"]:
+                raise ValueError("页面中没有可导入的正文段落")
+            existing_id = state["course_id"] if state else None
+            saved = await run_in("db", self._save_course, url, data, fetched, existing_id)
+            result.update(saved)
+        except Exception as e:
+            print(f"导入 {url} 失败: {e}")
+            result["error"] = str(e) or e.__class__.__name__
+        return result
+
+    async def import_urls(self, urls: Iterable[str], force: bool = False) -> List[dict]:
+        """并发导入多个 URL(重复的 URL 只导入一次), 按输入顺序返回每个 URL 的结果。"""
+        unique_urls = list(dict.fromkeys(normalize_url(url) for url in urls if url and url.strip()))
+        overall = asyncio.Semaphore(self.max_concurrency)
+        per_host: Dict[str, asyncio.Semaphore] = {}
+
+        async def run(url: str) -> dict:
+            host = urlsplit(url).netloc
+            if host not in per_host:
+                per_host[host] = asyncio.Semaphore(self.per_host_concurrency)
+            # 先取站点槽位再取总槽位: 等待同一站点的 URL 不占用总并发, 其他站点可以继续抓取
+            return await self.import_url(url, force=force, limits=(per_host[host], overall))
+
+        return await asyncio.gather(*(run(url) for url in unique_urls))
+
+    @staticmethod
+    def summarize(results: List[dict]) -> dict:
+        counts = Counter(result["status"] for result in results)
+        return {
+            "total": len(results),
+            "imported": counts["imported"],
+            "updated": counts["updated"],
+            "not_modified": counts["not_modified"],
+            "duplicate": counts["duplicate"],
+            "failed": counts["failed"],
+        }
+
+
+course_importer = CourseImporter(
+    max_concurrency=settings.IMPORT_MAX_CONCURRENCY,
+    per_host_concurrency=settings.IMPORT_PER_HOST_CONCURRENCY,
+)
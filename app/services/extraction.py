@@ -0,0 +1,353 @@
+import re
+from collections import defaultdict
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple, Union
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+# 整个子树都不含正文的标签
+_SKIP_TAGS = {
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe",
+    "form", "button", "select", "textarea", "object",
+}
+# 子树内的段落视为导航/页脚等模板内容
+_BOILERPLATE_TAGS = {"nav", "footer", "aside", "menu"}
+_VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+    "meta", "param", "source", "track", "wbr",
+}
+# 出现这些块级元素时, 未闭合的 <p> 隐式结束
+_CLOSES_P = {
+    "p", "div", "section", "article", "main", "aside", "nav", "footer", "header",
+    "ul", "ol", "table", "blockquote", "pre", "h1", "h2", "h3", "h4", "h5", "h6",
+    "figure", "form", "hr",
+}
+_TAG_WEIGHTS = {"article": 10, "main": 10, "div": 5, "section": 3, "td": 3, "blockquote": 3}
+_POSITIVE_RE = re.compile(r"article|body|content|entry|main|page|post|story|text|blog", re.I)
+_NEGATIVE_RE = re.compile(
+    r"comment|footer|footnote|masthead|menu|meta|nav|promo|related|share|shoutbox|sidebar|"
+    r"sponsor|social|subscribe|newsletter|cookie|banner|breadcrumb|widget|advert|\bad\b|popup",
+    re.I,
+)
+_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?([\w-]+)""", re.I)
+_HEADER_CHARSET_RE = re.compile(r"""charset\s*=\s*["']?([\w.:-]+)""", re.I)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+MIN_PARAGRAPH_CHARS = 25
+MAX_LINK_DENSITY = 0.5
+PROMOTE_MIN_CANDIDATES = 3
+DEFAULT_TITLE = "无标题"
+
+
+def header_charset(content_type: Optional[str]) -> Optional[str]:
+    """从 HTTP Content-Type 头中取出 charset 参数, 没有时返回 None。"""
+    match = _HEADER_CHARSET_RE.search(content_type or "")
+    return match.group(1) if match else None
+
+
+def _decode(html: Union[bytes, str], charset: Optional[str] = None) -> str:
+    """按 BOM、HTTP 头中的 charset、<meta> 声明的顺序确定编码, 都没有时按 UTF-8 解码。"""
+    if isinstance(html, str):
+        return html
+    if html.startswith(b"\xef\xbb\xbf"):
+        return html[3:].decode("utf-8", errors="replace")
+    candidates = [charset] if charset else []
+    match = _CHARSET_RE.search(html[:4096])
+    if match:
+        candidates.append(match.group(1).decode("ascii"))
+    for candidate in candidates:
+        try:
+            return html.decode(candidate, errors="replace")
+        except LookupError:
+            pass
+    return html.decode("utf-8", errors="replace")
+
+
+def _class_weight(attrs: Dict[str, str]) -> int:
+    names = f"{attrs.get('class') or ''} {attrs.get('id') or ''}"
+    if not names.strip():
+        return 0
+    weight = 0
+    if _NEGATIVE_RE.search(names):
+        weight -= 25
+    if _POSITIVE_RE.search(names):
+        weight += 25
+    return weight
+
+
+class _Node:
+    __slots__ = ("id", "tag", "skip", "boilerplate")
+
+    def __init__(self, node_id: int, tag: str, skip: bool, boilerplate: bool):
+        self.id = node_id
+        self.tag = tag
+        self.skip = skip
+        self.boilerplate = boilerplate
+
+
+class _Paragraph:
+    __slots__ = ("parts", "link_chars", "ancestors", "boilerplate", "text")
+
+    def __init__(self, ancestors: Tuple[int, ...], boilerplate: bool):
+        self.parts: List[str] = []
+        self.link_chars = 0
+        self.ancestors = ancestors
+        self.boilerplate = boilerplate
+        self.text = ""
+
+
+class ArticleCollector:
+    """单遍收集器: 解析器以 start / end / data 事件驱动, 一边解析一边收集段落。
+
+    不构建 DOM 树, 只为每个元素记录父节点与权重, 为每个 <p> 记录文本、
+    链接字数与祖先链, 解析结束后再按 readability 的思路给容器打分。
+    lxml 的 target 解析器与标准库 HTMLParser 都调用同一组方法。
+    """
+
+    def __init__(self):
+        self._stack: List[_Node] = []
+        self._parents: List[int] = []
+        self._weights: List[int] = []
+        self._paragraph: Optional[_Paragraph] = None
+        self._link_depth = 0
+        self._title_parts: Optional[List[str]] = None
+        self._h1_parts: Optional[List[str]] = None
+        self.title: Optional[str] = None
+        self.h1: Optional[str] = None
+        self.paragraphs: List[_Paragraph] = []
+
+    # ---- 解析事件 ----
+
+    def start(self, tag: str, attrs) -> None:
+        tag = tag.lower() if isinstance(tag, str) else ""
+        if tag in _VOID_TAGS:
+            if tag == "br" and self._paragraph is not None:
+                self._paragraph.parts.append(" ")
+            elif tag == "hr":
+                self._close_open_paragraph()
+            return
+        if tag in _CLOSES_P:
+            self._close_open_paragraph()
+
+        attrs = dict(attrs) if attrs else {}
+        parent = self._stack[-1] if self._stack else None
+        node_id = len(self._parents)
+        self._parents.append(parent.id if parent else -1)
+        self._weights.append(_TAG_WEIGHTS.get(tag, 0) + _class_weight(attrs))
+
+        skip = tag in _SKIP_TAGS or (parent is not None and parent.skip)
+        boilerplate = (
+            tag in _BOILERPLATE_TAGS
+            or (parent is not None and parent.boilerplate)
+            or self._weights[node_id] < 0
+        )
+        self._stack.append(_Node(node_id, tag, skip, boilerplate))
+        if skip:
+            return
+
+        if tag == "p":
+            self._paragraph = _Paragraph(tuple(node.id for node in self._stack[:-1]), boilerplate)
+        elif tag == "a":
+            self._link_depth += 1
+        elif tag == "title" and self.title is None:
+            self._title_parts = []
+        elif tag == "h1" and self.h1 is None:
+            self._h1_parts = []
+
+    def end(self, tag: str) -> None:
+        tag = tag.lower() if isinstance(tag, str) else ""
+        if tag in _VOID_TAGS:
+            return
+        # 容错: 找不到对应的开标签就忽略, 找到则连同其中未闭合的元素一起出栈
+        for depth in range(len(self._stack) - 1, -1, -1):
+            if self._stack[depth].tag == tag:
+                break
+        else:
+            return
+        while len(self._stack) > depth:
+            self._pop()
+
+    def data(self, text: str) -> None:
+        if not text or (self._stack and self._stack[-1].skip):
+            return
+        if self._title_parts is not None:
+            self._title_parts.append(text)
+        if self._h1_parts is not None:
+            self._h1_parts.append(text)
+        if self._paragraph is not None:
+            self._paragraph.parts.append(text)
+            if self._link_depth:
+                self._paragraph.link_chars += len(text.strip())
+
+    def close(self) -> "ArticleCollector":
+        while self._stack:
+            self._pop()
+        return self
+
+    # ---- 内部 ----
+
+    def _pop(self) -> None:
+        node = self._stack.pop()
+        if node.skip:
+            return
+        if node.tag == "p":
+            self._finish_paragraph()
+        elif node.tag == "a":
+            self._link_depth = max(0, self._link_depth - 1)
+        elif node.tag == "title" and self._title_parts is not None:
+            self.title = _WHITESPACE_RE.sub(" ", "".join(self._title_parts)).strip() or None
+            self._title_parts = None
+        elif node.tag == "h1" and self._h1_parts is not None:
+            self.h1 = _WHITESPACE_RE.sub(" ", "".join(self._h1_parts)).strip() or None
+            self._h1_parts = None
+
+    def _close_open_paragraph(self) -> None:
+        if self._paragraph is None:
+            return
+        for depth in range(len(self._stack) - 1, -1, -1):
+            if self._stack[depth].tag == "p":
+                while len(self._stack) > depth:
+                    self._pop()
+                return
+
+    def _finish_paragraph(self) -> None:
+        paragraph = self._paragraph
+        self._paragraph = None
+        if paragraph is None:
+            return
+        paragraph.text = _WHITESPACE_RE.sub(" ", "".join(paragraph.parts)).strip()
+        paragraph.parts = []
+        if paragraph.text:
+            self.paragraphs.append(paragraph)
+
+    # ---- 打分与选取 ----
+
+    def _link_density(self, paragraph: _Paragraph) -> float:
+        return min(1.0, paragraph.link_chars / len(paragraph.text))
+
+    def _ancestors(self, node_id: int) -> List[int]:
+        chain = []
+        node_id = self._parents[node_id]
+        while node_id != -1:
+            chain.append(node_id)
+            node_id = self._parents[node_id]
+        return chain
+
+    def _promote(self, best: int, scores: Dict[int, float]) -> int:
+        """正文被切分到多个得分相近的容器(如表格的每个单元格)时, 改用包含其中多数容器的共同祖先。"""
+        alternatives = [
+            node_id for node_id, score in scores.items()
+            if node_id != best and score >= scores[best] * 0.75
+        ]
+        if len(alternatives) < PROMOTE_MIN_CANDIDATES:
+            return best
+        alternative_chains = [set(self._ancestors(node_id)) for node_id in alternatives]
+        for ancestor in self._ancestors(best):
+            contained = sum(1 for chain in alternative_chains if ancestor in chain)
+            if contained >= PROMOTE_MIN_CANDIDATES:
+                return ancestor
+        return best
+
+    def select_paragraphs(self) -> List[str]:
+        """给段落的父节点(全分)与祖父节点(半分)打分, 取得分最高的容器及其高分兄弟容器中的段落。"""
+        scores: Dict[int, float] = defaultdict(float)
+        for paragraph in self.paragraphs:
+            if paragraph.boilerplate or len(paragraph.text) < MIN_PARAGRAPH_CHARS:
+                continue
+            text = paragraph.text
+            score = (1 + text.count(",") + text.count("，") + min(len(text) // 100, 3))
+            score *= 1 - self._link_density(paragraph)
+            if paragraph.ancestors:
+                scores[paragraph.ancestors[-1]] += score
+            if len(paragraph.ancestors) > 1:
+                scores[paragraph.ancestors[-2]] += score / 2
+
+        def readable(paragraph: _Paragraph) -> bool:
+            return not paragraph.boilerplate and self._link_density(paragraph) < MAX_LINK_DENSITY
+
+        if not scores:
+            return [p.text for p in self.paragraphs if readable(p)]
+
+        for node_id in scores:
+            scores[node_id] += self._weights[node_id]
+        best = self._promote(max(scores, key=scores.get), scores)
+        threshold = max(10.0, scores[best] * 0.2)
+        best_parent = self._parents[best]
+        accepted = {best} | {
+            node_id
+            for node_id, score in scores.items()
+            if self._parents[node_id] == best_parent and best_parent != -1 and score >= threshold
+        }
+        return [
+            p.text for p in self.paragraphs
+            if readable(p) and any(node_id in accepted for node_id in p.ancestors)
+        ]
+
+
+class _StdlibParser(HTMLParser):
+    def __init__(self, collector: ArticleCollector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag, attrs)
+
+    def handle_startendtag(self, tag, attrs):
+        self.collector.start(tag, attrs)
+        self.collector.end(tag)
+
+    def handle_endtag(self, tag):
+        self.collector.end(tag)
+
+    def handle_data(self, data):
+        self.collector.data(data)
+
+
+def _parse_with_lxml(html: str) -> ArticleCollector:
+    collector = ArticleCollector()
+    parser = etree.HTMLParser(target=collector, remove_comments=True, remove_pis=True)
+    parser.feed(html)
+    return parser.close()
+
+
+def _parse_with_stdlib(html: str) -> ArticleCollector:
+    collector = ArticleCollector()
+    parser = _StdlibParser(collector)
+    parser.feed(html)
+    parser.close()
+    return collector.close()
+
+
+BACKENDS = {"html.parser": _parse_with_stdlib}
+if etree is not None:
+    BACKENDS["lxml"] = _parse_with_lxml
+
+
+def resolve_backend(name: str = "auto") -> str:
+    """auto 优先使用 lxml(C 实现, 快一个数量级), 未安装时回退到标准库 html.parser。"""
+    if name == "auto":
+        return "lxml" if "lxml" in BACKENDS else "html.parser"
+    if name not in BACKENDS:
+        print(f"HTML 解析后端 {name} 不可用, 回退到 html.parser")
+        return "html.parser"
+    return name
+
+
+class ArticleExtractor:
+    """从网页中提取标题与正文段落。"""
+
+    def __init__(self, backend: str = "auto"):
+        self.backend = resolve_backend(backend)
+        self._parse = BACKENDS[self.backend]
+
+    def extract(self, html: Union[bytes, str], charset: Optional[str] = None) -> dict:
+        """charset 为 HTTP 响应头中声明的编码(如有), 优先于页面内的 <meta> 声明。"""
+        collector = self._parse(_decode(html, charset))
+        paragraphs = collector.select_paragraphs()
+        return {
+            "title": collector.title or collector.h1 or DEFAULT_TITLE,
+            "content": "\n\n".join(paragraphs),
+        }
@@ -0,0 +1,139 @@
+import http.client
+import json
+import socket
+import threading
+from typing import Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+from app.core.config import settings
+
+
+class InferenceError(Exception):
+    """推理服务器不可用、超时或返回了错误。"""
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """通过 Unix 域套接字通信的 HTTPConnection。"""
+
+    def __init__(self, path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+class InferenceClient:
+    """INFERENCE_MODE=remote 时访问推理服务器(app/inference_server.py)的客户端。
+
+    - 地址为 unix:///path/to.sock(同机部署, 开销最小)或 http://host:port
+    - 每个线程保持一个长连接并复用; 复用的连接已被服务器关闭时自动重连一次
+    - connect_timeout 限制建立连接的时间, timeout 限制每次读取的等待时间(流式响应按块计算)
+    """
+
+    def __init__(self, url: str, timeout: float, connect_timeout: float):
+        self.url = url
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        parts = urlsplit(url)
+        self.scheme = parts.scheme
+        self.socket_path = parts.path
+        self.host, self.port = parts.hostname, parts.port or 80
+        self._local = threading.local()
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        if self.scheme == "unix":
+            conn = _UnixHTTPConnection(self.socket_path, timeout=self.connect_timeout)
+        elif self.scheme == "http":
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.connect_timeout)
+        else:
+            raise InferenceError(f"不支持的推理服务器地址: {self.url}(应为 unix:///path 或 http://host:port)")
+        conn.connect()
+        # 连接建立后改用读取超时
+        conn.sock.settimeout(self.timeout)
+        return conn
+
+    def _discard(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            conn.close()
+
+    def _request(self, method: str, path: str, payload: Optional[dict] = None) -> http.client.HTTPResponse:
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        for attempt in range(2):
+            conn = getattr(self._local, "conn", None)
+            reused = conn is not None
+            try:
+                if conn is None:
+                    conn = self._local.conn = self._new_connection()
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as e:
+                self._discard()
+                # 空闲的长连接可能已被服务器关闭, 请求尚未被处理, 换新连接重试一次
+                if reused and attempt == 0:
+                    continue
+                raise InferenceError(f"推理服务器连接中断: {e}") from e
+            except (OSError, http.client.HTTPException) as e:
+                self._discard()
+                raise InferenceError(f"无法访问推理服务器 {self.url}: {e}") from e
+
+            if response.status >= 400:
+                detail = response.read().decode("utf-8", errors="ignore")
+                try:
+                    detail = json.loads(detail).get("detail", detail)
+                except (ValueError, AttributeError):
+                    pass
+                raise InferenceError(f"推理服务器返回 {response.status}: {detail}")
+            return response
+        raise InferenceError(f"无法访问推理服务器 {self.url}")
+
+    def _read(self, response: http.client.HTTPResponse) -> bytes:
+        try:
+            return response.read()
+        except (OSError, http.client.HTTPException) as e:
+            self._discard()
+            raise InferenceError(f"读取推理服务器响应失败: {e}") from e
+
+    def get_json(self, path: str) -> dict:
+        return json.loads(self._read(self._request("GET", path)))
+
+    def post_json(self, path: str, payload: dict) -> dict:
+        return json.loads(self._read(self._request("POST", path, payload)))
+
+    def post_bytes(self, path: str, payload: dict) -> Tuple[bytes, http.client.HTTPMessage]:
+        response = self._request("POST", path, payload)
+        return self._read(response), response.headers
+
+    def stream_json(self, path: str, payload: dict) -> Iterator[dict]:
+        """逐行读取 NDJSON 响应。提前停止迭代时关闭连接, 服务器据此取消生成。"""
+        response = self._request("POST", path, payload)
+        finished = False
+        try:
+            while True:
+                try:
+                    line = response.readline()
+                except (OSError, http.client.HTTPException) as e:
+                    raise InferenceError(f"读取推理服务器响应失败: {e}") from e
+                if not line:
+                    finished = True
+                    # 按 Content-Length 返回的响应读完后不会自动关闭, 关闭后长连接才能用于下一次请求
+                    response.close()
+                    return
+                if line.strip():
+                    yield json.loads(line)
+        finally:
+            if not finished:
+                self._discard()
+
+
+inference_client = InferenceClient(
+    url=settings.INFERENCE_SERVER_URL,
+    timeout=settings.INFERENCE_TIMEOUT,
+    connect_timeout=settings.INFERENCE_CONNECT_TIMEOUT,
+)
@@ -0,0 +1,191 @@
+import hashlib
+from typing import List, Optional
+
+from app.models.database import get_db_connection
+from app.services.segmentation import segment_document
+
+
+def _sentence_keys(sentences: List[dict]) -> List[str]:
+    """句子的内容键: 文本哈希 + 同一文本在课时中第几次出现。
+
+    键只取决于句子本身, 因此课时其他部分修改后, 未变化的句子仍对应同一行(同一 id)。
+    """
+    seen = {}
+    keys = []
+    for sentence in sentences:
+        digest = hashlib.sha256(sentence["text"].encode("utf-8")).hexdigest()[:16]
+        occurrence = seen.get(digest, 0)
+        seen[digest] = occurrence + 1
+        keys.append(f"{digest}-{occurrence}")
+    return keys
+
+
+class LessonSegmenter:
+    """把课时正文切分为章节与句子, 存入 lesson_sections / lesson_sentences。
+
+    导入时调用 segment() 与课时写入放在同一事务中; 早期导入、尚未切分的课时
+    在首次读取时补切分, 也可以用 scripts/segment_lessons.py 批量回填。
+    """
+
+    def segment(self, conn, lesson_id: int, content: str) -> int:
+        """在调用方的连接/事务中(重新)切分一个课时, 不提交。返回句子数。"""
+        document = segment_document(content or "")
+        sentences = document["sentences"]
+        keys = _sentence_keys(sentences)
+
+        existing = conn.execute(
+            "SELECT id, sentence_key FROM lesson_sentences WHERE lesson_id = ?", (lesson_id,)
+        ).fetchall()
+        current = set(keys)
+        stale = [(row["id"],) for row in existing if row["sentence_key"] not in current]
+        if stale:
+            conn.executemany("DELETE FROM lesson_sentences WHERE id = ?", stale)
+
+        conn.executemany(
+            """
+            INSERT INTO lesson_sentences
+                (lesson_id, sentence_key, position, section_index, paragraph_index, start_offset, end_offset, text)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (lesson_id, sentence_key) DO UPDATE SET
+                position = excluded.position,
+                section_index = excluded.section_index,
+                paragraph_index = excluded.paragraph_index,
+                start_offset = excluded.start_offset,
+                end_offset = excluded.end_offset
+            """,
+            [
+                (
+                    lesson_id, key, s["position"], s["section_index"], s["paragraph_index"],
+                    s["start"], s["end"], s["text"],
+                )
+                for key, s in zip(keys, sentences)
+            ],
+        )
+
+        conn.execute("DELETE FROM lesson_sections WHERE lesson_id = ?", (lesson_id,))
+        conn.executemany(
+            """
+            INSERT INTO lesson_sections
+                (lesson_id, section_index, title, start_offset, end_offset, first_position, sentence_count)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (
+                    lesson_id, section["index"], section["title"], section["start"], section["end"],
+                    section["first_position"], section["sentence_count"],
+                )
+                for section in document["sections"]
+            ],
+        )
+        return len(sentences)
+
+    def segment_lesson(self, lesson_id: int) -> Optional[int]:
+        conn = get_db_connection()
+        try:
+            lesson = conn.execute("SELECT content FROM lessons WHERE id = ?", (lesson_id,)).fetchone()
+            if lesson is None:
+                return None
+            count = self.segment(conn, lesson_id, lesson["content"])
+            conn.commit()
+            return count
+        finally:
+            conn.close()
+
+    def _ensure_segmented(self, conn, lesson_id: int) -> bool:
+        """课时不存在时返回 False; 存在但尚未切分时就地切分。"""
+        lesson = conn.execute(
+            """
+            SELECT l.content, EXISTS (SELECT 1 FROM lesson_sentences s WHERE s.lesson_id = l.id) AS segmented
+            FROM lessons l WHERE l.id = ?
+            """,
+            (lesson_id,),
+        ).fetchone()
+        if lesson is None:
+            return False
+        if not lesson["segmented"] and lesson["content"]:
+            self.segment(conn, lesson_id, lesson["content"])
+            conn.commit()
+        return True
+
+    def sentences(
+        self, lesson_id: int, start: int = 0, limit: int = 100, section: Optional[int] = None
+    ) -> Optional[dict]:
+        """按位置读取一段句子(可限定章节), 课时不存在时返回 None。"""
+        conn = get_db_connection()
+        try:
+            if not self._ensure_segmented(conn, lesson_id):
+                return None
+            where = "lesson_id = ?"
+            params: list = [lesson_id]
+            if section is not None:
+                where += " AND section_index = ?"
+                params.append(section)
+            total = conn.execute(f"SELECT COUNT(*) FROM lesson_sentences WHERE {where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"""
+                SELECT id, position, section_index, paragraph_index,
+                       start_offset AS start, end_offset AS end, text
+                FROM lesson_sentences WHERE {where} AND position >= ?
+                ORDER BY position LIMIT ?
+                """,
+                (*params, start, limit),
+            ).fetchall()
+        finally:
+            conn.close()
+        return {
+            "lesson_id": lesson_id,
+            "total": total,
+            "sentences": [dict(row) for row in rows],
+            "next_start": rows[-1]["position"] + 1 if len(rows) == limit else None,
+        }
+
+    def sections(self, lesson_id: int) -> Optional[dict]:
+        conn = get_db_connection()
+        try:
+            if not self._ensure_segmented(conn, lesson_id):
+                return None
+            rows = conn.execute(
+                """
+                SELECT section_index AS "index", title, start_offset AS start, end_offset AS end,
+                       first_position, sentence_count
+                FROM lesson_sections WHERE lesson_id = ? ORDER BY section_index
+                """,
+                (lesson_id,),
+            ).fetchall()
+        finally:
+            conn.close()
+        return {"lesson_id": lesson_id, "sections": [dict(row) for row in rows]}
+
+    def spoken_sentences(self, lesson_id: int) -> Optional[List[dict]]:
+        """课时的全部句子(id, position, text), 按顺序返回, 供逐句预渲染使用。"""
+        conn = get_db_connection()
+        try:
+            if not self._ensure_segmented(conn, lesson_id):
+                return None
+            rows = conn.execute(
+                "SELECT id, position, text FROM lesson_sentences WHERE lesson_id = ? ORDER BY position",
+                (lesson_id,),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [dict(row) for row in rows]
+
+    def lesson_ids(self, only_missing: bool = True) -> List[int]:
+        conn = get_db_connection()
+        try:
+            if only_missing:
+                rows = conn.execute(
+                    """
+                    SELECT id FROM lessons l
+                    WHERE NOT EXISTS (SELECT 1 FROM lesson_sentences s WHERE s.lesson_id = l.id)
+                    ORDER BY id
+                    """
+                ).fetchall()
+            else:
+                rows = conn.execute("SELECT id FROM lessons ORDER BY id").fetchall()
+        finally:
+            conn.close()
+        return [row["id"] for row in rows]
+
+
+lesson_segmenter = LessonSegmenter()
@@ -0,0 +1,228 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Optional
+
+from app.core.config import settings
+from app.core.metrics import llm_queue_depth, llm_queue_wait_seconds, llm_requests_in_flight, record_timing, registry
+
+# 数值越小越先被调度
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+
+class SchedulerError(Exception):
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QueueFullError(SchedulerError):
+    """等待队列已满, 请求被立即拒绝。"""
+    status_code = 429
+
+
+class QueueTimeoutError(SchedulerError):
+    """请求在截止时间前未能获得推理槽位。"""
+    status_code = 503
+
+
+class RequestCancelledError(SchedulerError):
+    """客户端在排队期间断开连接。"""
+    status_code = 499
+
+
+def _percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class LLMScheduler:
+    """LLMService 前的准入调度器。
+
+    Llama 实例同一时间只能服务一个请求, 调度器负责:
+    - 有界等待队列, 队列满时快速拒绝(附 Retry-After)
+    - 按优先级出队, 同优先级先到先得
+    - 排队截止时间, 以及客户端断开后撤销排队中的请求
+    - 队列深度与等待时间统计
+
+    所有状态只在事件循环线程中修改, 因此无需加锁。
+    """
+
+    def __init__(self, max_concurrency: int, max_queue_size: int, queue_timeout: float, route: str = "large"):
+        self.route = route
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue_size = max_queue_size
+        self.queue_timeout = queue_timeout
+        self._waiters: list = []
+        self._queued = 0
+        self._active = 0
+        self._seq = itertools.count()
+        self._wait_times: deque = deque(maxlen=1000)
+        self._service_times: deque = deque(maxlen=200)
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.cancelled = 0
+        self.completed = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queued
+
+    def estimate_retry_after(self) -> int:
+        avg_service = (
+            sum(self._service_times) / len(self._service_times) if self._service_times else 5.0
+        )
+        pending = self._queued + self._active
+        return max(1, math.ceil(avg_service * pending / self.max_concurrency))
+
+    def check_capacity(self) -> None:
+        """队列已满时抛出 QueueFullError, 不占用队列位置。"""
+        if self._active >= self.max_concurrency and self._queued >= self.max_queue_size:
+            self.rejected += 1
+            raise QueueFullError("LLM queue is full", self.estimate_retry_after())
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        priority: str = "normal",
+        timeout: Optional[float] = None,
+        disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    ):
+        """获取一个推理槽位, 退出上下文时释放。
+
+        timeout 为最长排队时间(默认 LLM_QUEUE_TIMEOUT);
+        disconnected 为可选的异步回调, 排队期间定期检查, 返回 True 时撤销请求。
+        """
+        await self._acquire(priority, timeout, disconnected)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._service_times.append(time.monotonic() - started)
+            self.completed += 1
+            self._release()
+
+    async def _acquire(self, priority, timeout, disconnected) -> None:
+        enqueued_at = time.monotonic()
+        if self._active < self.max_concurrency and self._queued == 0:
+            self._active += 1
+            self.admitted += 1
+            self._record_wait(priority, 0.0)
+            return
+
+        self.check_capacity()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (PRIORITIES.get(priority, PRIORITIES["normal"]), next(self._seq), future))
+        self._queued += 1
+
+        timeout = self.queue_timeout if timeout is None else timeout
+        deadline = enqueued_at + timeout
+        try:
+            while not future.done():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                wait_for = min(remaining, 0.5) if disconnected else remaining
+                await asyncio.wait({future}, timeout=wait_for)
+                if not future.done() and disconnected and await disconnected():
+                    self._abandon(future)
+                    self.cancelled += 1
+                    raise RequestCancelledError("Client disconnected while queued", 0)
+        except asyncio.CancelledError:
+            self._abandon(future)
+            self.cancelled += 1
+            raise
+
+        if not future.done():
+            self._abandon(future)
+            self.timed_out += 1
+            raise QueueTimeoutError("Timed out waiting for the LLM", self.estimate_retry_after())
+
+        self.admitted += 1
+        self._record_wait(priority, time.monotonic() - enqueued_at)
+
+    def _record_wait(self, priority: str, seconds: float) -> None:
+        self._wait_times.append(seconds)
+        llm_queue_wait_seconds.observe(
+            seconds, route=self.route, priority=priority if priority in PRIORITIES else "normal"
+        )
+        record_timing("llm_queue", seconds)
+
+    def _abandon(self, future: asyncio.Future) -> None:
+        if future.done() and not future.cancelled():
+            # 槽位已分配但请求已放弃: 转交给下一个等待者
+            self._release()
+            return
+        if not future.cancelled():
+            future.cancel()
+        self._queued -= 1
+
+    def _release(self) -> None:
+        self._active -= 1
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.cancelled():
+                continue
+            self._queued -= 1
+            self._active += 1
+            future.set_result(None)
+            break
+
+    def collect_metrics(self) -> None:
+        llm_queue_depth.set(self._queued, route=self.route)
+        llm_requests_in_flight.set(self._active, route=self.route)
+
+    def stats(self) -> dict:
+        waits = list(self._wait_times)
+        return {
+            "queue_depth": self._queued,
+            "active": self._active,
+            "max_concurrency": self.max_concurrency,
+            "max_queue_size": self.max_queue_size,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "cancelled": self.cancelled,
+            "completed": self.completed,
+            "wait_ms": {
+                "avg": (sum(waits) / len(waits) * 1000) if waits else 0.0,
+                "p50": _percentile(waits, 50) * 1000,
+                "p95": _percentile(waits, 95) * 1000,
+                "p99": _percentile(waits, 99) * 1000,
+            },
+            "service_ms_avg": (
+                sum(self._service_times) / len(self._service_times) * 1000 if self._service_times else 0.0
+            ),
+        }
+
+
+# 每个模型路由一个调度器: 小模型上的简短查询不必排在大模型的长回答之后
+llm_schedulers = {
+    "large": LLMScheduler(
+        max_concurrency=settings.LLM_MAX_CONCURRENCY,
+        max_queue_size=settings.LLM_QUEUE_MAX_SIZE,
+        queue_timeout=settings.LLM_QUEUE_TIMEOUT,
+        route="large",
+    ),
+    "small": LLMScheduler(
+        max_concurrency=settings.LLM_SMALL_MAX_CONCURRENCY,
+        max_queue_size=settings.LLM_QUEUE_MAX_SIZE,
+        queue_timeout=settings.LLM_QUEUE_TIMEOUT,
+        route="small",
+    ),
+}
+llm_scheduler = llm_schedulers["large"]
+for _scheduler in llm_schedulers.values():
+    registry.add_collector(_scheduler.collect_metrics)
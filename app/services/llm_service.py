@@ -1,47 +1,717 @@
+import asyncio
+import math
 import os
-from llama_cpp import Llama
+import re
+import threading
+import time
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+from app.core import metrics
 from app.core.config import settings
+from app.core.executors import get_executor
+from app.services.answer_cache import answer_cache
+from app.services.inference_client import InferenceClient, InferenceError, inference_client
+
+DEFAULT_SYSTEM_PROMPT = "你是一位乐于助人的英语导师。请简洁地回答问题。"
+MODEL_MISSING_MESSAGE = "错误: 模型未加载。请先下载模型。"
+
+# 模型路由: large 为 LLM_MODEL_PATH 的主模型, small 为可选的小模型; 各自使用独立的线程池
+DEFAULT_ROUTE = "large"
+ROUTE_EXECUTORS = {"large": "llm", "small": "llm_small"}
+
+# 适合小模型的简短查询: 单个单词, 或明确的翻译、释义类提问;
+# 其他短句(语法讲解、闲聊等)仍交给大模型
+_LOOKUP_RE = re.compile(
+    r"^(?:[a-z'’-]+\s*[?？]?"
+    r"|(?:translate|define|definition of|meaning of|how do you say)\b.*"
+    r"|what does\b.*\bmean\b.*"
+    r"|翻译.*|.*(?:什么意思|的意思|怎么说|怎么翻译)\s*[?？。]?)$",
+    re.I | re.S,
+)
+
+
+_CJK_RE = re.compile(r"[\u3000-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """没有分词器时估算 token 数: 中日文字符各算一个, 其余约每 3 个字符一个(宁可高估)。"""
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 3)
+
+
+def _common_prefix_len(a, b) -> int:
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+def _perf_counters(model) -> Optional[tuple]:
+    """读取 llama.cpp 上下文的累计计时 (提示词评估毫秒, 评估 token 数, 生成毫秒, 生成 token 数)。
+
+    新版 llama-cpp-python 提供 llama_perf_context, 旧版为 llama_get_timings;
+    都不可用(或不是 llama_cpp 模型)时返回 None, 由调用方改用墙钟时间估算。
+    """
+    ctx = getattr(getattr(model, "_ctx", None), "ctx", None)
+    if ctx is None:
+        return None
+    try:
+        import llama_cpp
+
+        reader = getattr(llama_cpp, "llama_perf_context", None) or getattr(llama_cpp, "llama_get_timings")
+        data = reader(ctx)
+        return data.t_p_eval_ms, data.n_p_eval, data.t_eval_ms, data.n_eval
+    except Exception:
+        return None
+
+
+def _perf_delta(before: Optional[tuple], after: Optional[tuple]) -> Optional[tuple]:
+    if before is None or after is None:
+        return None
+    # 计时被重置(如重新创建上下文)时 after 已只包含本次请求
+    if any(a < b for a, b in zip(after, before)):
+        return after
+    return tuple(a - b for a, b in zip(after, before))
+
+
+def _llama_kwargs() -> dict:
+    return {
+        "n_ctx": settings.LLM_N_CTX,
+        "n_threads": settings.LLM_N_THREADS or None,
+        "n_batch": settings.LLM_N_BATCH,
+        "n_gpu_layers": -1,  # 如果可用,将所有层卸载到 GPU(Mac 上使用 Metal)
+    }
+
+
+def _small_model_draft(model_path: str, num_pred_tokens: int):
+    """用小模型起草候选 token 的 llama_cpp draft_model。
+
+    小模型按贪心解码生成 num_pred_tokens 个 token, 由大模型一次性验证;
+    generate 会复用与上次调用的公共前缀, 每次只评估新增的 token。
+    """
+    import numpy as np
+    from llama_cpp import Llama
+    from llama_cpp.llama_speculative import LlamaDraftModel
+
+    class SmallModelDraft(LlamaDraftModel):
+        def __init__(self, model):
+            self.model = model
+
+        def __call__(self, input_ids, /, **kwargs):
+            drafted = []
+            for token in self.model.generate(input_ids.tolist(), top_k=1, temp=0.0, reset=True):
+                drafted.append(token)
+                if len(drafted) >= num_pred_tokens:
+                    break
+            return np.array(drafted, dtype=np.intc)
+
+    return SmallModelDraft(Llama(model_path=model_path, verbose=False, **_llama_kwargs()))
+
+
+def _speculative_draft(mode: str):
+    """按 LLM_SPECULATIVE_MODE 创建推测解码用的 draft_model; off 或创建失败时返回 None。"""
+    if mode == "off":
+        return None
+    try:
+        if mode == "prompt_lookup":
+            from llama_cpp.llama_speculative import LlamaPromptLookupDecoding
+
+            return LlamaPromptLookupDecoding(num_pred_tokens=settings.LLM_SPECULATIVE_TOKENS)
+        if mode == "draft":
+            if not settings.LLM_SMALL_MODEL_PATH:
+                print("未找到小模型, 无法使用 draft 推测解码")
+                return None
+            return _small_model_draft(settings.LLM_SMALL_MODEL_PATH, settings.LLM_SPECULATIVE_TOKENS)
+        print(f"未知的推测解码模式: {mode}")
+    except Exception as e:
+        print(f"初始化推测解码失败, 不使用推测解码: {e}")
+    return None
+
+
+class LLMModel:
+    """一个 GGUF 模型: 按需加载、推理锁、前缀 KV 缓存、回答缓存与生成统计。"""
+
+    def __init__(self, route: str, model_path: str, kv_cache_bytes: int, speculative: str = "off"):
+        self.route = route
+        self.model_path = model_path
+        self.kv_cache_bytes = kv_cache_bytes
+        self.speculative = speculative
+        # Llama 实例不支持并发调用, 所有推理都需持有此锁
+        self._lock = threading.Lock()
+        self.kv_cache = None
+        # 采样参数同时参与回答缓存的键
+        self.sampling = {"max_tokens": settings.LLM_MAX_TOKENS, "temperature": 0.7}
+        self._kv_stats = {"requests": 0, "prompt_tokens": 0, "skipped_tokens": 0, "last_skipped": 0}
+        self._generation_stats = {"requests": 0, "generated_tokens": 0, "eval_seconds": 0.0, "seconds": 0.0}
+        # 模型在首次使用或后台预热时才加载, 导入本模块不会触发加载
+        self.model = None
+        self._load_lock = threading.Lock()
+        self.load_state = "not_loaded"  # not_loaded / loading / ready / missing / failed
+        self.load_seconds = None
+        self.load_error = None
+
+    def ensure_loaded(self) -> bool:
+        """加载模型(若尚未加载), 返回模型是否可用。多线程并发调用时只加载一次。"""
+        if self.model is not None:
+            return True
+        with self._load_lock:
+            if self.model is not None:
+                return True
+            if self.load_state in ("missing", "failed"):
+                return False
+
+            if not os.path.exists(self.model_path):
+                print(f"警告: LLM 模型({self.route})未在 {self.model_path} 找到")
+                self.load_state = "missing"
+                return False
+
+            self.load_state = "loading"
+            started = time.monotonic()
+            print(f"正在从 {self.model_path} 加载 LLM({self.route})...")
+            try:
+                from llama_cpp import Llama, LlamaRAMCache
+
+                kwargs = _llama_kwargs()
+                draft_model = _speculative_draft(self.speculative)
+                if draft_model is not None:
+                    kwargs["draft_model"] = draft_model
+                else:
+                    self.speculative = "off"
+                model = Llama(model_path=self.model_path, verbose=True, **kwargs)
+                if self.kv_cache_bytes > 0:
+                    # 按 token 前缀缓存 KV 状态: 相同系统提示词 + 课文上下文的后续请求
+                    # 直接恢复状态, 只需评估新增部分; 超出预算时按 LRU 淘汰
+                    self.kv_cache = LlamaRAMCache(capacity_bytes=self.kv_cache_bytes)
+                    model.set_cache(self.kv_cache)
+            except Exception as e:
+                print(f"加载 LLM 失败: {e}")
+                self.load_state = "failed"
+                self.load_error = str(e)
+                return False
+
+            self.model = model
+            self.load_seconds = time.monotonic() - started
+            self.load_state = "ready"
+            print(f"LLM({self.route}) 已加载。(耗时 {self.load_seconds:.1f}s)")
+            return True
+
+    def status(self) -> dict:
+        return {
+            "state": self.load_state,
+            "model": self.model_name,
+            "load_seconds": self.load_seconds,
+            "error": self.load_error,
+            "speculative": self.speculative,
+        }
+
+    def _build_messages(self, prompt: str, system_prompt: str) -> list:
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+
+    @property
+    def model_name(self) -> str:
+        return os.path.basename(self.model_path)
+
+    def count_tokens(self, texts: List[str]) -> List[int]:
+        """用模型的分词器统计每段文本的 token 数; 模型尚未加载时按字符数估算。"""
+        tokenize = getattr(self.model, "tokenize", None)
+        if tokenize is None:
+            return [estimate_tokens(text) for text in texts]
+        return [len(tokenize(text.encode("utf-8"), add_bos=False, special=False)) for text in texts]
+
+    def _sampling(self, max_tokens: Optional[int]) -> dict:
+        return self.sampling if max_tokens is None else {**self.sampling, "max_tokens": max_tokens}
+
+    def _answer_key(self, prompt: str, system_prompt: str, sampling: Optional[dict] = None) -> str:
+        return answer_cache.make_key(prompt, system_prompt, self.model_name, sampling or self.sampling)
+
+    def cached_answer(
+        self,
+        prompt: str,
+        system_prompt: str = DEFAULT_SYSTEM_PROMPT,
+        max_tokens: Optional[int] = None,
+        record_stats: bool = True,
+    ) -> Optional[str]:
+        """查询回答缓存, 未启用或未命中时返回 None。record_stats=False 时不计入命中统计。"""
+        if not settings.LLM_ANSWER_CACHE_ENABLED:
+            return None
+        return answer_cache.get(self._answer_key(prompt, system_prompt, self._sampling(max_tokens)), record_stats)
+
+    def alias_answer(
+        self, prompt: str, system_prompt: str, alias_prompt: str, alias_system_prompt: str,
+        max_tokens: Optional[int] = None,
+    ) -> None:
+        """把已缓存的回答再登记到另一组提示词(如上下文未裁剪的原始请求)下; 没有缓存时不做任何事。"""
+        if not settings.LLM_ANSWER_CACHE_ENABLED:
+            return
+        sampling = self._sampling(max_tokens)
+        answer = answer_cache.get(self._answer_key(prompt, system_prompt, sampling), record_stats=False)
+        if answer is not None:
+            self._remember_answer(alias_prompt, alias_system_prompt, answer, sampling)
+
+    def _remember_answer(self, prompt: str, system_prompt: str, answer: str, sampling: Optional[dict] = None) -> None:
+        answer_cache.put(self._answer_key(prompt, system_prompt, sampling), self.model_name, answer)
+
+    def chat(
+        self,
+        prompt: str,
+        system_prompt: str = DEFAULT_SYSTEM_PROMPT,
+        use_cache: bool = True,
+        max_tokens: Optional[int] = None,
+    ) -> str:
+        """生成完整回答。max_tokens 覆盖默认的生成长度上限(如批量释义需要更长的输出)。"""
+        if not self.ensure_loaded():
+            return MODEL_MISSING_MESSAGE
+
+        sampling = self._sampling(max_tokens)
+        use_cache = use_cache and settings.LLM_ANSWER_CACHE_ENABLED
+        if use_cache:
+            # 排队期间相同问题可能已被回答, 拿到模型前再查一次
+            cached = answer_cache.get(self._answer_key(prompt, system_prompt, sampling), record_stats=False)
+            if cached is not None:
+                return cached
+
+        with self._lock:
+            reusable = self._reusable_prefixes()
+            perf_before = _perf_counters(self.model)
+            started = time.perf_counter()
+            response = self.model.create_chat_completion(
+                messages=self._build_messages(prompt, system_prompt),
+                **sampling,
+            )
+            elapsed = time.perf_counter() - started
+            usage = response.get("usage", {})
+            self._record_prefix_reuse(reusable, usage.get("prompt_tokens", 0))
+            self._record_generation(
+                "chat", _perf_delta(perf_before, _perf_counters(self.model)),
+                usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0), None, elapsed,
+            )
+
+        choice = response["choices"][0]
+        answer = choice["message"]["content"]
+        # 因达到 max_tokens 被截断的回答不写入缓存, 避免以后一直返回不完整的回答
+        if use_cache and choice.get("finish_reason") == "stop":
+            self._remember_answer(prompt, system_prompt, answer, sampling)
+        return answer
+
+    def _reusable_prefixes(self) -> list:
+        """调用前可复用的 token 序列: 当前上下文中的状态以及 KV 缓存中的各条目。"""
+        prefixes = [self.model._input_ids.tolist()]
+        if self.kv_cache is not None:
+            prefixes.extend(self.kv_cache.cache_state.keys())
+        return prefixes
+
+    def _record_prefix_reuse(self, reusable: list, prompt_tokens: int) -> None:
+        """估算本次请求跳过评估的提示词 token 数。
+
+        生成结束后上下文的前 prompt_tokens 个 token 即本次提示词, 与调用前
+        可复用序列的最长公共前缀就是无需重新评估的部分(最后一个 token 总会重新评估)。
+        """
+        if prompt_tokens <= 0:
+            return
+        prompt_ids = self.model._input_ids[:prompt_tokens].tolist()
+        skipped = max((_common_prefix_len(ids, prompt_ids) for ids in reusable), default=0)
+        skipped = min(skipped, prompt_tokens - 1)
+        self._kv_stats["requests"] += 1
+        self._kv_stats["prompt_tokens"] += prompt_tokens
+        self._kv_stats["skipped_tokens"] += skipped
+        self._kv_stats["last_skipped"] = skipped
+
+    def _record_generation(
+        self,
+        mode: str,
+        perf: Optional[tuple],
+        prompt_tokens: int,
+        generated_tokens: int,
+        first_token_seconds: Optional[float],
+        elapsed: float,
+    ) -> None:
+        """记录一次生成的 token 数、提示词评估与生成耗时以及各自的 tokens/s。
+
+        优先使用 llama.cpp 的计时(只统计真正评估的 token, 不含 KV 缓存恢复的部分);
+        没有计时时, 流式生成以首个 token 的时间划分两个阶段, 非流式只记录整体生成耗时。
+        """
+        metrics.llm_requests_total.inc(route=self.route, mode=mode)
+        if perf is not None:
+            prompt_ms, prompt_evaluated, eval_ms, generated_tokens = perf
+            prompt_seconds, eval_seconds = prompt_ms / 1000, eval_ms / 1000
+        else:
+            prompt_evaluated = None
+            if first_token_seconds is not None:
+                prompt_seconds, eval_seconds = first_token_seconds, elapsed - first_token_seconds
+            else:
+                prompt_seconds, eval_seconds = None, elapsed
+
+        route = self.route
+        if prompt_tokens:
+            metrics.llm_prompt_tokens_total.inc(prompt_tokens, route=route)
+        if prompt_evaluated is not None:
+            metrics.llm_prompt_eval_tokens_total.inc(prompt_evaluated, route=route)
+        metrics.llm_generated_tokens_total.inc(generated_tokens, route=route)
+        if prompt_seconds is not None:
+            metrics.llm_prompt_eval_seconds.observe(prompt_seconds, route=route)
+            metrics.record_timing("llm_prompt", prompt_seconds)
+            if prompt_evaluated and prompt_seconds > 0:
+                metrics.llm_tokens_per_second.observe(prompt_evaluated / prompt_seconds, route=route, phase="prompt")
+        metrics.llm_generation_seconds.observe(eval_seconds, route=route)
+        metrics.record_timing("llm_eval", eval_seconds)
+        if generated_tokens and eval_seconds > 0:
+            metrics.llm_tokens_per_second.observe(generated_tokens / eval_seconds, route=route, phase="eval")
+
+        stats = self._generation_stats
+        stats["requests"] += 1
+        stats["generated_tokens"] += generated_tokens
+        stats["eval_seconds"] += eval_seconds
+        stats["seconds"] += elapsed
+
+    def collect_metrics(self) -> None:
+        prompt_tokens = self._kv_stats["prompt_tokens"]
+        metrics.llm_kv_reuse_ratio.set(
+            self._kv_stats["skipped_tokens"] / prompt_tokens if prompt_tokens else 0.0, route=self.route
+        )
+
+    def stats(self) -> dict:
+        """本模型的生成统计: 请求数、生成 token 数、平均耗时与生成速度。"""
+        stats = self._generation_stats
+        return {
+            **self.status(),
+            "requests": stats["requests"],
+            "generated_tokens": stats["generated_tokens"],
+            "avg_ms": stats["seconds"] / stats["requests"] * 1000 if stats["requests"] else 0.0,
+            "tokens_per_second": stats["generated_tokens"] / stats["eval_seconds"] if stats["eval_seconds"] else 0.0,
+            "kv_cache": self.kv_cache_stats(),
+        }
+
+    def kv_cache_stats(self) -> dict:
+        stats = dict(self._kv_stats)
+        stats["enabled"] = self.kv_cache is not None
+        stats["skipped_ratio"] = (
+            stats["skipped_tokens"] / stats["prompt_tokens"] if stats["prompt_tokens"] else 0.0
+        )
+        if self.kv_cache is not None:
+            stats["entries"] = len(self.kv_cache.cache_state)
+            stats["bytes"] = self.kv_cache.cache_size
+            stats["capacity_bytes"] = self.kv_cache.capacity_bytes
+        return stats
+
+    def stream_chat(
+        self,
+        prompt: str,
+        system_prompt: str = DEFAULT_SYSTEM_PROMPT,
+        cancel_event: Optional[threading.Event] = None,
+        use_cache: bool = True,
+        max_tokens: Optional[int] = None,
+    ) -> Iterator[str]:
+        """逐 token 产出回答。
+
+        cancel_event 被置位后在下一个 token 处停止生成并释放模型,
+        用于客户端断开连接时及时取消推理。自然结束(finish_reason 为 stop)的回答会写入回答缓存。
+        """
+        if not self.ensure_loaded():
+            yield MODEL_MISSING_MESSAGE
+            return
+
+        sampling = self._sampling(max_tokens)
+        pieces = []
+        finish_reason = None
+        with self._lock:
+            reusable = self._reusable_prefixes()
+            perf_before = _perf_counters(self.model)
+            started = time.perf_counter()
+            first_token_seconds = None
+            stream = self.model.create_chat_completion(
+                messages=self._build_messages(prompt, system_prompt),
+                stream=True,
+                **sampling,
+            )
+            try:
+                for chunk in stream:
+                    if cancel_event is not None and cancel_event.is_set():
+                        break
+                    choice = chunk["choices"][0]
+                    finish_reason = choice.get("finish_reason") or finish_reason
+                    text = choice["delta"].get("content")
+                    if text:
+                        if first_token_seconds is None:
+                            first_token_seconds = time.perf_counter() - started
+                        pieces.append(text)
+                        yield text
+            finally:
+                stream.close()
+                # 流式响应没有 usage, 上下文中除已生成的 token 外即为提示词
+                prompt_tokens = max(0, len(self.model._input_ids) - len(pieces))
+                self._record_prefix_reuse(reusable, prompt_tokens)
+                self._record_generation(
+                    "stream", _perf_delta(perf_before, _perf_counters(self.model)),
+                    prompt_tokens, len(pieces), first_token_seconds, time.perf_counter() - started,
+                )
+
+        if finish_reason == "stop" and use_cache and settings.LLM_ANSWER_CACHE_ENABLED:
+            self._remember_answer(prompt, system_prompt, "".join(pieces), sampling)
+
 
 class LLMService:
+    """管理各路由的模型: large(LLM_MODEL_PATH)必有, small(MODEL_DIR/llm_small)可选。
+
+    单词释义、翻译等简短查询交给小模型, 整句讲解与自由提问交给大模型;
+    小模型缺失或加载失败时所有请求都回退到大模型。
+    """
+
     _instance = None
-    _model = None
 
     @classmethod
     def get_instance(cls):
         if cls._instance is None:
-            cls._instance = LLMService()
+            cls._instance = cls()
         return cls._instance
 
     def __init__(self):
-        if not os.path.exists(settings.LLM_MODEL_PATH):
-            print(f"警告: LLM 模型未在 {settings.LLM_MODEL_PATH} 找到")
-            self.model = None
-        else:
-            print(f"正在从 {settings.LLM_MODEL_PATH} 加载 LLM...")
-            # n_ctx=4096 提供合适的上下文窗口
-            self.model = Llama(
-                model_path=settings.LLM_MODEL_PATH,
-                n_ctx=4096,
-                n_gpu_layers=-1, # 如果可用,将所有层卸载到 GPU(Mac 上使用 Metal)
-                verbose=True
-            )
-            print("LLM 已加载。")
+        self.models: Dict[str, LLMModel] = {
+            "large": LLMModel(
+                "large", settings.LLM_MODEL_PATH, settings.LLM_KV_CACHE_BYTES, settings.LLM_SPECULATIVE_MODE
+            ),
+        }
+        if settings.LLM_SMALL_MODEL_PATH:
+            self.models["small"] = LLMModel("small", settings.LLM_SMALL_MODEL_PATH, settings.LLM_SMALL_KV_CACHE_BYTES)
 
-    def chat(self, prompt: str, system_prompt: str = "你是一位乐于助人的英语导师。请简洁地回答问题。") -> str:
-        if not self.model:
-            return "错误: 模型未加载。请先下载模型。"
+    def model_for(self, route: str) -> LLMModel:
+        model = self.models.get(route)
+        if model is None or model.load_state in ("missing", "failed"):
+            return self.models[DEFAULT_ROUTE]
+        return model
 
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": prompt}
-        ]
-        
-        response = self.model.create_chat_completion(
-            messages=messages,
-            max_tokens=512,
-            temperature=0.7,
+    def route_for(self, kind: Optional[str], message: str, context: Optional[str] = None) -> str:
+        """按请求类型选择模型路由: LLM_SMALL_KINDS 中的类型, 以及未指定类型 / free 的请求中
+        不带上下文的单个单词或明确的翻译、释义提问交给小模型, 其余交给大模型。"""
+        if self.model_for("small").route != "small":
+            return DEFAULT_ROUTE
+        if kind in settings.LLM_SMALL_KINDS:
+            return "small"
+        message = message.strip()
+        short = not context and len(message) <= settings.LLM_SMALL_MAX_CHARS
+        if kind in (None, "free") and short and _LOOKUP_RE.match(message):
+            return "small"
+        return DEFAULT_ROUTE
+
+    def executor_for(self, route: str) -> str:
+        return ROUTE_EXECUTORS.get(route, ROUTE_EXECUTORS[DEFAULT_ROUTE])
+
+    def _loaded_model(self, route: str) -> LLMModel:
+        model = self.model_for(route)
+        if model.route != DEFAULT_ROUTE and not model.ensure_loaded():
+            print(f"{route} 模型不可用, 改用 {DEFAULT_ROUTE} 模型")
+            model = self.models[DEFAULT_ROUTE]
+        return model
+
+    def ensure_loaded(self, route: Optional[str] = None) -> bool:
+        """加载指定路由(默认全部)的模型, 返回主模型或指定路由是否可用。"""
+        if route is not None:
+            return self._loaded_model(route).ensure_loaded()
+        for model in self.models.values():
+            model.ensure_loaded()
+        return self.models[DEFAULT_ROUTE].ensure_loaded()
+
+    def status(self) -> dict:
+        """主模型的加载状态, routes 中为各路由模型的状态。"""
+        return {
+            **self.models[DEFAULT_ROUTE].status(),
+            "routes": {route: model.status() for route, model in self.models.items()},
+        }
+
+    @property
+    def model_name(self) -> str:
+        return self.models[DEFAULT_ROUTE].model_name
+
+    def count_tokens(self, texts: List[str], route: str = DEFAULT_ROUTE) -> List[int]:
+        return self.model_for(route).count_tokens(texts)
+
+    def cached_answer(
+        self,
+        prompt: str,
+        system_prompt: str = DEFAULT_SYSTEM_PROMPT,
+        max_tokens: Optional[int] = None,
+        route: str = DEFAULT_ROUTE,
+        record_stats: bool = True,
+    ) -> Optional[str]:
+        return self.model_for(route).cached_answer(prompt, system_prompt, max_tokens, record_stats)
+
+    def alias_answer(
+        self,
+        prompt: str,
+        system_prompt: str,
+        alias_prompt: str,
+        alias_system_prompt: str,
+        max_tokens: Optional[int] = None,
+        route: str = DEFAULT_ROUTE,
+    ) -> None:
+        self.model_for(route).alias_answer(prompt, system_prompt, alias_prompt, alias_system_prompt, max_tokens)
+
+    def chat(
+        self,
+        prompt: str,
+        system_prompt: str = DEFAULT_SYSTEM_PROMPT,
+        use_cache: bool = True,
+        max_tokens: Optional[int] = None,
+        route: str = DEFAULT_ROUTE,
+    ) -> str:
+        return self._loaded_model(route).chat(prompt, system_prompt, use_cache=use_cache, max_tokens=max_tokens)
+
+    def stream_chat(
+        self,
+        prompt: str,
+        system_prompt: str = DEFAULT_SYSTEM_PROMPT,
+        cancel_event: Optional[threading.Event] = None,
+        use_cache: bool = True,
+        max_tokens: Optional[int] = None,
+        route: str = DEFAULT_ROUTE,
+    ) -> Iterator[str]:
+        return self._loaded_model(route).stream_chat(
+            prompt, system_prompt, cancel_event=cancel_event, use_cache=use_cache, max_tokens=max_tokens
         )
-        
-        return response["choices"][0]["message"]["content"]
 
-llm_service = LLMService.get_instance()
+    async def astream_chat(
+        self,
+        prompt: str,
+        system_prompt: str = DEFAULT_SYSTEM_PROMPT,
+        use_cache: bool = True,
+        max_tokens: Optional[int] = None,
+        route: str = DEFAULT_ROUTE,
+    ) -> AsyncIterator[str]:
+        """在路由对应的线程池中运行 stream_chat, 通过 asyncio 队列把 token 交给事件循环。
+
+        生成器被关闭(客户端断开)时置位 cancel_event, 工作线程在下一个 token
+        处停止并释放模型锁。
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        cancel_event = threading.Event()
+        done = object()
+
+        def produce():
+            try:
+                tokens = self.stream_chat(
+                    prompt, system_prompt, cancel_event=cancel_event, use_cache=use_cache,
+                    max_tokens=max_tokens, route=route,
+                )
+                for token in tokens:
+                    loop.call_soon_threadsafe(queue.put_nowait, token)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        loop.run_in_executor(get_executor(self.executor_for(route)), produce)
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            cancel_event.set()
+
+    def collect_metrics(self) -> None:
+        for model in self.models.values():
+            model.collect_metrics()
+
+    def stats(self) -> dict:
+        """各路由模型的生成统计; kv_cache 为主模型的前缀缓存统计。"""
+        return {
+            "kv_cache": self.models[DEFAULT_ROUTE].kv_cache_stats(),
+            "routes": {route: model.stats() for route, model in self.models.items()},
+        }
+
+
+class RemoteLLMService(LLMService):
+    """INFERENCE_MODE=remote 时使用: 模型由推理服务器进程持有, 本进程只转发请求。
+
+    回答缓存仍在本进程查询(与推理服务器共用数据库), 路由也在本进程决定;
+    推理指标、各路由的生成统计与 KV 缓存统计由推理服务器记录, 见其 /metrics 与 /llm/stats。
+    """
+
+    def __init__(self, client: InferenceClient = inference_client):
+        super().__init__()
+        self.client = client
+        self._remote_status: dict = {}
+
+    def ensure_loaded(self, route: Optional[str] = None) -> bool:
+        """请求推理服务器加载模型并同步其状态。服务器不可达时返回 False, 下次调用重试。"""
+        if self._remote_status.get("state") == "ready":
+            return True
+        try:
+            self._remote_status = self.client.post_json("/llm/load", {"route": route})
+        except InferenceError as e:
+            print(f"推理服务器不可用: {e}")
+            self._remote_status = {"state": "failed", "error": str(e)}
+            return False
+        return self._remote_status["state"] == "ready"
+
+    def status(self) -> dict:
+        status = self._remote_status or {"state": "not_loaded", "error": None}
+        return {"model": self.model_name, "load_seconds": None, **status, "server": self.client.url}
+
+    def count_tokens(self, texts: List[str], route: str = DEFAULT_ROUTE) -> List[int]:
+        try:
+            return self.client.post_json("/llm/tokenize", {"texts": texts, "route": route})["counts"]
+        except InferenceError:
+            return [estimate_tokens(text) for text in texts]
+
+    def chat(
+        self,
+        prompt: str,
+        system_prompt: str = DEFAULT_SYSTEM_PROMPT,
+        use_cache: bool = True,
+        max_tokens: Optional[int] = None,
+        route: str = DEFAULT_ROUTE,
+    ) -> str:
+        payload = {
+            "prompt": prompt, "system_prompt": system_prompt, "use_cache": use_cache,
+            "max_tokens": max_tokens, "route": route,
+        }
+        return self.client.post_json("/llm/chat", payload)["answer"]
+
+    def stream_chat(
+        self,
+        prompt: str,
+        system_prompt: str = DEFAULT_SYSTEM_PROMPT,
+        cancel_event: Optional[threading.Event] = None,
+        use_cache: bool = True,
+        max_tokens: Optional[int] = None,
+        route: str = DEFAULT_ROUTE,
+    ) -> Iterator[str]:
+        """逐行读取推理服务器的 NDJSON 流。取消时关闭连接, 服务器随之停止生成。"""
+        payload = {
+            "prompt": prompt, "system_prompt": system_prompt, "use_cache": use_cache,
+            "max_tokens": max_tokens, "route": route,
+        }
+        lines = self.client.stream_json("/llm/stream", payload)
+        try:
+            for line in lines:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                if "error" in line:
+                    raise InferenceError(f"推理服务器生成失败: {line['error']}")
+                if line.get("done"):
+                    return
+                yield line["token"]
+        finally:
+            lines.close()
+        raise InferenceError("推理服务器在生成结束前关闭了连接")
+
+    def collect_metrics(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        try:
+            return self.client.get_json("/llm/stats")
+        except InferenceError as e:
+            return {"kv_cache": {"enabled": None, "error": str(e)}, "routes": {}}
+
+
+llm_service = (RemoteLLMService if settings.INFERENCE_MODE == "remote" else LLMService).get_instance()
+metrics.registry.add_collector(llm_service.collect_metrics)
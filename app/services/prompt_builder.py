@@ -0,0 +1,162 @@
+import math
+import re
+from collections import Counter
+from typing import List, Optional, Tuple
+
+from app.core import metrics
+from app.core.config import settings
+from app.services.llm_service import DEFAULT_ROUTE, llm_service
+from app.services.segmentation import split_sentences
+
+BASE_SYSTEM_PROMPT = "You are a helpful English language tutor."
+CONTEXT_PREFIX = " Context: "
+# 聊天模板为每条消息添加的角色标记等, 以及按句分别计数与整体计数的误差
+TEMPLATE_OVERHEAD_TOKENS = 32
+GAP_MARKER = " … "
+
+_WORD_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?|[一-鿿]")
+_STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "did", "do", "does", "for", "from", "has", "have",
+    "how", "i", "in", "is", "it", "its", "me", "my", "of", "on", "or", "so", "that", "the", "this", "to", "was",
+    "what", "when", "where", "which", "who", "why", "with", "you", "your", "mean", "means", "explain", "word",
+    "sentence",
+}
+
+
+def _terms(text: str) -> List[str]:
+    return [word for word in _WORD_RE.findall(text.lower()) if word not in _STOP_WORDS]
+
+
+def _stem(word: str) -> str:
+    # 粗略合并常见词形变化, 让 "runs" / "running" 能匹配问题中的 "run"
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            return word[: -len(suffix)]
+    return word
+
+
+class PromptBuilder:
+    """在 token 预算内组装对话提示词, 并按请求类型决定生成长度与使用的模型路由。
+
+    - 用模型的分词器计数(模型未加载时按字符估算), 预算为 LLM_PROMPT_MAX_TOKENS,
+      且不超过 LLM_N_CTX 减去生成长度, 保证提示词与回答一起放得进上下文窗口
+    - 上下文整体放不下时按句切分, 只保留与问题词语重叠(按 IDF 加权)的句子及其相邻句,
+      预算不够时优先保留得分高的, 再按原文顺序拼接, 被省略的部分用省略号标出;
+      没有相关句子时保留开头部分
+    """
+
+    def max_tokens_for(self, kind: Optional[str]) -> int:
+        return settings.LLM_MAX_TOKENS_BY_KIND.get(kind or "free", settings.LLM_MAX_TOKENS)
+
+    def prompt_budget(self, max_tokens: int) -> int:
+        return min(settings.LLM_PROMPT_MAX_TOKENS, settings.LLM_N_CTX - max_tokens)
+
+    def draft(self, message: str, context: Optional[str] = None, kind: Optional[str] = None) -> dict:
+        """不统计 token、完整保留上下文的提示词 {message, system_prompt, max_tokens, route}。
+
+        提示词在预算内时与 build 的结果相同, 可以在组装前先用它查询回答缓存。
+        """
+        route = llm_service.route_for(kind, message, context)
+        context = (context or "").strip()
+        return {
+            "message": message,
+            "system_prompt": BASE_SYSTEM_PROMPT + (CONTEXT_PREFIX + context if context else ""),
+            "max_tokens": self.max_tokens_for(kind),
+            "route": route,
+        }
+
+    def build(self, message: str, context: Optional[str] = None, kind: Optional[str] = None) -> dict:
+        """返回 {message, system_prompt, max_tokens, route, prompt_tokens, context}。
+
+        context 说明上下文的使用方式: none(未提供) / full(完整保留) /
+        selected(只保留部分句子) / dropped(问题本身已占满预算)。
+        """
+        draft = self.draft(message, context, kind)
+        max_tokens, route = draft["max_tokens"], draft["route"]
+        budget = self.prompt_budget(max_tokens) - TEMPLATE_OVERHEAD_TOKENS
+        context = (context or "").strip()
+        texts = [BASE_SYSTEM_PROMPT + CONTEXT_PREFIX, message] + ([context] if context else [])
+        counts = llm_service.count_tokens(texts, route)
+        base_tokens, message_tokens = counts[0], counts[1]
+        context_tokens = 0
+
+        if base_tokens + message_tokens > budget:
+            # 问题本身超出预算(如粘贴了整篇文章提问): 截断问题, 不再附带上下文
+            keep = max(1, budget - base_tokens)
+            message = message[: len(message) * keep // message_tokens]
+            message_tokens = keep
+            context, outcome = "", ("dropped" if context else "none")
+        elif not context:
+            outcome = "none"
+        elif base_tokens + message_tokens + counts[2] <= budget:
+            context_tokens, outcome = counts[2], "full"
+        else:
+            context, context_tokens = self.select_context(
+                message, context, budget - base_tokens - message_tokens, route
+            )
+            outcome = "selected" if context else "dropped"
+
+        metrics.llm_prompt_context_total.inc(outcome=outcome)
+        system_prompt = BASE_SYSTEM_PROMPT + (CONTEXT_PREFIX + context if context else "")
+        return {
+            "message": message,
+            "system_prompt": system_prompt,
+            "max_tokens": max_tokens,
+            "route": route,
+            "prompt_tokens": base_tokens + message_tokens + context_tokens + TEMPLATE_OVERHEAD_TOKENS,
+            "context": outcome,
+        }
+
+    def select_context(self, question: str, context: str, budget: int, route: str = DEFAULT_ROUTE) -> Tuple[str, int]:
+        """从上下文中选出与问题最相关、总计不超过 budget 个 token 的句子, 按原文顺序拼接。
+
+        返回 (拼接后的上下文, 其 token 数)。
+        """
+        sentences = split_sentences(context)
+        if not sentences or budget <= 0:
+            return "", 0
+        costs = llm_service.count_tokens(sentences, route)
+        scores = self._scores(question, sentences)
+
+        order = sorted(range(len(sentences)), key=lambda i: (-scores[i], i))
+        if scores[order[0]] > 0:
+            # 有相关句子时只保留它们, 不用无关内容填满预算(提示词越短评估越快)
+            order = [i for i in order if scores[i] > 0]
+        chosen, remaining = [], budget
+        for index in order:
+            cost = costs[index] + 1
+            if cost <= remaining:
+                chosen.append(index)
+                remaining -= cost
+        if not chosen:
+            # 没有一句放得下(单句极长): 截取最相关句子的开头
+            best = order[0]
+            return sentences[best][: len(sentences[best]) * budget // (costs[best] + 1)], budget
+
+        chosen.sort()
+        parts = []
+        for position, index in enumerate(chosen):
+            if position and index != chosen[position - 1] + 1:
+                parts.append(GAP_MARKER)
+            elif position:
+                parts.append(" ")
+            parts.append(sentences[index])
+        return "".join(parts), budget - remaining
+
+    def _scores(self, question: str, sentences: List[str]) -> List[float]:
+        """按问题词语在各句中出现的 IDF 之和打分, 再加上相邻句得分的一部分(保留上下文连贯)。"""
+        query = {_stem(word) for word in _terms(question)}
+        sentence_terms = [{_stem(word) for word in _terms(sentence)} for sentence in sentences]
+        document_frequency = Counter(term for terms in sentence_terms for term in terms & query)
+        total = len(sentences)
+        raw = [
+            sum(math.log(1 + total / document_frequency[term]) for term in terms & query)
+            for terms in sentence_terms
+        ]
+        return [
+            score + 0.3 * max(raw[i - 1] if i > 0 else 0.0, raw[i + 1] if i + 1 < total else 0.0)
+            for i, score in enumerate(raw)
+        ]
+
+
+prompt_builder = PromptBuilder()
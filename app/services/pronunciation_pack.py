@@ -0,0 +1,251 @@
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+from app.core import metrics
+from app.core.config import settings
+
+PACK_MAGIC = b"PRONPACK"
+PACK_VERSION = 1
+# 文件头: 魔数, 格式版本, 索引偏移, 索引长度; 其后是连续存放的音频数据, 文件末尾是 JSON 索引
+_HEADER = struct.Struct("<8sIQQ")
+MEDIA_TYPES = {"mp3": "audio/mpeg", "opus": "audio/ogg", "wav": "audio/wav"}
+# 修改文件后服务进程最多隔这么久(秒)发现并切换到新的发音包
+RELOAD_CHECK_INTERVAL = 5.0
+
+_WORD_RE = re.compile(r"[a-z]+(?:['’-][a-z]+)*")
+_TOKEN_RE = re.compile(r"[A-Za-z]+(?:['’-][A-Za-z]+)*")
+_MAX_WORD_LENGTH = 40
+
+
+def normalize_word(text: str) -> Optional[str]:
+    """把单个单词规范化为发音包的键(小写、去掉两端标点); 不是单个单词时返回 None。"""
+    word = text.strip().strip(".,!?;:\"'()[]“”‘’").lower().replace("’", "'")
+    if len(word) > _MAX_WORD_LENGTH or not _WORD_RE.fullmatch(word):
+        return None
+    return word
+
+
+def corpus_words(texts: Iterable[str]) -> Counter:
+    """统计文本中各单词(已规范化)的出现次数。"""
+    counts = Counter()
+    for text in texts:
+        for token in _TOKEN_RE.findall(text):
+            word = normalize_word(token)
+            if word:
+                counts[word] += 1
+    return counts
+
+
+class PronunciationPack:
+    """只读的单词发音包: 把所有单词的音频打包在一个文件里, 用 mmap 映射后按偏移取出。
+
+    - 文件末尾的索引在打开时载入字典, 查询为 O(1), 音频数据直接从页缓存切片, 不经过 SQLite 与单个小文件
+    - 每个单词带有音频内容的哈希, 用作 URL 中的版本号与 ETag, 浏览器可以长期缓存
+    - 重新构建的发音包通过原子替换写入; 服务进程定期检查文件, 发现变化后切换映射
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        # (mmap, 索引, 元数据) 作为一个整体替换, 查询时取一次快照, 避免偏移与映射来自不同版本
+        self._state: Optional[Tuple[mmap.mmap, Dict[str, list], dict]] = None
+        self._identity = None
+        self._checked_at = 0.0
+
+    def _open(self) -> None:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self._state, self._identity = None, None
+            return
+        identity = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if identity == self._identity:
+            return
+        # 旧映射不主动关闭, 由垃圾回收在没有引用后释放: 其他线程可能正在从中切片
+        self._state, self._identity = None, identity
+        try:
+            meta, index, mapped = read_pack(self.path)
+        except (OSError, ValueError) as e:
+            print(f"无法读取发音包 {self.path}: {e}")
+            return
+        self._state = (mapped, index, meta)
+        print(f"已加载发音包: {len(index)} 个单词({meta.get('engine')} / {meta.get('voice')})")
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < RELOAD_CHECK_INTERVAL:
+            return
+        with self._lock:
+            if now - self._checked_at >= RELOAD_CHECK_INTERVAL:
+                self._open()
+                self._checked_at = now
+
+    def _find(self, text: str, profile: Optional[dict] = None) -> Tuple[Optional[dict], Optional[mmap.mmap]]:
+        word = normalize_word(text)
+        if word is None:
+            return None, None
+        self._refresh()
+        state = self._state
+        if state is None or (profile and any(state[2].get(key) != value for key, value in profile.items())):
+            return None, None
+        entry = state[1].get(word)
+        if entry is None:
+            return None, None
+        offset, length, fmt, digest = entry
+        return {"word": word, "offset": offset, "length": length, "format": fmt, "hash": digest}, state[0]
+
+    def lookup(self, text: str, profile: Optional[dict] = None) -> Optional[dict]:
+        """查询单个单词, 返回 {word, offset, length, format, hash}; 不是单词或不在发音包中时返回 None。
+
+        profile 为当前 TTS 的 {engine, voice, language}: 与发音包的音色不同(更换音色后尚未重建)时视为未命中。
+        可能重新载入索引, 不要在事件循环中调用。
+        """
+        if normalize_word(text) is None:
+            return None
+        entry, _ = self._find(text, profile)
+        metrics.cache_requests_total.inc(cache="pronunciation", result="hit" if entry else "miss")
+        return entry
+
+    def read(self, text: str) -> Optional[Tuple[dict, bytes]]:
+        """返回单词的 (条目, 音频数据); 数据直接从映射中切出。"""
+        entry, mapped = self._find(text)
+        if entry is None:
+            return None
+        return entry, mapped[entry["offset"]:entry["offset"] + entry["length"]]
+
+    def url_for(self, entry: dict) -> str:
+        return f"/api/tts/words/{quote(entry['word'])}?v={entry['hash']}"
+
+    def status(self) -> dict:
+        self._refresh()
+        state = self._state
+        meta = state[2] if state else {}
+        return {
+            "path": self.path,
+            "loaded": state is not None,
+            "words": len(state[1]) if state else 0,
+            "bytes": self._identity[2] if state else 0,
+            "engine": meta.get("engine"),
+            "voice": meta.get("voice"),
+            "language": meta.get("language"),
+            "built_at": meta.get("built_at"),
+        }
+
+
+def read_pack(path: str) -> Tuple[dict, Dict[str, list], mmap.mmap]:
+    """打开发音包, 返回 (元数据, 索引 {word: [offset, length, format, hash]}, mmap)。"""
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(mapped) < _HEADER.size:
+        raise ValueError("文件过短")
+    magic, version, index_offset, index_length = _HEADER.unpack_from(mapped, 0)
+    if magic != PACK_MAGIC or version != PACK_VERSION:
+        raise ValueError("不是发音包或格式版本不受支持")
+    if index_offset + index_length > len(mapped):
+        raise ValueError("索引超出文件范围(文件可能被截断)")
+    data = json.loads(mapped[index_offset:index_offset + index_length])
+    return data["meta"], data["words"], mapped
+
+
+def build_pack(
+    path: str,
+    words: List[str],
+    synthesize: Callable[[str], Optional[Tuple[bytes, str]]],
+    profile: dict,
+    workers: int = 4,
+    rebuild: bool = False,
+    limit: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> dict:
+    """构建或增量更新发音包。
+
+    profile 为当前的 {engine, voice, language}: 已有发音包的音色与之相同且未指定 rebuild 时,
+    保留其中全部单词的音频, 只合成新增的单词(按 words 的顺序, 最多 limit 个)。
+    synthesize(word) 返回 (音频数据, 格式扩展名), 失败时返回 None。
+    先写临时文件再原子替换, 正在运行的服务进程不会读到半个文件。
+    """
+    started = time.monotonic()
+    existing: Dict[str, list] = {}
+    old_map = None
+    if not rebuild and os.path.exists(path):
+        try:
+            meta, existing, old_map = read_pack(path)
+        except (OSError, ValueError) as e:
+            print(f"已有发音包无法读取, 将完整重建: {e}")
+            existing = {}
+        else:
+            if any(meta.get(key) != profile.get(key) for key in ("engine", "voice", "language")):
+                print(f"已有发音包的音色为 {meta.get('engine')} / {meta.get('voice')}, 与当前不同, 将完整重建")
+                existing = {}
+
+    pending = list(dict.fromkeys(word for word in words if word not in existing))[:limit]
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    index: Dict[str, list] = {}
+    failed = 0
+    try:
+        with open(tmp_path, "wb") as out:
+            out.write(b"\0" * _HEADER.size)
+
+            def append(word: str, audio, fmt: str, digest: str) -> None:
+                index[word] = [out.tell(), len(audio), fmt, digest]
+                out.write(audio)
+
+            for word, (offset, length, fmt, digest) in existing.items():
+                append(word, old_map[offset:offset + length], fmt, digest)
+
+            # 合成在线程池中并行, 写入只在当前线程按完成顺序进行
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                futures = {pool.submit(synthesize, word): word for word in pending}
+                for done, future in enumerate(as_completed(futures), 1):
+                    word = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"合成 {word!r} 时出错: {e}")
+                        result = None
+                    if result is None:
+                        failed += 1
+                    else:
+                        audio, fmt = result
+                        append(word, audio, fmt, hashlib.sha1(audio).hexdigest()[:12])
+                    if progress:
+                        progress(done, len(pending))
+
+            meta = {**profile, "built_at": time.strftime("%Y-%m-%dT%H:%M:%S%z")}
+            payload = json.dumps({"meta": meta, "words": index}, ensure_ascii=False).encode("utf-8")
+            index_offset = out.tell()
+            out.write(payload)
+            out.seek(0)
+            out.write(_HEADER.pack(PACK_MAGIC, PACK_VERSION, index_offset, len(payload)))
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if old_map is not None:
+            old_map.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return {
+        "path": path,
+        "words": len(index),
+        "kept": len(existing),
+        "added": len(pending) - failed,
+        "failed": failed,
+        "bytes": os.path.getsize(path),
+        "seconds": round(time.monotonic() - started, 2),
+    }
+
+
+pronunciation_pack = PronunciationPack(settings.PRONUNCIATION_PACK_PATH)
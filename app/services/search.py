@@ -0,0 +1,249 @@
+import html
+import re
+import time
+from typing import Dict, List, Optional, Sequence
+
+from app.core.config import settings
+from app.models.database import FTS_TABLES, get_db_connection
+
+# 每种结果: 源表、返回的标题列、额外字段、生成摘要的列(按顺序取第一个有命中的列)、
+# bm25 列权重(与 FTS_TABLES 的列顺序一致)
+SEARCH_TYPES = {
+    "course": {
+        "table": "courses",
+        "title": "title",
+        "extra": [],
+        "snippet": ["description", "title"],
+        "weights": (10.0, 1.0),
+    },
+    "lesson": {
+        "table": "lessons",
+        "title": "title",
+        "extra": ["course_id"],
+        "snippet": ["content", "title"],
+        "weights": (5.0, 1.0),
+    },
+    "vocabulary": {
+        "table": "vocabulary",
+        "title": "word",
+        "extra": ["context_sentence"],
+        "snippet": ["definition", "context_sentence", "word"],
+        "weights": (10.0, 1.0, 2.0),
+    },
+}
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+SNIPPET_CHARS = 160
+
+
+def build_match_query(query: str, prefix: bool = True) -> Optional[str]:
+    """把用户输入转换为安全的 FTS5 MATCH 表达式。
+
+    用双引号包住的输入按短语匹配; 否则每个词都必须出现(AND),
+    最后一个词(至少两个字符)按前缀匹配(边输入边搜索)。返回 None 表示没有可搜索的词。
+    """
+    query = (query or "").strip()
+    phrase = len(query) > 1 and query.startswith('"') and query.endswith('"')
+    tokens = _TOKEN_RE.findall(query)
+    if not tokens:
+        return None
+    if phrase:
+        return '"' + " ".join(tokens) + '"'
+    terms = [f'"{token}"' for token in tokens]
+    if prefix and len(tokens[-1]) >= 2:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def _highlight_pattern(query: str, prefix: bool = True) -> Optional[re.Pattern]:
+    tokens = _TOKEN_RE.findall(query or "")
+    if not tokens:
+        return None
+    terms = [re.escape(token) for token in tokens]
+    if prefix and len(tokens[-1]) >= 2:
+        terms[-1] += r"\w*"
+    return re.compile(r"(?<!\w)(?:" + "|".join(terms) + r")(?!\w)", re.I)
+
+
+def make_snippet(text: str, pattern: re.Pattern, width: int = SNIPPET_CHARS) -> Optional[str]:
+    """截取第一个命中词附近的一段文本, HTML 转义后用 <mark> 标出命中词。没有命中返回 None。"""
+    first = pattern.search(text or "")
+    if first is None:
+        return None
+    start = max(0, first.start() - width // 3)
+    end = min(len(text), start + width)
+    # 对齐到空白, 不截断单词
+    if start > 0:
+        space = text.find(" ", start, first.start())
+        start = space + 1 if space != -1 else start
+    if end < len(text):
+        space = text.rfind(" ", first.end(), end)
+        end = space if space != -1 else end
+    window = text[start:end]
+
+    parts = []
+    last = 0
+    for match in pattern.finditer(window):
+        parts.append(html.escape(window[last:match.start()]))
+        parts.append(f"<mark>{html.escape(match.group())}</mark>")
+        last = match.end()
+    parts.append(html.escape(window[last:]))
+    snippet = " ".join("".join(parts).split())
+    return ("…" if start > 0 else "") + snippet + ("…" if end < len(text) else "")
+
+
+class SearchService:
+    """基于 SQLite FTS5 的课程 / 课时 / 词汇全文搜索, 按 bm25 排序。
+
+    每种类型只取前 offset+limit 条 (rowid, 得分) 后合并分页, 再只为当前页的结果读取字段、
+    生成摘要。bm25 需要为每个匹配文档打分, 匹配数超过 max_ranked 的宽泛查询只在最新的
+    max_ranked 个匹配中排序, 匹配数也只计到 max_ranked(结果标记 approximate),
+    以保证搜索耗时有上界。
+    """
+
+    def __init__(self, max_ranked: int):
+        self.max_ranked = max_ranked
+
+    def _rank(self, conn, kind: str, match: str, k: int):
+        """返回 (前 k 条 [(得分, 类型, id)], 匹配数, 是否只在部分匹配中排序)。
+
+        每条语句都要重新执行一次 MATCH(前缀、短语查询尤其昂贵), 因此先用一条只按 rowid
+        顺序读取的语句同时得到匹配数和排序范围, 再只对范围内的文档计算 bm25。
+        """
+        table = SEARCH_TYPES[kind]["table"]
+        weights = ", ".join(str(w) for w in SEARCH_TYPES[kind]["weights"])
+        where = f"{table}_fts MATCH ?"
+        params: list = [match]
+        if self.max_ranked:
+            newest = conn.execute(
+                f"SELECT rowid FROM {table}_fts WHERE {where} ORDER BY rowid DESC LIMIT ?",
+                (match, self.max_ranked + 1),
+            ).fetchall()
+            approximate = len(newest) > self.max_ranked
+            count = min(len(newest), self.max_ranked)
+            if not count:
+                return [], 0, False
+            if approximate:
+                # rowid 范围条件由 FTS5 直接下推, 只为范围内的文档计算 bm25
+                where += " AND rowid >= ?"
+                params.append(newest[count - 1][0])
+        else:
+            count = conn.execute(f"SELECT COUNT(*) FROM {table}_fts WHERE {where}", params).fetchone()[0]
+            approximate = False
+            if not count:
+                return [], 0, False
+        rows = conn.execute(
+            f"SELECT rowid AS id, bm25({table}_fts, {weights}) AS rank FROM {table}_fts WHERE {where} ORDER BY rank LIMIT ?",
+            (*params, k),
+        ).fetchall()
+        return [(row["rank"], kind, row["id"]) for row in rows], count, approximate
+
+    def _details(self, conn, kind: str, ids: List[int], pattern: Optional[re.Pattern]) -> Dict[int, dict]:
+        """读取当前页结果的字段并生成摘要。
+
+        摘要在 Python 中生成而不用 FTS5 的 snippet(): 后者每行都要重新执行一次 MATCH,
+        前缀查询每次都要重新合并整个倒排列表, 代价与匹配文档总数成正比。
+        """
+        spec = SEARCH_TYPES[kind]
+        columns = list(dict.fromkeys([spec["title"], *spec["extra"], *spec["snippet"]]))
+        placeholders = ", ".join("?" for _ in ids)
+        rows = conn.execute(
+            f"SELECT id, {', '.join(columns)} FROM {spec['table']} WHERE id IN ({placeholders})",
+            ids,
+        ).fetchall()
+        details = {}
+        for row in rows:
+            snippet = None
+            if pattern is not None:
+                for column in spec["snippet"]:
+                    snippet = make_snippet(row[column], pattern)
+                    if snippet:
+                        break
+            item = {"id": row["id"], "title": row[spec["title"]]}
+            item.update({column: row[column] for column in spec["extra"]})
+            item["snippet"] = snippet
+            details[row["id"]] = item
+        return details
+
+    def search(
+        self,
+        query: str,
+        types: Optional[Sequence[str]] = None,
+        limit: int = 20,
+        offset: int = 0,
+        prefix: bool = True,
+    ) -> dict:
+        started = time.perf_counter()
+        kinds = [kind for kind in (types or SEARCH_TYPES) if kind in SEARCH_TYPES]
+        match = build_match_query(query, prefix=prefix)
+        result = {"query": query, "total": 0, "counts": {}, "approximate": False, "results": [], "next_offset": None}
+        if not match or not kinds:
+            result["took_ms"] = (time.perf_counter() - started) * 1000
+            return result
+
+        conn = get_db_connection()
+        try:
+            counts = {}
+            ranked = []
+            approximate = False
+            for kind in kinds:
+                rows, counts[kind], capped = self._rank(conn, kind, match, offset + limit)
+                ranked.extend(rows)
+                approximate = approximate or capped
+            ranked.sort()
+            ranked = ranked[offset:offset + limit]
+
+            pattern = _highlight_pattern(query, prefix=prefix)
+            details: Dict[str, Dict[int, dict]] = {}
+            for kind in kinds:
+                ids = [row_id for _, row_kind, row_id in ranked if row_kind == kind]
+                if ids:
+                    details[kind] = self._details(conn, kind, ids, pattern)
+        finally:
+            conn.close()
+
+        total = sum(counts.values())
+        results = []
+        for rank, kind, row_id in ranked:
+            item = details.get(kind, {}).get(row_id)
+            if item is None:
+                continue
+            results.append({"type": kind, "rank": rank, **item})
+
+        result.update(
+            total=total,
+            counts=counts,
+            results=results,
+            approximate=approximate,
+            next_offset=offset + limit if offset + limit < total else None,
+            took_ms=(time.perf_counter() - started) * 1000,
+        )
+        return result
+
+    def rebuild(self, optimize: bool = True) -> Dict[str, int]:
+        """从源表重建全部全文索引(用于迁移前的数据或索引损坏), 返回各表的文档数。"""
+        conn = get_db_connection()
+        try:
+            counts = {}
+            for table in FTS_TABLES:
+                conn.execute(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild')")
+                counts[table] = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            conn.commit()
+        finally:
+            conn.close()
+        if optimize:
+            self.optimize()
+        return counts
+
+    def optimize(self) -> None:
+        """把索引的各个段合并为一个。大批量导入后执行, 查询时不必再逐段合并倒排列表。"""
+        conn = get_db_connection()
+        try:
+            for table in FTS_TABLES:
+                conn.execute(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('optimize')")
+            conn.commit()
+        finally:
+            conn.close()
+
+
+search_service = SearchService(max_ranked=settings.SEARCH_MAX_RANKED)
@@ -0,0 +1,118 @@
+import re
+from typing import List, Tuple
+
+# 句末标点(可带收尾引号/括号), 其后为空白或行尾
+_BOUNDARY_RE = re.compile(r"[.!?。！？]+[\"'”’)\]]*(?=\s|$)")
+# 下一句的开头: 大写字母、数字、引号或中文
+_SENTENCE_START_RE = re.compile(r"\s+[\"'“‘(\[]?[A-Z0-9一-鿿]")
+_ABBREVIATIONS = {
+    "mr.", "mrs.", "ms.", "dr.", "prof.", "sr.", "jr.", "st.", "vs.", "etc.",
+    "e.g.", "i.e.", "u.s.", "u.k.", "no.", "fig.", "approx.", "inc.", "ltd.",
+}
+# 朗读前需要去掉的 Markdown 标记
+_MARKDOWN_PREFIX_RE = re.compile(r"^\s*(?:#{1,6}\s+|[-*+]\s+|>\s*|\d+\.\s+)")
+_MARKDOWN_INLINE_RE = re.compile(r"(\*\*|__|`)")
+
+
+def _ends_with_abbreviation(text: str) -> bool:
+    words = text.rsplit(None, 1)
+    return bool(words) and words[-1].lower() in _ABBREVIATIONS
+
+
+def sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """把文本切分为句子, 返回每句在原文中的 (start, end) 字符偏移。
+
+    句子不会跨越换行(标题、列表项各自成句), 常见缩写(Mr. / e.g.)不会被当作句末。
+    """
+    spans: List[Tuple[int, int]] = []
+    for line in re.finditer(r"[^\n]+", text):
+        base = line.start()
+        content = line.group()
+        start = 0
+        for match in _BOUNDARY_RE.finditer(content):
+            end = match.end()
+            if _ends_with_abbreviation(content[start:end]):
+                continue
+            if end < len(content) and not _SENTENCE_START_RE.match(content, end):
+                continue
+            spans.append((base + start, base + end))
+            start = end
+        spans.append((base + start, base + len(content)))
+
+    trimmed = []
+    for start, end in spans:
+        segment = text[start:end]
+        stripped = segment.strip()
+        if not stripped:
+            continue
+        lead = len(segment) - len(segment.lstrip())
+        trimmed.append((start + lead, start + lead + len(stripped)))
+    return trimmed
+
+
+def clean_for_speech(sentence: str) -> str:
+    """去掉 Markdown 标记, 得到适合朗读的纯文本。"""
+    sentence = _MARKDOWN_PREFIX_RE.sub("", sentence)
+    sentence = _MARKDOWN_INLINE_RE.sub("", sentence)
+    return re.sub(r"\s+", " ", sentence).strip()
+
+
+def split_sentences(text: str) -> List[str]:
+    """返回可直接朗读的句子列表(已去除 Markdown 标记与空句)。"""
+    sentences = []
+    for start, end in sentence_spans(text):
+        spoken = clean_for_speech(text[start:end])
+        if spoken:
+            sentences.append(spoken)
+    return sentences
+
+
+_HEADING_RE = re.compile(r"[ \t]*#{1,6}\s+(.+?)\s*#*\s*$", re.M)
+
+
+def segment_document(text: str) -> dict:
+    """把课时正文切分为 章节 -> 段落 -> 句子, 并保留每句在原文中的字符偏移。
+
+    Markdown 标题开启新章节(标题之前的内容属于无标题的第 0 节), 换行开启新段落。
+    返回 {"sections": [...], "sentences": [...]}, 句子的 text 为可朗读的纯文本,
+    与 split_sentences(text) 的结果一一对应。
+    """
+    sections: List[dict] = []
+    sentences: List[dict] = []
+    paragraph_index = -1
+    previous_end = None
+
+    for start, end in sentence_spans(text):
+        spoken = clean_for_speech(text[start:end])
+        if not spoken:
+            continue
+
+        line_start = text.rfind("\n", 0, start) + 1
+        new_line = previous_end is None or "\n" in text[previous_end:start]
+        heading = _HEADING_RE.match(text, line_start) if new_line and not text[line_start:start].strip() else None
+        if heading or not sections:
+            sections.append({
+                "index": len(sections),
+                "title": clean_for_speech(heading.group(1)) if heading else None,
+                "start": start,
+                "end": end,
+                "first_position": len(sentences),
+                "sentence_count": 0,
+            })
+        if new_line:
+            paragraph_index += 1
+
+        section = sections[-1]
+        section["end"] = end
+        section["sentence_count"] += 1
+        sentences.append({
+            "position": len(sentences),
+            "section_index": section["index"],
+            "paragraph_index": paragraph_index,
+            "start": start,
+            "end": end,
+            "text": spoken,
+        })
+        previous_end = end
+
+    return {"sections": sections, "sentences": sentences}
@@ -1,12 +1,219 @@
+import asyncio
+import importlib.util
+import io
 import os
+import subprocess
+import threading
+import time
 import uuid
-import torch
+import wave
+from typing import AsyncIterator, Dict, Optional, Tuple
+from app.core import metrics
 from app.core.config import settings
+from app.core.executors import run_in
+from app.services.audio_cache import audio_cache
+from app.services.audio_storage import audio_storage
+from app.services.inference_client import InferenceClient, InferenceError, inference_client
+from app.services.segmentation import split_sentences
 
 try:
-    from TTS.api import TTS
+    import edge_tts
 except ImportError:
-    TTS = None
+    edge_tts = None
+
+# edge-tts 默认输出 24kHz / 48kbps 单声道 MP3, 按文件大小估算时长
+EDGE_TTS_BITRATE = 48000
+
+
+def _audio_duration(path: str) -> Optional[float]:
+    """音频时长(秒): WAV 读取文件头, MP3 按码率估算; 文件不可读时返回 None。"""
+    try:
+        if path.endswith(".wav"):
+            with wave.open(path, "rb") as wav_file:
+                return wav_file.getnframes() / wav_file.getframerate()
+        return os.path.getsize(path) * 8 / EDGE_TTS_BITRATE
+    except (OSError, EOFError, wave.Error):
+        return None
+
+
+class XTTSEngine:
+    """直接调用 XTTS 模型推理, 替代每次请求都走 TTS.tts_to_file。
+
+    - 每个音色的条件隐变量(gpt_cond_latent / speaker_embedding)只计算一次并缓存
+    - 推理在 torch.inference_mode 下进行, CPU 线程数可配置
+    - 返回内存中的 WAV 数据, 由调用方决定如何存储
+    - 记录每次合成的实时率(RTF = 合成耗时 / 音频时长, 小于 1 表示快于实时)
+    - 推理串行进行: GPT 生成前会把前缀嵌入保存在共享的模型上, 并发合成会互相覆盖条件, 产生错误的音频
+    """
+
+    def __init__(self, api, device: str, inference_lock: Optional[threading.Lock] = None):
+        import torch
+
+        self.torch = torch
+        self.device = device
+        self.model = api.synthesizer.tts_model
+        self.config = self.model.config
+        self.sample_rate = self.config.audio.output_sample_rate
+        self._latents: Dict[str, Tuple] = {}
+        self._latents_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        # 与 tts_to_file 回退路径共用同一把锁(见 TTSService.model_lock)
+        self._inference_lock = inference_lock or threading.Lock()
+        self.syntheses = 0
+        self.audio_seconds = 0.0
+        self.compute_seconds = 0.0
+        self.last_rtf = None
+        self._configure_threads()
+
+    def _configure_threads(self) -> None:
+        if self.device != "cpu":
+            return
+        if settings.TTS_TORCH_THREADS > 0:
+            self.torch.set_num_threads(settings.TTS_TORCH_THREADS)
+        if settings.TTS_TORCH_INTEROP_THREADS > 0:
+            try:
+                self.torch.set_num_interop_threads(settings.TTS_TORCH_INTEROP_THREADS)
+            except RuntimeError:
+                # 只能在首次并行计算之前设置一次
+                print("torch interop 线程数已被设置过, 忽略 TTS_TORCH_INTEROP_THREADS")
+        print(f"XTTS CPU 线程数: {self.torch.get_num_threads()}")
+
+    def conditioning_latents(self, speaker: str) -> Tuple:
+        """返回音色的条件隐变量: 内置音色直接读取, 参考音频(wav 路径)计算一次后缓存。"""
+        latents = self._latents.get(speaker)
+        if latents is not None:
+            return latents
+        with self._latents_lock:
+            latents = self._latents.get(speaker)
+            if latents is not None:
+                return latents
+            speaker_manager = getattr(self.model, "speaker_manager", None)
+            if speaker_manager is not None and speaker in speaker_manager.speakers:
+                entry = speaker_manager.speakers[speaker]
+                latents = (entry["gpt_cond_latent"], entry["speaker_embedding"])
+            elif os.path.exists(speaker):
+                with self._inference_lock, self.torch.inference_mode():
+                    latents = self.model.get_conditioning_latents(audio_path=[speaker])
+            else:
+                raise ValueError(f"未知的 XTTS 音色: {speaker}")
+            self._latents[speaker] = latents
+            return latents
+
+    def synthesize(self, text: str, speaker: str, language: str) -> dict:
+        """合成一段文本, 返回 {audio(WAV 字节), sample_rate, duration, seconds, rtf}。"""
+        import numpy as np
+
+        gpt_cond_latent, speaker_embedding = self.conditioning_latents(speaker)
+        chunks = []
+        with self._inference_lock, self.torch.inference_mode():
+            # 耗时从取得锁后开始计算, 排队等待不计入 RTF
+            started = time.perf_counter()
+            # XTTS 对单次输入长度有限制, 按句分别推理后拼接
+            for sentence in split_sentences(text) or [text]:
+                output = self.model.inference(
+                    sentence,
+                    language,
+                    gpt_cond_latent,
+                    speaker_embedding,
+                    temperature=getattr(self.config, "temperature", 0.75),
+                    length_penalty=getattr(self.config, "length_penalty", 1.0),
+                    repetition_penalty=getattr(self.config, "repetition_penalty", 10.0),
+                    top_k=getattr(self.config, "top_k", 50),
+                    top_p=getattr(self.config, "top_p", 0.85),
+                )
+                wav = output["wav"]
+                if hasattr(wav, "cpu"):
+                    wav = wav.cpu().numpy()
+                chunks.append(np.asarray(wav, dtype=np.float32).reshape(-1))
+            seconds = time.perf_counter() - started
+
+        samples = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+        pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(self.sample_rate)
+            wav_file.writeframes(pcm.tobytes())
+
+        duration = len(pcm) / self.sample_rate
+        rtf = seconds / duration if duration else None
+        with self._stats_lock:
+            self.syntheses += 1
+            self.audio_seconds += duration
+            self.compute_seconds += seconds
+            self.last_rtf = rtf
+        print(f"XTTS 合成 {duration:.2f}s 音频, 耗时 {seconds:.2f}s, RTF {rtf if rtf is None else round(rtf, 3)}")
+        return {
+            "audio": buffer.getvalue(),
+            "sample_rate": self.sample_rate,
+            "duration": duration,
+            "seconds": seconds,
+            "rtf": rtf,
+        }
+
+    def warm_up(self, speaker: str, language: str) -> None:
+        """加载后先合成一句, 让首个真实请求不必承担初始化开销。"""
+        try:
+            result = self.synthesize(settings.TTS_WARMUP_TEXT, speaker, language)
+            print(f"XTTS 预热完成, RTF {result['rtf']}")
+        except Exception as e:
+            print(f"XTTS 预热失败: {e}")
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "syntheses": self.syntheses,
+                "cached_speakers": len(self._latents),
+                "audio_seconds": self.audio_seconds,
+                "compute_seconds": self.compute_seconds,
+                "rtf_avg": self.compute_seconds / self.audio_seconds if self.audio_seconds else None,
+                "rtf_last": self.last_rtf,
+                "threads": self.torch.get_num_threads() if self.device == "cpu" else None,
+            }
+
+
+class RemoteXTTSEngine:
+    """INFERENCE_MODE=remote 时代替 XTTSEngine: 由推理服务器合成, 返回同样格式的结果。"""
+
+    def __init__(self, client: InferenceClient):
+        self.client = client
+        self._stats_lock = threading.Lock()
+        self.syntheses = 0
+        self.audio_seconds = 0.0
+        self.compute_seconds = 0.0
+        self.last_rtf = None
+
+    def synthesize(self, text: str, speaker: str, language: str) -> dict:
+        audio, headers = self.client.post_bytes(
+            "/tts/synthesize", {"text": text, "speaker": speaker, "language": language}
+        )
+        duration = float(headers.get("X-Duration") or 0)
+        seconds = float(headers.get("X-Synthesis-Seconds") or 0)
+        rtf = seconds / duration if duration else None
+        with self._stats_lock:
+            self.syntheses += 1
+            self.audio_seconds += duration
+            self.compute_seconds += seconds
+            self.last_rtf = rtf
+        return {
+            "audio": audio,
+            "sample_rate": int(headers.get("X-Sample-Rate") or 0),
+            "duration": duration,
+            "seconds": seconds,
+            "rtf": rtf,
+        }
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "syntheses": self.syntheses,
+                "audio_seconds": self.audio_seconds,
+                "compute_seconds": self.compute_seconds,
+                "rtf_avg": self.compute_seconds / self.audio_seconds if self.audio_seconds else None,
+                "rtf_last": self.last_rtf,
+                "server": self.client.url,
+            }
 
 
 class TTSService:
@@ -19,14 +226,30 @@ class TTSService:
         return cls._instance
 
     def __init__(self):
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        if torch.backends.mps.is_available():
-            self.device = "mps"
-
-        print(f"正在设备上初始化 TTS: {self.device}")
+        # torch 与 Coqui TTS 在首次使用时才导入, 避免拖慢 API 启动
+        self.device = None
         self.model_name = "tts_models/multilingual/multi-dataset/xtts_v2"
         self.local_model_dir = settings.TTS_MODEL_PATH
         self.tts = None
+        self.xtts: Optional[XTTSEngine] = None
+        self._load_lock = threading.Lock()
+        # 同一个 XTTS 模型同一时间只能做一次合成, XTTSEngine 与 tts_to_file 回退路径共用
+        self.model_lock = threading.Lock()
+        self.load_state = "not_loaded"  # not_loaded / loading / ready / failed
+        self.load_seconds = None
+        self.load_error = None
+        # (事件循环, 信号量): 在循环中首次使用时创建, 见 _edge_limit
+        self._edge_semaphore: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+
+    def _edge_limit(self) -> asyncio.Semaphore:
+        """同时运行的 edge-tts 合成数上限(EDGE_TTS_MAX_CONCURRENCY)。
+
+        导入模块时还没有事件循环, 因此在循环中首次使用时才创建; 脚本多次 asyncio.run 时按循环重新创建。
+        """
+        loop = asyncio.get_running_loop()
+        if self._edge_semaphore is None or self._edge_semaphore[0] is not loop:
+            self._edge_semaphore = (loop, asyncio.Semaphore(settings.EDGE_TTS_MAX_CONCURRENCY))
+        return self._edge_semaphore[1]
 
     def _local_files(self):
         return {
@@ -44,15 +267,55 @@ class TTSService:
         required_keys = ["config", "model", "speakers", "dvae", "mel_stats", "vocab"]
         return all(os.path.exists(files[key]) for key in required_keys)
 
+    def ensure_loaded(self) -> bool:
+        """加载 TTS 引擎(若尚未加载), 返回是否有可用引擎。"""
+        if self.tts:
+            return True
+        with self._load_lock:
+            if self.tts:
+                return True
+            self.load_state = "loading"
+            started = time.monotonic()
+            self._load_model()
+            self.load_seconds = time.monotonic() - started
+            self.load_state = "ready" if self.tts else "failed"
+            return bool(self.tts)
+
+    def status(self) -> dict:
+        return {
+            "state": self.load_state,
+            "engine": self.engine if self.tts else None,
+            "device": self.device,
+            "load_seconds": self.load_seconds,
+            "error": self.load_error,
+            "xtts": self.xtts.stats() if self.xtts else None,
+        }
+
     def _load_model(self):
         if self.tts:
             return
 
+        if settings.INFERENCE_MODE == "remote":
+            self._connect_server()
+            return
+
+        try:
+            from TTS.api import TTS
+        except ImportError:
+            TTS = None
+
         if TTS is None:
             print("未安装 Coqui TTS。使用 Edge-TTS CLI 作为回退。")
             self.tts = "edge-tts"
             return
 
+        import torch
+
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        if torch.backends.mps.is_available():
+            self.device = "mps"
+        print(f"正在设备上初始化 TTS: {self.device}")
+
         if self._has_local_assets():
             files = self._local_files()
             print("检测到本地 XTTS 模型，尝试加载...")
@@ -67,6 +330,7 @@ class TTSService:
                     kwargs["language_ids_file"] = files["language_ids"]
                 self.tts = TTS(**kwargs).to(self.device)
                 print("已成功加载本地 TTS 模型。")
+                self._init_engine()
                 return
             except Exception as e:
                 print(f"加载本地 TTS 失败: {e}")
@@ -75,43 +339,285 @@ class TTSService:
         try:
             self.tts = TTS(self.model_name).to(self.device)
             print("通过模型名称加载 TTS 成功。")
+            self._init_engine()
         except Exception as e:
             print(f"加载 Coqui TTS 时出错: {e}")
             print("回退到 Edge-TTS CLI。")
             self.tts = "edge-tts"
 
-    def generate_audio(self, text: str, output_dir: str = "static/audio") -> str:
-        self._load_model()
+    def _connect_server(self):
+        """remote 模式: 请求推理服务器加载 XTTS; 服务器没有 XTTS 时本进程直接使用 Edge-TTS。
+
+        服务器不可达时记录错误并保持未加载, 下一次合成请求经 ensure_loaded 重新连接。
+        """
+        try:
+            status = inference_client.post_json("/tts/load", {})
+        except InferenceError as e:
+            print(f"推理服务器不可用, 下次请求时重试: {e}")
+            self.load_error = str(e)
+            return
+        self.load_error = None
+        if status.get("engine") == "xtts":
+            self.device = status.get("device")
+            self.xtts = RemoteXTTSEngine(inference_client)
+            self.tts = "remote-xtts"
+            print(f"使用推理服务器 {inference_client.url} 上的 XTTS。")
+        else:
+            print("推理服务器没有可用的 XTTS。使用 Edge-TTS CLI 作为回退。")
+            self.tts = "edge-tts"
+
+    def _init_engine(self):
+        """在已加载的模型上创建 XTTSEngine 并预热; 失败时保留 tts_to_file 路径。"""
+        try:
+            self.xtts = XTTSEngine(self.tts, self.device, self.model_lock)
+        except Exception as e:
+            print(f"初始化 XTTS 推理引擎失败, 使用 tts_to_file: {e}")
+            self.xtts = None
+            return
+        if settings.TTS_WARMUP:
+            self.xtts.warm_up(settings.TTS_XTTS_SPEAKER, settings.TTS_LANGUAGE)
+
+    @property
+    def engine(self) -> str:
+        return "edge-tts" if self.tts == "edge-tts" else "xtts"
+
+    def _voice_for(self, engine: str) -> str:
+        return settings.TTS_EDGE_VOICE if engine == "edge-tts" else settings.TTS_XTTS_SPEAKER
+
+    def _plan(self, text: str) -> dict:
+        engine = self.engine
+        voice = self._voice_for(engine)
+        language = settings.TTS_LANGUAGE
+        cache_key = audio_cache.make_key(text, engine, voice, language)
+        job = {
+            "text": text,
+            "engine": engine,
+            "voice": voice,
+            "language": language,
+            "cache_key": cache_key,
+        }
+        self._set_format(job, audio_storage.output_format(engine))
+        os.makedirs(os.path.dirname(job["output_path"]), exist_ok=True)
+        return job
+
+    @staticmethod
+    def _set_format(job: dict, ext: str) -> None:
+        job["filename"] = f"{job['cache_key']}.{ext}"
+        job["output_path"] = audio_cache.path_for(job["filename"])
+        # 先写临时文件再原子替换, 避免并发请求读到半个文件
+        job["tmp_path"] = f"{job['output_path']}.{uuid.uuid4().hex}.tmp.{ext}"
+
+    def _synthesize_job(self, job: dict) -> bool:
+        """把 job 的文本合成到 job["tmp_path"]。
+
+        XTTS 先输出 WAV, 再按 TTS_AUDIO_CODEC 转码; 转码失败时保留 WAV, 并相应修改 job 中的文件名。
+        """
+        text, engine, voice, language = job["text"], job["engine"], job["voice"], job["language"]
+        if engine == "edge-tts" or job["filename"].endswith(".wav"):
+            return self._synthesize_to_file(text, job["tmp_path"], engine, voice, language)
+
+        wav_path = f"{job['tmp_path']}.wav"
+        if not self._synthesize_to_file(text, wav_path, engine, voice, language):
+            if os.path.exists(wav_path):
+                os.remove(wav_path)
+            return False
+        if audio_storage.transcode(wav_path, job["tmp_path"]):
+            os.remove(wav_path)
+            return True
+        self._set_format(job, "wav")
+        os.replace(wav_path, job["tmp_path"])
+        return True
+
+    def _finish(self, job: dict, ok: bool, pin: bool = False) -> str:
+        if not ok:
+            if os.path.exists(job["tmp_path"]):
+                os.remove(job["tmp_path"])
+            return None
+        os.replace(job["tmp_path"], job["output_path"])
+
+        if settings.TTS_CACHE_ENABLED:
+            return audio_cache.store(
+                job["cache_key"], job["filename"], job["text"], job["engine"], job["voice"], job["language"],
+                pin=pin,
+            )
+        return audio_cache.url_for(job["filename"])
+
+    def generate_audio(self, text: str) -> str:
+        """同步生成音频(脚本与批处理使用), 返回音频 URL。"""
+        if not self.ensure_loaded():
+            return None
+
+        job = self._plan(text)
+        if settings.TTS_CACHE_ENABLED:
+            cached_url = audio_cache.lookup(job["cache_key"])
+            if cached_url:
+                return cached_url
+
+        return self._finish(job, self._synthesize_job(job))
+
+    def voice_profile(self) -> dict:
+        """当前使用的 {engine, voice, language}, 决定合成结果是否可以复用。"""
+        engine = self.engine
+        return {"engine": engine, "voice": self._voice_for(engine), "language": settings.TTS_LANGUAGE}
+
+    def expected_voice_profile(self) -> dict:
+        """不加载模型地给出 {engine, voice, language}: 已加载时即当前音色, 否则按配置推断将要使用的引擎。
+
+        本地模式安装了 Coqui TTS、或 remote 模式时推断为 XTTS; XTTS 加载失败回退到 edge-tts 时推断可能不准,
+        调用方需在加载后按 voice_profile() 复核。
+        """
+        if self.tts:
+            return self.voice_profile()
+        if settings.INFERENCE_MODE == "remote" or importlib.util.find_spec("TTS") is not None:
+            engine = "xtts"
+        else:
+            engine = "edge-tts"
+        return {"engine": engine, "voice": self._voice_for(engine), "language": settings.TTS_LANGUAGE}
+
+    def synthesize_bytes(self, text: str) -> Optional[Tuple[bytes, str]]:
+        """合成文本并直接返回 (音频数据, 格式扩展名), 不写入音频缓存(构建发音包使用)。"""
+        if not self.ensure_loaded():
+            return None
+        job = self._plan(text)
+        try:
+            if not self._synthesize_job(job):
+                return None
+            with open(job["tmp_path"], "rb") as f:
+                return f.read(), job["filename"].rsplit(".", 1)[1]
+        finally:
+            if os.path.exists(job["tmp_path"]):
+                os.remove(job["tmp_path"])
+
+    async def agenerate_audio(self, text: str, pin: bool = False) -> str:
+        """异步生成音频(API 使用), 不阻塞事件循环。
+
+        缓存查询走 db 线程池, XTTS 推理走 tts 线程池,
+        edge-tts 在事件循环内异步运行并受并发上限约束。
+        pin=True 时音频在缓存中固定, 不会被 LRU 淘汰。
+        """
+        if not self.tts and not await run_in("tts", self.ensure_loaded):
+            return None
+
+        job = self._plan(text)
+        if settings.TTS_CACHE_ENABLED:
+            cached_url = await run_in("db", audio_cache.lookup, job["cache_key"], pin)
+            if cached_url:
+                return cached_url
+
+        if job["engine"] == "edge-tts":
+            async with self._edge_limit():
+                started = time.perf_counter()
+                ok = await self._edge_tts_async(text, job["tmp_path"], job["voice"])
+                seconds = time.perf_counter() - started
+            metrics.record_timing("tts", seconds)
+            self._record_synthesis(job["engine"], seconds, ok, job["tmp_path"])
+        else:
+            ok = await run_in("tts", self._synthesize_job, job)
+        return await run_in("db", self._finish, job, ok, pin)
+
+    async def astream_audio(self, text: str) -> AsyncIterator[dict]:
+        """把长文本按句切分并行合成, 按原顺序逐句产出 {index, text, audio_url}。
+
+        第一句就绪即可产出, 其余句子在后台继续合成(并发数受 TTS_STREAM_CONCURRENCY 限制);
+        某句合成出错时该句的 audio_url 为 None 并带有 error, 不影响后续句子;
+        调用方提前停止迭代时, 尚未完成的合成任务会被取消并等待其结束。
+        """
+        sentences = split_sentences(text)
+        semaphore = asyncio.Semaphore(settings.TTS_STREAM_CONCURRENCY)
+
+        async def synthesize(sentence: str) -> Optional[str]:
+            async with semaphore:
+                return await self.agenerate_audio(sentence)
 
-        filename = f"{uuid.uuid4()}.wav"
-        output_path = os.path.join(settings.BASE_DIR, "app", output_dir, filename)
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        tasks = [asyncio.create_task(synthesize(sentence)) for sentence in sentences]
+        try:
+            for index, (sentence, task) in enumerate(zip(sentences, tasks)):
+                segment = {"index": index, "text": sentence, "audio_url": None}
+                try:
+                    segment["audio_url"] = await task
+                except Exception as e:
+                    print(f"流式合成第 {index} 句时出错: {e}")
+                    segment["error"] = str(e) or e.__class__.__name__
+                yield segment
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _edge_tts_async(self, text: str, output_path: str, voice: str) -> bool:
+        try:
+            if edge_tts is not None:
+                # 进程内调用, 省去每次启动 CLI 子进程的开销
+                await edge_tts.Communicate(text, voice).save(output_path)
+            else:
+                # 以 --text=... 传入, 以 "-" 开头的文本不会被当作选项
+                process = await asyncio.create_subprocess_exec(
+                    "edge-tts", "--voice", voice, f"--text={text}", "--write-media", output_path,
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+                _, stderr = await process.communicate()
+                if process.returncode != 0:
+                    print(f"Edge-TTS 错误: {stderr.decode(errors='ignore').strip()}")
+                    return False
+            return os.path.exists(output_path)
+        except Exception as e:
+            print(f"Edge-TTS 错误: {e}")
+            return False
+
+    def _record_synthesis(self, engine: str, seconds: float, ok: bool, path: str) -> None:
+        """按引擎记录合成次数、耗时、音频时长与实时率(RTF)。"""
+        metrics.tts_syntheses_total.inc(engine=engine, outcome="ok" if ok else "error")
+        if not ok:
+            return
+        metrics.tts_synthesis_seconds.observe(seconds, engine=engine)
+        duration = _audio_duration(path)
+        if duration:
+            metrics.tts_audio_seconds_total.inc(duration, engine=engine)
+            metrics.tts_real_time_factor.observe(seconds / duration, engine=engine)
+
+    def _synthesize_to_file(self, text: str, output_path: str, engine: str, voice: str, language: str) -> bool:
+        started = time.perf_counter()
+        ok = self._run_engine(text, output_path, engine, voice, language)
+        self._record_synthesis(engine, time.perf_counter() - started, ok, output_path)
+        return ok
 
-        if self.tts == "edge-tts":
+    def _run_engine(self, text: str, output_path: str, engine: str, voice: str, language: str) -> bool:
+        if engine == "edge-tts":
             try:
-                mp3_path = output_path.replace(".wav", ".mp3")
-                filename = filename.replace(".wav", ".mp3")
-                cmd = f'edge-tts --text "{text}" --write-media "{mp3_path}"'
-                os.system(cmd)
-                return f"/static/audio/{filename}"
+                result = subprocess.run(
+                    ["edge-tts", "--voice", voice, f"--text={text}", "--write-media", output_path],
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                )
+                if result.returncode != 0:
+                    print(f"Edge-TTS 错误: {result.stderr.decode(errors='ignore').strip()}")
+                    return False
+                return os.path.exists(output_path)
             except Exception as e:
                 print(f"Edge-TTS 错误: {e}")
-                return None
+                return False
 
-        if not self.tts:
-            return None
+        if self.xtts is not None:
+            try:
+                result = self.xtts.synthesize(text, voice, language)
+                with open(output_path, "wb") as f:
+                    f.write(result["audio"])
+                return True
+            except Exception as e:
+                print(f"生成音频时出错: {e}")
+                return False
 
         try:
-            self.tts.tts_to_file(
-                text=text,
-                file_path=output_path,
-                speaker="female-en-5",
-                language="en",
-            )
-            return f"/static/audio/{filename}"
+            self.tts_to_file(text, output_path, voice, language)
+            return True
         except Exception as e:
             print(f"生成音频时出错: {e}")
-            return None
+            return False
 
+    def tts_to_file(self, text: str, output_path: str, speaker: str, language: str) -> None:
+        """没有 XTTSEngine 时经 Coqui TTS.tts_to_file 合成, 与 XTTSEngine 一样串行使用模型。"""
+        with self.model_lock:
+            self.tts.tts_to_file(text=text, file_path=output_path, speaker=speaker, language=language)
 
 tts_service = TTSService.get_instance()
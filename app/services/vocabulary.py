@@ -0,0 +1,167 @@
+import re
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from app.models.database import get_db_connection
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_LOOKUP_BATCH = 500
+
+
+def _clean(text: Optional[str]) -> Optional[str]:
+    text = _WHITESPACE_RE.sub(" ", text or "").strip()
+    return text or None
+
+
+def _nocase(word: str) -> str:
+    """与 SQLite 的 NOCASE 排序规则一致: 只忽略 ASCII 字母的大小写。"""
+    return "".join(char.lower() if char.isascii() else char for char in word)
+
+
+class VocabularyStore:
+    """词汇表(生词本)的批量读写。
+
+    同一单词(不区分大小写)在同一例句下只保存一条, 由唯一索引
+    idx_vocabulary_word_context 保证; 批量保存在一个事务中用 executemany 写入。
+    """
+
+    def save_many(self, items: Iterable[dict]) -> dict:
+        """批量保存单词, 返回 {received, inserted, existing, invalid, ids}。
+
+        已存在的单词不会重复插入; 新提交的释义只补全原来没有释义的记录。
+        ids 与输入顺序对应, 缺少单词的条目为 None。
+        """
+        received = 0
+        rows: List[Tuple[str, Optional[str], Optional[str]]] = []
+        keys: List[Optional[Tuple[str, str]]] = []
+        for item in items:
+            received += 1
+            word = _clean(item.get("word"))
+            if not word:
+                keys.append(None)
+                continue
+            context = _clean(item.get("context_sentence"))
+            keys.append((_nocase(word), context or ""))
+            rows.append((word, context, _clean(item.get("definition"))))
+
+        conn = get_db_connection()
+        try:
+            # 先取得写锁再读取 MAX(id): 其他连接不能在读取与插入之间写入, 新增条数才准确
+            conn.execute("BEGIN IMMEDIATE")
+            last_id = conn.execute("SELECT IFNULL(MAX(id), 0) FROM vocabulary").fetchone()[0]
+            conn.executemany(
+                """
+                INSERT INTO vocabulary (word, context_sentence, definition) VALUES (?, ?, ?)
+                ON CONFLICT (word COLLATE NOCASE, IFNULL(context_sentence, '')) DO UPDATE SET
+                    definition = excluded.definition
+                WHERE excluded.definition IS NOT NULL AND vocabulary.definition IS NULL
+                """,
+                rows,
+            )
+            inserted = conn.execute("SELECT COUNT(*) FROM vocabulary WHERE id > ?", (last_id,)).fetchone()[0]
+            ids = self._lookup_ids(conn, rows)
+            conn.commit()
+        finally:
+            conn.close()
+
+        unique = {key for key in keys if key is not None}
+        return {
+            "received": received,
+            "inserted": inserted,
+            "existing": len(unique) - inserted,
+            "invalid": keys.count(None),
+            "ids": [ids.get(key) if key is not None else None for key in keys],
+        }
+
+    @staticmethod
+    def _lookup_ids(conn, rows: Sequence[tuple]) -> dict:
+        """按单词分批用 IN 查询 id, 再在内存中按 (单词, 例句) 匹配。"""
+        wanted = {(_nocase(word), context or "") for word, context, _ in rows}
+        words = list(dict.fromkeys(word for word, _ in wanted))
+        ids = {}
+        # 每条语句的参数个数受 SQLITE_MAX_VARIABLE_NUMBER 限制(旧版本为 999)
+        for start in range(0, len(words), _LOOKUP_BATCH):
+            batch = words[start:start + _LOOKUP_BATCH]
+            for row in conn.execute(
+                f"""
+                SELECT id, word, context_sentence FROM vocabulary
+                WHERE word COLLATE NOCASE IN ({", ".join("?" * len(batch))})
+                """,
+                batch,
+            ):
+                key = (_nocase(row["word"]), row["context_sentence"] or "")
+                if key in wanted:
+                    ids[key] = row["id"]
+        return ids
+
+    def list(self, after_id: int = 0, limit: int = 100, pending: Optional[bool] = None) -> dict:
+        """按 id 键集分页; pending=True 只返回尚无释义的单词, False 只返回已有释义的单词。"""
+        where = "id > ?"
+        if pending is True:
+            where += " AND definition IS NULL"
+        elif pending is False:
+            where += " AND definition IS NOT NULL"
+        conn = get_db_connection()
+        try:
+            rows = conn.execute(
+                f"""
+                SELECT id, word, context_sentence, definition, created_at
+                FROM vocabulary WHERE {where} ORDER BY id LIMIT ?
+                """,
+                (after_id, limit),
+            ).fetchall()
+        finally:
+            conn.close()
+        return {
+            "words": [dict(row) for row in rows],
+            "next_after_id": rows[-1]["id"] if len(rows) == limit else None,
+        }
+
+    def pending(self, limit: int, max_attempts: int) -> List[dict]:
+        """待释义的单词(按保存顺序), 跳过已尝试 max_attempts 次仍未成功的单词。"""
+        conn = get_db_connection()
+        try:
+            rows = conn.execute(
+                """
+                SELECT id, word, context_sentence FROM vocabulary
+                WHERE definition IS NULL AND define_attempts < ?
+                ORDER BY id LIMIT ?
+                """,
+                (max_attempts, limit),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [dict(row) for row in rows]
+
+    def pending_count(self, max_attempts: int) -> dict:
+        conn = get_db_connection()
+        try:
+            row = conn.execute(
+                """
+                SELECT COUNT(*) AS pending, IFNULL(SUM(define_attempts >= ?), 0) AS given_up
+                FROM vocabulary WHERE definition IS NULL
+                """,
+                (max_attempts,),
+            ).fetchone()
+        finally:
+            conn.close()
+        return {"pending": row["pending"] - row["given_up"], "given_up": row["given_up"]}
+
+    def save_definitions(self, definitions: Sequence[Tuple[int, str]], attempted: Sequence[int]) -> None:
+        """写回一批释义; attempted 中没有得到释义的单词尝试次数加一。"""
+        defined = {word_id for word_id, _ in definitions}
+        conn = get_db_connection()
+        try:
+            conn.executemany(
+                "UPDATE vocabulary SET definition = ? WHERE id = ? AND definition IS NULL",
+                [(definition, word_id) for word_id, definition in definitions],
+            )
+            conn.executemany(
+                "UPDATE vocabulary SET define_attempts = define_attempts + 1 WHERE id = ?",
+                [(word_id,) for word_id in attempted if word_id not in defined],
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+
+vocabulary_store = VocabularyStore()
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import re
+import time
+from typing import Dict, List
+
+from app.core.config import settings
+from app.core.executors import run_in
+from app.services.llm_scheduler import SchedulerError, llm_scheduler
+from app.services.llm_service import llm_service
+from app.services.vocabulary import vocabulary_store
+
+SYSTEM_PROMPT = "You are an English vocabulary tutor for Chinese-speaking learners. Reply with JSON only."
+_NUMBERED_LINE_RE = re.compile(r"^\s*(\d+)\s*[.)、:：]\s*(.+?)\s*$", re.M)
+
+
+def build_prompt(words: List[dict]) -> str:
+    """把一批单词放进同一个提示词, 要求按编号返回 JSON 数组。"""
+    lines = [
+        "Define each numbered English word or phrase below.",
+        "Use the meaning that fits its example sentence when one is given.",
+        "Each definition: one short sentence in simple English, then the Chinese translation in parentheses.",
+        'Answer with a JSON array in the same order, for example: [{"n": 1, "definition": "..."}]',
+        "",
+    ]
+    for number, word in enumerate(words, 1):
+        line = f"{number}. {word['word']}"
+        if word.get("context_sentence"):
+            line += f' | "{word["context_sentence"]}"'
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def parse_definitions(answer: str, words: List[dict]) -> Dict[int, str]:
+    """从模型回答中解析 {编号: 释义}, 编号从 1 开始。
+
+    优先解析 JSON 数组(元素为 {"n", "definition"} 或按顺序排列的字符串);
+    模型没有按格式输出时, 退回解析 "1. word: definition" 形式的编号行。
+    """
+    count = len(words)
+    definitions: Dict[int, str] = {}
+    start, end = answer.find("["), answer.rfind("]")
+    if start != -1 and end > start:
+        try:
+            items = json.loads(answer[start:end + 1])
+        except ValueError:
+            items = None
+        if isinstance(items, list):
+            for index, item in enumerate(items, 1):
+                if isinstance(item, dict):
+                    number, text = item.get("n", index), item.get("definition")
+                else:
+                    number, text = index, item
+                if isinstance(number, int) and 1 <= number <= count and isinstance(text, str) and text.strip():
+                    definitions[number] = text.strip()
+            if definitions:
+                return definitions
+
+    for match in _NUMBERED_LINE_RE.finditer(answer):
+        number = int(match.group(1))
+        if not 1 <= number <= count:
+            continue
+        text = match.group(2)
+        word = words[number - 1]["word"]
+        # 去掉行首重复的单词本身, 如 "1. negotiate: ..." / "1. negotiate - ..."
+        if text.lower().startswith(word.lower()):
+            text = text[len(word):].lstrip(" :：-—|")
+        if text:
+            definitions[number] = text
+    return definitions
+
+
+class VocabularyDefiner:
+    """在后台为尚无释义的单词批量生成释义。
+
+    每批 batch_size 个单词放进同一个结构化提示词, 一次模型调用得到整批释义,
+    200 个单词只需约 10 次调用; 请求以 low 优先级进入 LLM 调度队列, 不挤占交互请求。
+    没能解析出释义的单词累计尝试次数, 达到 max_attempts 后不再重试。
+    同一时间只运行一个任务, 重复触发时直接返回。
+    """
+
+    def __init__(self, batch_size: int, tokens_per_word: int, max_attempts: int):
+        self.batch_size = max(1, batch_size)
+        self.tokens_per_word = tokens_per_word
+        self.max_attempts = max(1, max_attempts)
+        self.running = False
+        self.batches = 0
+        self.defined = 0
+        self.failed = 0
+        self.last_error = None
+        self.last_run_seconds = None
+
+    def status(self) -> dict:
+        return {
+            "running": self.running,
+            "batch_size": self.batch_size,
+            "batches": self.batches,
+            "defined": self.defined,
+            "failed": self.failed,
+            "last_error": self.last_error,
+            "last_run_seconds": self.last_run_seconds,
+            **vocabulary_store.pending_count(self.max_attempts),
+        }
+
+    async def _define_batch(self, batch: List[dict]) -> int:
+        prompt = build_prompt(batch)
+        max_tokens = 32 + self.tokens_per_word * len(batch)
+        async with llm_scheduler.slot("low"):
+            answer = await run_in("llm", llm_service.chat, prompt, SYSTEM_PROMPT, use_cache=False, max_tokens=max_tokens)
+        definitions = parse_definitions(answer, batch)
+        results = [(word["id"], definitions[number]) for number, word in enumerate(batch, 1) if number in definitions]
+        if len(results) < len(batch):
+            self.last_error = f"{len(batch) - len(results)} 个单词未能从模型回答中解析出释义"
+        await run_in("db", vocabulary_store.save_definitions, results, [word["id"] for word in batch])
+        return len(results)
+
+    async def run(self) -> None:
+        """逐批处理待释义的单词, 直到没有剩余(或模型不可用)。"""
+        if self.running:
+            return
+        self.running = True
+        started = time.monotonic()
+        try:
+            if not await run_in("llm", llm_service.ensure_loaded):
+                self.last_error = "LLM 模型未加载"
+                return
+            self.last_error = None
+            while True:
+                batch = await run_in("db", vocabulary_store.pending, self.batch_size, self.max_attempts)
+                if not batch:
+                    break
+                try:
+                    defined = await self._define_batch(batch)
+                except SchedulerError as e:
+                    # 交互请求较多时稍后再试, 这批单词不计入失败次数
+                    await asyncio.sleep(e.retry_after)
+                    continue
+                except Exception as e:
+                    print(f"批量释义失败: {e}")
+                    self.last_error = str(e) or e.__class__.__name__
+                    await run_in("db", vocabulary_store.save_definitions, [], [word["id"] for word in batch])
+                    defined = 0
+                self.batches += 1
+                self.defined += defined
+                self.failed += len(batch) - defined
+        finally:
+            self.running = False
+            self.last_run_seconds = time.monotonic() - started
+
+
+vocabulary_definer = VocabularyDefiner(
+    batch_size=settings.VOCAB_DEFINE_BATCH_SIZE,
+    tokens_per_word=settings.VOCAB_DEFINE_TOKENS_PER_WORD,
+    max_attempts=settings.VOCAB_DEFINE_MAX_ATTEMPTS,
+)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark article extraction over a corpus of saved HTML pages.
+
+Each fixture ``<name>.html`` has a hand-checked ``<name>.expected.txt`` with the
+article paragraphs. For every parser backend the script reports throughput
+(pages/sec, MB/s) and extraction quality (token precision / recall / F1
+against the expected text). The previous BeautifulSoup extractor is included
+as a baseline when bs4 is installed.
+
+Usage:
+    python benchmarks/extraction_bench.py
+    python benchmarks/extraction_bench.py --iterations 50 --json
+    python benchmarks/extraction_bench.py --fixtures /path/to/saved/pages
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Tuple
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.services.extraction import BACKENDS, ArticleExtractor  # type: ignore # pylint: disable=wrong-import-position
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "extraction")
+# 中文按字计, 其他按单词计
+_TOKEN_RE = re.compile(r"[一-鿿]|[^\W一-鿿]+")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark HTML article extraction")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES, help="Directory with *.html and *.expected.txt")
+    parser.add_argument("--iterations", type=int, default=20, help="Passes over the corpus per backend")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    return parser.parse_args()
+
+
+def load_corpus(directory: str) -> List[Tuple[str, bytes, str]]:
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        name = os.path.basename(path)[: -len(".html")]
+        expected_path = os.path.join(directory, f"{name}.expected.txt")
+        expected = ""
+        if os.path.exists(expected_path):
+            with open(expected_path, "r", encoding="utf-8") as f:
+                expected = f.read()
+        with open(path, "rb") as f:
+            corpus.append((name, f.read(), expected))
+    return corpus
+
+
+def legacy_extract(html: bytes) -> dict:
+    """改造前 ContentService.fetch_url 的提取逻辑(BeautifulSoup + html.parser), 作为对照。"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    title = soup.title.string if soup.title else "无标题"
+    article = soup.find("article") or soup.find("main") or soup.body
+    paragraphs = [p.get_text().strip() for p in article.find_all("p") if p.get_text().strip()]
+    return {"title": title, "content": "\n\n".join(paragraphs)}
+
+
+def extractors() -> Dict[str, Callable[[bytes], dict]]:
+    available: Dict[str, Callable[[bytes], dict]] = {}
+    try:
+        import bs4  # noqa: F401  # pylint: disable=unused-import,import-outside-toplevel
+
+        available["legacy-bs4"] = legacy_extract
+    except ImportError:
+        pass
+    for backend in BACKENDS:
+        available[backend] = ArticleExtractor(backend).extract
+    return available
+
+
+def token_scores(extracted: str, expected: str) -> Dict[str, float]:
+    got = Counter(token.lower() for token in _TOKEN_RE.findall(extracted))
+    want = Counter(token.lower() for token in _TOKEN_RE.findall(expected))
+    overlap = sum((got & want).values())
+    precision = overlap / sum(got.values()) if got else 0.0
+    recall = overlap / sum(want.values()) if want else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"precision": precision, "recall": recall, "f1": f1}
+
+
+def run_backend(extract: Callable[[bytes], dict], corpus, iterations: int) -> dict:
+    pages = {}
+    for name, html, expected in corpus:
+        pages[name] = token_scores(extract(html)["content"], expected)
+
+    total_bytes = sum(len(html) for _, html, _ in corpus)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for _, html, _ in corpus:
+            extract(html)
+    elapsed = time.perf_counter() - started
+
+    count = len(corpus) * iterations
+    return {
+        "pages_per_sec": count / elapsed if elapsed else 0.0,
+        "mb_per_sec": total_bytes * iterations / elapsed / (1024 * 1024) if elapsed else 0.0,
+        "precision": sum(p["precision"] for p in pages.values()) / len(pages),
+        "recall": sum(p["recall"] for p in pages.values()) / len(pages),
+        "f1": sum(p["f1"] for p in pages.values()) / len(pages),
+        "pages": pages,
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    corpus = load_corpus(args.fixtures)
+    if not corpus:
+        print(f"No *.html fixtures found in {args.fixtures}")
+        sys.exit(2)
+
+    results = {name: run_backend(extract, corpus, args.iterations) for name, extract in extractors().items()}
+
+    if args.json:
+        print(json.dumps({"fixtures": len(corpus), "iterations": args.iterations, "backends": results}, indent=2))
+        return
+
+    total_kb = sum(len(html) for _, html, _ in corpus) / 1024
+    print(f"{len(corpus)} fixtures ({total_kb:.0f} KiB), {args.iterations} iterations\n")
+    print(f"{'backend':<14}{'pages/s':>10}{'MB/s':>8}{'precision':>11}{'recall':>8}{'F1':>7}")
+    for name, result in results.items():
+        print(
+            f"{name:<14}{result['pages_per_sec']:>10.1f}{result['mb_per_sec']:>8.2f}"
+            f"{result['precision']:>11.3f}{result['recall']:>8.3f}{result['f1']:>7.3f}"
+        )
+    print("\nPer-page F1:")
+    names = list(results)
+    print(f"{'fixture':<20}" + "".join(f"{name:>14}" for name in names))
+    for fixture, _, _ in corpus:
+        print(f"{fixture:<20}" + "".join(f"{results[name]['pages'][fixture]['f1']:>14.3f}" for name in names))
+
+
+if __name__ == "__main__":
+    main()
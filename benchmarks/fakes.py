@@ -0,0 +1,201 @@
+"""
+Offline stand-ins for the heavy dependencies, used by the benchmarks.
+
+- FakeLlama: replaces llama_cpp.Llama; generates tokens at a fixed rate.
+- FakeXTTS: replaces the XTTS engine; returns a short silent WAV after a fixed delay.
+- FixtureAdapter: a requests transport adapter that serves the saved HTML pages
+  in benchmarks/fixtures/extraction instead of going to the network.
+
+install_fakes() plugs them into the app's singleton services, so requests go
+through the real endpoints, scheduler, executors, caches and database.
+"""
+
+from __future__ import annotations
+
+import glob
+import io
+import os
+import threading
+import time
+import wave
+from typing import Dict, Iterator, List, Optional
+
+import requests
+from requests.adapters import BaseAdapter
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "extraction")
+FIXTURE_BASE_URL = "http://fixtures.bench/"
+
+
+class _TokenIds(list):
+    """模拟 Llama._input_ids(numpy 数组)的 tolist() 与切片。"""
+
+    def tolist(self) -> list:
+        return list(self)
+
+    def __getitem__(self, item):
+        result = super().__getitem__(item)
+        return _TokenIds(result) if isinstance(item, slice) else result
+
+
+class FakeLlama:
+    """按固定速度"生成" token 的 Llama 替身: 提示词按 prompt_tokens_per_sec 评估, 每个输出 token 耗时 1/tokens_per_sec。"""
+
+    def __init__(self, tokens_per_sec: float = 20.0, output_tokens: int = 64, prompt_tokens_per_sec: float = 500.0):
+        self.tokens_per_sec = tokens_per_sec
+        self.output_tokens = output_tokens
+        self.prompt_tokens_per_sec = prompt_tokens_per_sec
+        self._input_ids = _TokenIds()
+
+    def _prompt_tokens(self, messages: List[dict]) -> int:
+        # 粗略按 4 个字符一个 token 估算
+        return max(1, sum(len(message.get("content") or "") for message in messages) // 4)
+
+    def _tokens(self, max_tokens: Optional[int]) -> int:
+        return min(self.output_tokens, max_tokens or self.output_tokens)
+
+    def create_chat_completion(self, messages: List[dict], stream: bool = False, max_tokens: Optional[int] = None, **_):
+        prompt_tokens = self._prompt_tokens(messages)
+        count = self._tokens(max_tokens)
+        self._input_ids = _TokenIds(range(prompt_tokens + count))
+        time.sleep(prompt_tokens / self.prompt_tokens_per_sec)
+        if stream:
+            return self._stream(count)
+        time.sleep(count / self.tokens_per_sec)
+        return {
+            "choices": [{
+                "message": {"role": "assistant", "content": " ".join(["token"] * count)},
+                "finish_reason": self._finish_reason(count),
+            }],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": count},
+        }
+
+    def _finish_reason(self, count: int) -> str:
+        # 回答的"自然长度"为 output_tokens, 被 max_tokens 截断时与 llama.cpp 一样返回 length
+        return "stop" if count >= self.output_tokens else "length"
+
+    def _stream(self, count: int) -> Iterator[dict]:
+        for _ in range(count):
+            time.sleep(1 / self.tokens_per_sec)
+            yield {"choices": [{"delta": {"content": "token "}, "finish_reason": None}]}
+        yield {"choices": [{"delta": {}, "finish_reason": self._finish_reason(count)}]}
+
+
+def silent_wav(seconds: float, sample_rate: int = 24000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(b"\0\0" * int(seconds * sample_rate))
+    return buffer.getvalue()
+
+
+class FakeXTTS:
+    """XTTSEngine 的替身: 每次合成固定耗时 delay 秒。
+
+    同一时间只合成一句: 对应 XTTSEngine 的推理锁(共享模型上的条件状态不允许并发合成),
+    基准测试中的 TTS 吞吐因此与真实引擎一样受单个模型实例限制。
+    """
+
+    def __init__(self, delay: float = 0.3, audio_seconds: float = 0.5):
+        self.delay = delay
+        self.audio = silent_wav(audio_seconds)
+        self.audio_seconds = audio_seconds
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def synthesize(self, text: str, speaker: str, language: str) -> dict:
+        with self._lock:
+            time.sleep(self.delay)
+            self.calls += 1
+        return {
+            "audio": self.audio,
+            "sample_rate": 24000,
+            "duration": self.audio_seconds,
+            "seconds": self.delay,
+            "rtf": self.delay / self.audio_seconds,
+        }
+
+    def warm_up(self, speaker: str, language: str) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {"fake": True, "calls": self.calls, "delay": self.delay}
+
+
+def load_fixture_pages() -> Dict[str, bytes]:
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.html"))):
+        with open(path, "rb") as f:
+            pages[os.path.basename(path)[: -len(".html")]] = f.read()
+    return pages
+
+
+class FixtureAdapter(BaseAdapter):
+    """把 http://fixtures.bench/<name>?n=<k> 映射到样本网页 <name>.html。
+
+    同一页面带不同的 n 时在第一个段落末尾加入编号, 使每次导入的正文都不相同
+    (否则除第一次外都会被识别为重复文章)。
+    """
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        self.pages = load_fixture_pages()
+        self.latency = latency
+
+    def send(self, request, **kwargs):  # pylint: disable=arguments-differ
+        path, _, query = request.url[len(FIXTURE_BASE_URL):].partition("?")
+        response = requests.Response()
+        response.url = request.url
+        response.request = request
+        body = self.pages.get(path)
+        if body is None:
+            response.status_code = 404
+            body = b"not found"
+        else:
+            response.status_code = 200
+            if query:
+                body = body.replace(b"</p>", f" Reference {query}.</p>".encode(), 1)
+        if self.latency:
+            time.sleep(self.latency)
+        # 样本各自在 <meta> 中声明编码(含 ISO-8859-1 页面), 响应头不再声明
+        response.headers["Content-Type"] = "text/html"
+        response.headers["Content-Length"] = str(len(body))
+        response.raw = io.BytesIO(body)
+        return response
+
+    def close(self):
+        pass
+
+
+def install_fakes(
+    tokens_per_sec: float = 20.0,
+    output_tokens: int = 64,
+    tts_delay: float = 0.3,
+    fetch_latency: float = 0.0,
+) -> dict:
+    """把替身装入应用的单例服务, 返回 {"llm", "tts", "fetch"} 三个替身对象。必须在导入 app 之后调用。"""
+    from app.services.content_service import content_service  # pylint: disable=import-outside-toplevel
+    from app.services.llm_service import llm_service  # pylint: disable=import-outside-toplevel
+    from app.services.tts_service import tts_service  # pylint: disable=import-outside-toplevel
+
+    llm = FakeLlama(tokens_per_sec=tokens_per_sec, output_tokens=output_tokens)
+    # 每个路由(大模型与可选的小模型)各用一个替身, 与各自独立的 Llama 实例一致
+    for route, model in llm_service.models.items():
+        model.model = llm if route == "large" else FakeLlama(tokens_per_sec=tokens_per_sec, output_tokens=output_tokens)
+        model.kv_cache = None
+        model.load_state = "ready"
+        model.load_seconds = 0.0
+
+    tts = FakeXTTS(delay=tts_delay)
+    # tts 不是 "edge-tts" 时按 XTTS 引擎处理, 合成走 xtts.synthesize
+    tts_service.tts = "fake-xtts"
+    tts_service.xtts = tts
+    tts_service.device = "cpu"
+    tts_service.load_state = "ready"
+    tts_service.load_seconds = 0.0
+
+    fetch = FixtureAdapter(latency=fetch_latency)
+    content_service.session.mount(FIXTURE_BASE_URL, fetch)
+    return {"llm": llm, "tts": tts, "fetch": fetch}
@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+"""
+Load-test the FastAPI app in-process, fully offline.
+
+The app runs inside this process behind httpx's ASGI transport (no server,
+no sockets). The LLM, XTTS and web fetches are replaced with stand-ins from
+benchmarks/fakes.py:
+- the LLM generates at a fixed tokens/sec
+- TTS takes a fixed delay per sentence
+- imports are served from the saved HTML fixtures
+
+Everything else is the real code path: endpoints, LLM scheduler, executors,
+caches and a throwaway SQLite database seeded with courses and lessons.
+
+Load mode drives a weighted mix of endpoints at a given concurrency. It
+reports throughput and p50/p95/p99 latency per endpoint. Micro mode
+(--micro) times individual operations: HTML parsing (ContentService.fetch_url
+/ parse_html), render_lesson_content and the catalog / search DB queries.
+
+Results print as a table, or as JSON with --json / --output. --baseline
+compares against a saved JSON run and exits with status 1 when latency
+(--metric, default p95) or throughput regresses by more than
+--max-regression percent; with --json the comparison is included in the
+printed JSON under "comparison".
+
+Requires httpx (pip install httpx).
+
+Usage:
+    python benchmarks/load_bench.py --requests 1000 --concurrency 32 --output baseline.json
+    python benchmarks/load_bench.py --mix "chat=1,tts=1,lesson=8" --tokens-per-sec 30 --tts-delay 0.2
+    python benchmarks/load_bench.py --baseline baseline.json --max-regression 15
+    python benchmarks/load_bench.py --micro --iterations 500 --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Tuple
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+DEFAULT_MIX = "chat=1,chat_stream=1,tts=3,courses=4,lessons=3,lesson=10,search=3,import=1"
+_WORDS = (
+    "negotiate deadline stakeholder pitch revenue budget feedback prototype launch market customer "
+    "persuade summarize clarify highlight schedule proposal milestone estimate review"
+).split()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="In-process load test of the API with fake models")
+    parser.add_argument("--micro", action="store_true", help="Run the micro-benchmarks instead of the load test")
+    parser.add_argument("--requests", type=int, default=500, help="Total requests (load mode)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients (load mode)")
+    parser.add_argument("--warmup", type=int, default=20, help="Unrecorded requests before measuring")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Weighted endpoint mix, e.g. 'chat=1,lesson=5'")
+    parser.add_argument("--repeat-ratio", type=float, default=0.2, help="Share of chat/TTS requests reusing earlier text")
+    parser.add_argument("--tokens-per-sec", type=float, default=20.0, help="Fake LLM generation speed")
+    parser.add_argument("--output-tokens", type=int, default=32, help="Tokens per fake LLM answer")
+    parser.add_argument("--tts-delay", type=float, default=0.3, help="Fake TTS seconds per sentence")
+    parser.add_argument("--fetch-latency", type=float, default=0.05, help="Fake network latency per imported page")
+    parser.add_argument("--courses", type=int, default=20, help="Seeded courses")
+    parser.add_argument("--lessons-per-course", type=int, default=30, help="Seeded lessons per course")
+    parser.add_argument("--iterations", type=int, default=200, help="Iterations per operation (micro mode)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--output", help="Also write the JSON results to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=10.0, help="Allowed regression in percent")
+    parser.add_argument(
+        "--metric",
+        choices=("p50_ms", "p95_ms", "p99_ms"),
+        default="p95_ms",
+        help="Latency percentile compared with the baseline (p50 is steadier for micro-benchmarks)",
+    )
+    return parser.parse_args()
+
+
+def prepare_environment(tmp: str) -> None:
+    """在导入 app 之前设置, Settings 在导入时读取环境变量。"""
+    os.environ["DATA_DIR"] = tmp
+    os.environ["DB_PATH"] = os.path.join(tmp, "bench.db")
+    os.environ["AUDIO_DIR"] = os.path.join(tmp, "audio")
+    os.environ["MODEL_DIR"] = os.path.join(tmp, "models")
+    os.environ["MODEL_LOAD_MODE"] = "lazy"
+    os.environ.setdefault("PRERENDER_ON_IMPORT", "false")
+    os.environ.setdefault("VOCAB_DEFINE_ON_SAVE", "false")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int = 0) -> dict:
+    """latencies 单位为秒; 返回毫秒级分位数与每秒次数。"""
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "per_sec": len(latencies) / elapsed if elapsed else 0.0,
+        "mean_ms": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies) * 1000 if latencies else 0.0,
+    }
+
+
+def sentence(rnd: random.Random, words: int = 12) -> str:
+    return " ".join(rnd.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def seed_catalog(courses: int, lessons_per_course: int, seed: int) -> Dict[str, List[int]]:
+    from app.models.database import get_db_connection  # pylint: disable=import-outside-toplevel
+
+    rnd = random.Random(seed)
+    conn = get_db_connection()
+    try:
+        for number in range(courses):
+            cursor = conn.execute(
+                "INSERT INTO courses (title, description) VALUES (?, ?)",
+                (f"Benchmark course {number}", sentence(rnd)),
+            )
+            course_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO lessons (course_id, title, content) VALUES (?, ?, ?)",
+                [
+                    (course_id, f"Lesson {index}", "\n\n".join(sentence(rnd) for _ in range(40)))
+                    for index in range(lessons_per_course)
+                ],
+            )
+        conn.commit()
+        course_ids = [row["id"] for row in conn.execute("SELECT id FROM courses")]
+        lesson_ids = [row["id"] for row in conn.execute("SELECT id FROM lessons")]
+    finally:
+        conn.close()
+    return {"courses": course_ids, "lessons": lesson_ids}
+
+
+def parse_mix(mix: str) -> List[Tuple[str, float]]:
+    weights = []
+    for part in mix.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario '{name}'. Available: {', '.join(SCENARIOS)}")
+        weights.append((name, float(weight or 1)))
+    return weights
+
+
+class Workload:
+    """生成各场景的请求; repeat_ratio 比例的对话/朗读请求复用之前的文本, 模拟缓存命中。"""
+
+    def __init__(self, catalog: Dict[str, List[int]], repeat_ratio: float, seed: int):
+        self.catalog = catalog
+        self.repeat_ratio = repeat_ratio
+        self.rnd = random.Random(seed)
+        self.counter = 0
+        self.seen: Dict[str, List[str]] = defaultdict(list)
+
+    def text(self, kind: str, make: Callable[[], str]) -> str:
+        seen = self.seen[kind]
+        if seen and self.rnd.random() < self.repeat_ratio:
+            return self.rnd.choice(seen)
+        value = make()
+        seen.append(value)
+        return value
+
+    def next_id(self) -> int:
+        self.counter += 1
+        return self.counter
+
+    async def chat(self, client):
+        word = self.rnd.choice(_WORDS)
+        message = self.text("chat", lambda: f"What does '{word}' mean here? ({self.next_id()})")
+        return await client.post("/api/chat", json={"message": message, "kind": "word", "context": sentence(self.rnd)})
+
+    async def chat_stream(self, client):
+        message = self.text("chat", lambda: f"Explain this sentence: {sentence(self.rnd)} ({self.next_id()})")
+        async with client.stream("POST", "/api/chat/stream", json={"message": message}) as response:
+            async for _ in response.aiter_raw():
+                pass
+        return response
+
+    async def tts(self, client):
+        text = self.text("tts", lambda: f"{sentence(self.rnd)} ({self.next_id()})")
+        return await client.post("/api/tts", json={"text": text})
+
+    async def courses(self, client):
+        return await client.get("/api/courses", params={"limit": 50})
+
+    async def lessons(self, client):
+        return await client.get(f"/api/courses/{self.rnd.choice(self.catalog['courses'])}/lessons")
+
+    async def lesson(self, client):
+        return await client.get(f"/api/lessons/{self.rnd.choice(self.catalog['lessons'])}")
+
+    async def search(self, client):
+        return await client.get("/api/search", params={"q": self.rnd.choice(_WORDS)[:5]})
+
+    async def import_page(self, client):
+        from benchmarks.fakes import FIXTURE_BASE_URL, load_fixture_pages  # pylint: disable=import-outside-toplevel
+
+        page = self.rnd.choice(sorted(load_fixture_pages()))
+        return await client.post("/api/courses/import", json={"url": f"{FIXTURE_BASE_URL}{page}?{self.next_id()}"})
+
+
+SCENARIOS = {
+    "chat": Workload.chat,
+    "chat_stream": Workload.chat_stream,
+    "tts": Workload.tts,
+    "courses": Workload.courses,
+    "lessons": Workload.lessons,
+    "lesson": Workload.lesson,
+    "search": Workload.search,
+    "import": Workload.import_page,
+}
+
+
+async def run_load(args: argparse.Namespace) -> dict:
+    """在应用的 startup / shutdown 生命周期内运行负载测试。"""
+    from app.main import app  # pylint: disable=import-outside-toplevel
+
+    async with app.router.lifespan_context(app):
+        return await _drive(app, args)
+
+
+async def _drive(app, args: argparse.Namespace) -> dict:
+    import httpx  # pylint: disable=import-outside-toplevel
+
+    from benchmarks.fakes import install_fakes  # pylint: disable=import-outside-toplevel
+
+    fakes = install_fakes(args.tokens_per_sec, args.output_tokens, args.tts_delay, args.fetch_latency)
+    catalog = seed_catalog(args.courses, args.lessons_per_course, args.seed)
+    workload = Workload(catalog, args.repeat_ratio, args.seed)
+    mix = parse_mix(args.mix)
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+    remaining = {"warmup": args.warmup, "measured": args.requests}
+
+    async def client_loop(client) -> None:
+        while True:
+            if remaining["warmup"] > 0:
+                remaining["warmup"] -= 1
+                record = False
+            elif remaining["measured"] > 0:
+                remaining["measured"] -= 1
+                record = True
+            else:
+                return
+            name = workload.rnd.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                response = await SCENARIOS[name](workload, client)
+                status = response.status_code
+            except Exception as e:  # pylint: disable=broad-except
+                print(f"{name} failed: {e!r}", file=sys.stderr)
+                status = 0
+            elapsed = time.perf_counter() - started
+            if not record:
+                continue
+            statuses[name][status] += 1
+            if 200 <= status < 400:
+                latencies[name].append(elapsed)
+            else:
+                errors[name] += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        # 预热请求也并发执行, 以便同时填满各个线程池
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "mode": "load",
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "mix": args.mix,
+            "tokens_per_sec": args.tokens_per_sec,
+            "output_tokens": args.output_tokens,
+            "tts_delay": args.tts_delay,
+            "fetch_latency": args.fetch_latency,
+            "seeded_lessons": len(catalog["lessons"]),
+        },
+        "elapsed_s": elapsed,
+        "total": summarize(all_latencies, elapsed, sum(errors.values())),
+        "results": {
+            name: {**summarize(latencies[name], elapsed, errors[name]), "statuses": dict(statuses[name])}
+            for name in names
+            if statuses[name]
+        },
+        "fakes": {"llm_tokens_per_sec": fakes["llm"].tokens_per_sec, "tts_calls": fakes["tts"].calls},
+    }
+
+
+def time_operation(func: Callable[[], object], iterations: int) -> dict:
+    func()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        begin = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - begin)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def run_micro(args: argparse.Namespace) -> dict:
+    from app.api import endpoints  # pylint: disable=import-outside-toplevel
+    from app.models.database import init_db  # pylint: disable=import-outside-toplevel
+    from app.services.content_service import content_service  # pylint: disable=import-outside-toplevel
+    from app.services.lesson_segments import lesson_segmenter  # pylint: disable=import-outside-toplevel
+    from app.services.search import search_service  # pylint: disable=import-outside-toplevel
+    from benchmarks.fakes import FIXTURE_BASE_URL, install_fakes, load_fixture_pages  # pylint: disable=import-outside-toplevel
+    from scripts.import_curriculum import render_lesson_content  # pylint: disable=import-outside-toplevel
+
+    init_db()
+    install_fakes(fetch_latency=0.0)
+    catalog = seed_catalog(args.courses, args.lessons_per_course, args.seed)
+    rnd = random.Random(args.seed)
+    pages = load_fixture_pages()
+    lesson = {
+        "title": "Pitching a product",
+        "focus": "Persuasive openings",
+        "communication_goal": "Open a pitch with a customer story",
+        "input_clip": "Founder pitch, 2 min",
+        "language_blocks": [sentence(rnd) for _ in range(8)],
+        "activities": [{"type": "Role play", "description": sentence(rnd)} for _ in range(4)],
+        "assessment": sentence(rnd),
+        "homework": sentence(rnd),
+    }
+    course_id = catalog["courses"][0]
+    lesson_id = catalog["lessons"][0]
+
+    operations: Dict[str, Callable[[], object]] = {}
+    for name, html in pages.items():
+        operations[f"parse_html[{name}]"] = lambda html=html: content_service.parse_html(html)
+    operations["fetch_url"] = lambda: content_service.fetch_url(f"{FIXTURE_BASE_URL}{rnd.choice(sorted(pages))}")
+    operations["render_lesson_content"] = lambda: render_lesson_content(lesson)
+    operations["db.courses"] = lambda: endpoints._fetch_courses(0, 50)  # pylint: disable=protected-access
+    operations["db.lessons"] = lambda: endpoints._fetch_lessons(course_id, 0, 100)  # pylint: disable=protected-access
+    operations["db.lesson"] = lambda: endpoints._fetch_lesson(rnd.choice(catalog["lessons"]))  # pylint: disable=protected-access
+    operations["db.catalog_state"] = endpoints._catalog_state  # pylint: disable=protected-access
+    operations["db.sentences"] = lambda: lesson_segmenter.sentences(lesson_id, 0, 100)
+    operations["db.search"] = lambda: search_service.search(rnd.choice(_WORDS)[:5])
+
+    return {
+        "mode": "micro",
+        "config": {"iterations": args.iterations, "seeded_lessons": len(catalog["lessons"])},
+        "results": {name: time_operation(func, args.iterations) for name, func in operations.items()},
+    }
+
+
+def compare(results: dict, baseline: dict, max_regression: float, metric: str = "p95_ms") -> dict:
+    """对比每项的延迟分位数与每秒次数。
+
+    返回 {metric, max_regression, rows, regressions}; regressions 为超过允许回退幅度的项目说明。
+    """
+    rows, regressions = [], []
+    label = metric[:-3]
+    for name, result in results["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        latency_delta = (result[metric] / base[metric] - 1) * 100 if base[metric] else 0.0
+        rate_delta = (result["per_sec"] / base["per_sec"] - 1) * 100 if base["per_sec"] else 0.0
+        regression = latency_delta > max_regression or rate_delta < -max_regression
+        if regression:
+            regressions.append(f"{name}: {label} {latency_delta:+.1f}%, throughput {rate_delta:+.1f}%")
+        rows.append({
+            "name": name,
+            "ms": result[metric],
+            "base_ms": base[metric],
+            "ms_delta_pct": round(latency_delta, 1),
+            "per_sec": result["per_sec"],
+            "base_per_sec": base["per_sec"],
+            "per_sec_delta_pct": round(rate_delta, 1),
+            "regression": regression,
+        })
+    return {"metric": label, "max_regression": max_regression, "rows": rows, "regressions": regressions}
+
+
+def print_comparison(comparison: dict) -> None:
+    label = comparison["metric"]
+    print(f"\nCompared with baseline ({label}, max regression {comparison['max_regression']:.0f}%):")
+    print(f"{'name':<28}{label + ' ms':>10}{'base':>10}{'Δ%':>8}{'per sec':>10}{'base':>10}{'Δ%':>8}")
+    for row in comparison["rows"]:
+        print(
+            f"{row['name']:<28}{row['ms']:>10.2f}{row['base_ms']:>10.2f}{row['ms_delta_pct']:>+8.1f}"
+            f"{row['per_sec']:>10.1f}{row['base_per_sec']:>10.1f}{row['per_sec_delta_pct']:>+8.1f}"
+            + ("  <-- regression" if row["regression"] else "")
+        )
+    if comparison["regressions"]:
+        print("\nRegressions:\n  " + "\n  ".join(comparison["regressions"]))
+
+
+def print_table(results: dict) -> None:
+    if results["mode"] == "load":
+        config = results["config"]
+        total = results["total"]
+        print(
+            f"{config['requests']} requests, concurrency {config['concurrency']}, "
+            f"{results['elapsed_s']:.1f}s: {total['per_sec']:.1f} req/s, {total['errors']} errors\n"
+        )
+    print(f"{'name':<28}{'count':>7}{'errors':>7}{'per sec':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name, result in results["results"].items():
+        print(
+            f"{name:<28}{result['count']:>7}{result['errors']:>7}{result['per_sec']:>10.1f}"
+            f"{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}{result['p99_ms']:>9.2f}"
+        )
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        prepare_environment(tmp)
+        # 应用用 print 输出日志, 运行期间转到 stderr, 保证 --json 的输出可以直接解析
+        with contextlib.redirect_stdout(sys.stderr):
+            results = run_micro(args) if args.micro else asyncio.run(run_load(args))
+
+    comparison = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("mode") != results["mode"]:
+            raise SystemExit(f"Baseline is a {baseline.get('mode')} run, this is a {results['mode']} run")
+        comparison = compare(results, baseline, args.max_regression, args.metric)
+
+    # --output 只保存本次结果, 以便之后作为基线; --json 时对比结果放在同一个 JSON 中
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.json:
+        print(json.dumps({**results, "comparison": comparison} if comparison else results, indent=2))
+    else:
+        print_table(results)
+        if comparison:
+            print_comparison(comparison)
+
+    if comparison and comparison["regressions"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark full-text search latency on a synthetic catalog.
+
+Builds a throwaway database with ``--lessons`` lessons whose words follow a
+Zipf distribution (a few very common words, a long tail of rare ones), then
+reports p50 / p95 / max ``took_ms`` of SearchService.search for common, rare,
+prefix, multi-word and phrase queries.
+
+Usage:
+    python benchmarks/search_bench.py
+    python benchmarks/search_bench.py --lessons 50000 --words 300 --json
+    python benchmarks/search_bench.py --query "market team" --query negot
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+DEFAULT_QUERIES = ["negotiation", "negotiat", "w30", "w300", "w3000", "market team", '"price growth"', "zzz"]
+_COMMON_WORDS = (
+    "market price storytelling product customer meeting deadline growth revenue strategy quality "
+    "design team report analysis budget negotiation culture feedback presentation"
+).split()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark FTS5 search latency")
+    parser.add_argument("--lessons", type=int, default=30000, help="Number of synthetic lessons")
+    parser.add_argument("--words", type=int, default=300, help="Words per lesson")
+    parser.add_argument("--iterations", type=int, default=20, help="Runs per query")
+    parser.add_argument("--query", action="append", help="Query to run (repeatable, default: built-in set)")
+    parser.add_argument("--no-optimize", action="store_true", help="Query the index without merging its segments")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    return parser.parse_args()
+
+
+def populate(lessons: int, words: int) -> float:
+    from app.models.database import get_db_connection  # pylint: disable=import-outside-toplevel
+
+    rnd = random.Random(1)
+    vocab = _COMMON_WORDS + [f"w{i}" for i in range(8000)]
+    weights = [1.0 / (i + 1) for i in range(len(vocab))]
+    started = time.perf_counter()
+    conn = get_db_connection()
+    try:
+        conn.execute("INSERT INTO courses (title, description) VALUES ('Benchmark', 'Synthetic catalog')")
+        course_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        conn.executemany(
+            "INSERT INTO lessons (course_id, title, content) VALUES (?, ?, ?)",
+            (
+                (course_id, f"Lesson {i}", " ".join(rnd.choices(vocab, weights, k=words)))
+                for i in range(lessons)
+            ),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return time.perf_counter() - started
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        # 必须在导入 app 之前设置, Settings 在导入时读取环境变量
+        os.environ["DB_PATH"] = os.path.join(tmp, "search_bench.db")
+        from app.models.database import init_db  # pylint: disable=import-outside-toplevel
+        from app.services.search import search_service  # pylint: disable=import-outside-toplevel
+
+        init_db()
+        insert_seconds = populate(args.lessons, args.words)
+        if not args.no_optimize:
+            search_service.optimize()
+
+        results = {}
+        for query in args.query or DEFAULT_QUERIES:
+            first = search_service.search(query)
+            timings = [search_service.search(query)["took_ms"] for _ in range(args.iterations)]
+            results[query] = {
+                "total": first["total"],
+                "approximate": first["approximate"],
+                "p50_ms": percentile(timings, 50),
+                "p95_ms": percentile(timings, 95),
+                "max_ms": max(timings),
+            }
+
+    if args.json:
+        print(json.dumps({"lessons": args.lessons, "insert_seconds": insert_seconds, "queries": results}, indent=2))
+        return
+
+    print(f"{args.lessons} lessons x {args.words} words indexed in {insert_seconds:.1f}s\n")
+    print(f"{'query':<18}{'matches':>9}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}")
+    for query, result in results.items():
+        mark = "~" if result["approximate"] else " "
+        print(
+            f"{query:<18}{result['total']:>8}{mark}{result['p50_ms']:>9.2f}"
+            f"{result['p95_ms']:>9.2f}{result['max_ms']:>9.2f}"
+        )
+    print("\n~ = ranked among the newest SEARCH_MAX_RANKED matches only")
+
+
+if __name__ == "__main__":
+    main()
@@ -26,7 +26,7 @@ import {
   Tooltip,
   Typography,
 } from 'antd'
-import api, { resolveAssetUrl } from './api'
+import api, { resolveAssetUrl, streamChat, streamSpeech, type ChatKind } from './api'
 import './App.css'
 
 const { Header, Content, Sider } = Layout
@@ -225,7 +225,9 @@ function App() {
   const [highlightedText, setHighlightedText] = useState<string | null>(null)
   const [ttsRate, setTtsRate] = useState(1)
   const audioRef = useRef<HTMLAudioElement | null>(null)
-  const streamingTimers = useRef<number[]>([])
+  const streamControllers = useRef<AbortController[]>([])
+  // 正在进行的分段朗读流：停止播放时一并中止，服务端不再继续合成没人听的句子
+  const passageController = useRef<AbortController | null>(null)
   const speechRef = useRef<SpeechSynthesisUtterance | null>(null)
   const wordClickTimer = useRef<number | null>(null)
   const [messageApi, contextHolder] = message.useMessage()
@@ -254,6 +256,8 @@ function App() {
   }, [])
 
   const cleanupAudio = useCallback(() => {
+    passageController.current?.abort()
+    passageController.current = null
     if (audioRef.current) {
       audioRef.current.pause()
       audioRef.current.currentTime = 0
@@ -268,7 +272,7 @@ function App() {
   useEffect(() => {
     return () => {
       cleanupAudio()
-      streamingTimers.current.forEach((timer) => window.clearInterval(timer))
+      streamControllers.current.forEach((controller) => controller.abort())
       if (wordClickTimer.current) {
         window.clearTimeout(wordClickTimer.current)
         wordClickTimer.current = null
@@ -276,37 +280,6 @@ function App() {
     }
   }, [cleanupAudio])
 
-  const simulateStreaming = useCallback((text: string, messageId: string) => {
-    if (!text) {
-      setQaMessages((prev) =>
-        prev.map((msg) => (msg.id === messageId ? { ...msg, content: '（空响应）', status: 'done' } : msg)),
-      )
-      return
-    }
-
-    let currentIndex = 0
-    const chunkSize = Math.max(1, Math.round(text.length / 80))
-
-    const timer = window.setInterval(() => {
-      currentIndex = Math.min(text.length, currentIndex + chunkSize)
-      setQaMessages((prev) =>
-        prev.map((msg) =>
-          msg.id === messageId ? { ...msg, content: text.slice(0, currentIndex), status: 'streaming' } : msg,
-        ),
-      )
-
-      if (currentIndex >= text.length) {
-        window.clearInterval(timer)
-        streamingTimers.current = streamingTimers.current.filter((item) => item !== timer)
-        setQaMessages((prev) =>
-          prev.map((msg) => (msg.id === messageId ? { ...msg, status: 'done', content: text } : msg)),
-        )
-      }
-    }, 35)
-
-    streamingTimers.current.push(timer)
-  }, [])
-
   const speakText = useCallback(
     async (text: string) => {
       if (!text.trim()) {
@@ -348,8 +321,72 @@ function App() {
     [cleanupAudio, messageApi, ttsRate],
   )
 
+  const speakPassage = useCallback(
+    async (text: string) => {
+      if (!text.trim()) {
+        return
+      }
+      cleanupAudio()
+      const controller = new AbortController()
+      passageController.current = controller
+      // 分段音频按顺序排队播放：第一句就绪即开始朗读，其余句子边合成边播放
+      const queue: string[] = []
+      let playing = false
+      let finished = false
+      const playNext = () => {
+        if (controller.signal.aborted) {
+          return
+        }
+        const next = queue.shift()
+        if (!next) {
+          playing = false
+          if (finished) {
+            setIsGeneratingAudio(false)
+          }
+          return
+        }
+        playing = true
+        const audio = new Audio(resolveAssetUrl(next))
+        audio.playbackRate = ttsRate
+        audioRef.current = audio
+        audio.onended = playNext
+        audio.onerror = playNext
+        audio.play().catch(() => controller.abort())
+      }
+
+      try {
+        setIsGeneratingAudio(true)
+        await streamSpeech(
+          text,
+          (segment) => {
+            if (!segment.audio_url) {
+              return
+            }
+            queue.push(segment.audio_url)
+            if (!playing) {
+              playNext()
+            }
+          },
+          controller.signal,
+        )
+      } catch (error) {
+        if (!controller.signal.aborted) {
+          messageApi.error('批量朗读失败，请稍后再试。')
+        }
+      } finally {
+        finished = true
+        // 被新的朗读取代时不改动状态，由新的朗读负责
+        const superseded = passageController.current !== null && passageController.current !== controller
+        if (!superseded && (!playing || controller.signal.aborted)) {
+          setIsGeneratingAudio(false)
+        }
+      }
+    },
+    [cleanupAudio, messageApi, ttsRate],
+  )
+
   const askAssistant = useCallback(
-    async (question: string, context?: string) => {
+    async (question: string, context?: string, kind: ChatKind = 'free') => {
       if (!question.trim()) {
         messageApi.warning('请输入要提问的内容。')
         return
@@ -370,29 +407,46 @@ function App() {
       ])
 
       setIsLoadingAnswer(true)
+      const controller = new AbortController()
+      streamControllers.current.push(controller)
+      let answer = ''
       try {
-        const { data } = await api.post('/chat', {
-          message: question.trim(),
-          context,
-        })
-        simulateStreaming(data.response ?? '暂时无法回答，请稍后重试。', assistantMessageId)
+        await streamChat(
+          { message: question.trim(), context, kind },
+          (token) => {
+            answer += token
+            setQaMessages((prev) =>
+              prev.map((msg) => (msg.id === assistantMessageId ? { ...msg, content: answer } : msg)),
+            )
+          },
+          controller.signal,
+        )
+        setQaMessages((prev) =>
+          prev.map((msg) =>
+            msg.id === assistantMessageId ? { ...msg, content: answer || '（空响应）', status: 'done' } : msg,
+          ),
+        )
       } catch (error) {
+        if (controller.signal.aborted) {
+          return
+        }
         setQaMessages((prev) =>
           prev.map((msg) =>
             msg.id === assistantMessageId
               ? {
                   ...msg,
-                  content: '请求失败，请检查后端服务或稍后再试。',
+                  content: answer || '请求失败，请检查后端服务或稍后再试。',
                   status: 'done',
                 }
               : msg,
           ),
         )
       } finally {
+        streamControllers.current = streamControllers.current.filter((item) => item !== controller)
         setIsLoadingAnswer(false)
       }
     },
-    [messageApi, simulateStreaming],
+    [messageApi],
   )
 
   const handleWordSpeak = useCallback(
@@ -416,7 +470,7 @@ function App() {
       setHighlightedText(cleanWord)
       questionForm.setFieldsValue({ question: autoQuestion, context: sentence })
       speakText(cleanWord)
-      askAssistant(autoQuestion, sentence)
+      askAssistant(autoQuestion, sentence, 'word')
     },
     [askAssistant, questionForm, speakText],
   )
@@ -450,7 +504,7 @@ function App() {
       const question = `请帮我分析这句话的语法结构和语气，并给我一个改写建议：${sentence}`
       questionForm.setFieldsValue({ question, context: sentence })
       speakText(sentence)
-      askAssistant(question, sentence)
+      askAssistant(question, sentence, 'sentence')
     },
     [askAssistant, questionForm, speakText],
   )
@@ -523,7 +577,17 @@ function App() {
           </div>
         </Space>
         <Space>
-          <Button icon={<AudioOutlined />} disabled={isGeneratingAudio}>
+          <Button
+            icon={<AudioOutlined />}
+            disabled={isGeneratingAudio}
+            onClick={() =>
+              speakPassage(
+                activeLesson.sections
+                  .flatMap((section) => section.sentences.map((sentence) => sentence.text))
+                  .join(' '),
+              )
+            }
+          >
             {isGeneratingAudio ? '生成语音中...' : '批量朗读'}
           </Button>
           <Button type="primary" icon={<PlayCircleOutlined />}>
@@ -31,3 +31,129 @@ export const resolveAssetUrl = (path: string | undefined | null) => {
   }
   return path
 }
+
+export type ChatKind = 'word' | 'sentence' | 'free'
+
+type ChatStreamPayload = {
+  message: string
+  context?: string
+  kind?: ChatKind
+}
+
+/**
+ * 调用 /chat/stream，按 Server-Sent Events 逐 token 回调。
+ * 通过 signal 中止请求时，后端会随之取消生成。
+ */
+export const streamChat = async (
+  payload: ChatStreamPayload,
+  onToken: (token: string) => void,
+  signal?: AbortSignal,
+) => {
+  const response = await fetch(`${API_BASE_URL}/chat/stream`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      Accept: 'text/event-stream',
+    },
+    body: JSON.stringify(payload),
+    signal,
+  })
+  if (!response.ok || !response.body) {
+    throw new Error(`stream request failed: ${response.status}`)
+  }
+
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+
+  while (true) {
+    const { value, done } = await reader.read()
+    if (done) {
+      return
+    }
+    buffer += decoder.decode(value, { stream: true })
+
+    let boundary = buffer.indexOf('\n\n')
+    while (boundary !== -1) {
+      const rawEvent = buffer.slice(0, boundary)
+      buffer = buffer.slice(boundary + 2)
+      boundary = buffer.indexOf('\n\n')
+
+      let eventName = 'message'
+      let data = ''
+      for (const line of rawEvent.split('\n')) {
+        if (line.startsWith('event:')) {
+          eventName = line.slice(6).trim()
+        } else if (line.startsWith('data:')) {
+          data += line.slice(5).trim()
+        }
+      }
+
+      if (eventName === 'done') {
+        return
+      }
+      if (eventName === 'error') {
+        throw new Error(data || 'stream error')
+      }
+      const parsed = data ? JSON.parse(data) : {}
+      if (parsed.token) {
+        onToken(parsed.token)
+      }
+    }
+  }
+}
+
+export type SpeechSegment = {
+  index: number
+  text: string
+  audio_url: string | null
+}
+
+/**
+ * 调用 /tts/stream，长文本按句合成，每句音频就绪即回调（按原文顺序）。
+ */
+export const streamSpeech = async (
+  text: string,
+  onSegment: (segment: SpeechSegment) => void,
+  signal?: AbortSignal,
+) => {
+  const response = await fetch(`${API_BASE_URL}/tts/stream`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      Accept: 'application/x-ndjson',
+    },
+    body: JSON.stringify({ text }),
+    signal,
+  })
+  if (!response.ok || !response.body) {
+    throw new Error(`stream request failed: ${response.status}`)
+  }
+
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+
+  while (true) {
+    const { value, done } = await reader.read()
+    if (done) {
+      return
+    }
+    buffer += decoder.decode(value, { stream: true })
+
+    let newline = buffer.indexOf('\n')
+    while (newline !== -1) {
+      const line = buffer.slice(0, newline).trim()
+      buffer = buffer.slice(newline + 1)
+      newline = buffer.indexOf('\n')
+      if (!line) {
+        continue
+      }
+      const parsed = JSON.parse(line)
+      if (parsed.done) {
+        return
+      }
+      onSegment(parsed as SpeechSegment)
+    }
+  }
+}
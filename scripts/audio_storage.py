@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Inspect and maintain the generated audio in AUDIO_DIR.
+
+- report:    storage used per TTS engine and file format
+- gc:        run one garbage-collection pass (unpin unused lesson audio, quota eviction, missing, temp and orphaned files)
+- transcode: convert cached XTTS WAV files to TTS_AUDIO_CODEC (needs ffmpeg); lesson
+             audio records and playlists are updated to the new file names
+
+Usage:
+    python scripts/audio_storage.py report
+    python scripts/audio_storage.py gc
+    python scripts/audio_storage.py transcode --workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.models.database import init_db  # type: ignore # pylint: disable=wrong-import-position
+from app.services.audio_storage import audio_storage  # type: ignore # pylint: disable=wrong-import-position
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Report, garbage-collect or transcode generated audio")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("report", help="Show storage used per engine and format")
+    commands.add_parser("gc", help="Run one garbage-collection pass")
+    transcode = commands.add_parser("transcode", help="Convert cached WAV files to TTS_AUDIO_CODEC")
+    transcode.add_argument("--limit", type=int, help="Convert at most this many files")
+    transcode.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 4, help="Number of ffmpeg processes run in parallel"
+    )
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    return parser.parse_args()
+
+
+def _mb(size: int) -> str:
+    return f"{size / 1024 / 1024:.1f} MB"
+
+
+def print_report(status: dict) -> None:
+    print(
+        f"Audio storage: {_mb(status['bytes'] - status['pinned_bytes'])} of {_mb(status['max_bytes'])} cached, "
+        f"plus {_mb(status['pinned_bytes'])} pinned lesson audio (new XTTS audio: {status['codec']})"
+    )
+    for engine, usage in status["by_engine"].items():
+        print(f"  {engine}: {usage['files']} files, {_mb(usage['bytes'])}, {usage['pinned']} pinned ({_mb(usage['pinned_bytes'])})")
+        for fmt, counts in usage["formats"].items():
+            print(f"    .{fmt}: {counts['files']} files, {_mb(counts['bytes'])}")
+
+
+def main() -> None:
+    args = parse_args()
+    init_db()
+    started = time.monotonic()
+    if args.command == "report":
+        result = audio_storage.status()
+    elif args.command == "gc":
+        result = audio_storage.collect()
+    else:
+        result = audio_storage.transcode_legacy(limit=args.limit, workers=args.workers)
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    elif args.command == "report":
+        print_report(result)
+    elif args.command == "gc":
+        print(
+            f"GC finished in {result['seconds']:.2f}s: {result['unpinned']} unpinned, {result['evicted']} evicted, "
+            f"{result['missing']} missing, "
+            f"{result['temp']} temp and {result['orphan']} orphaned files removed, {_mb(result['freed_bytes'])} freed; "
+            f"now {_mb(result['bytes'] - result['pinned_bytes'])} cached + {_mb(result['pinned_bytes'])} pinned"
+            + (" (still over quota)" if result["over_quota"] else "")
+        )
+    elif result.get("error"):
+        print(f"Nothing converted: {result['error']} (set TTS_AUDIO_CODEC and install ffmpeg).")
+    else:
+        print(
+            f"Converted {result['converted']} WAV files in {time.monotonic() - started:.1f}s, "
+            f"saved {_mb(result['saved_bytes'])}, rewrote {result['playlists']} playlists, {result['failed']} failed."
+        )
+    if result.get("failed") or result.get("error"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
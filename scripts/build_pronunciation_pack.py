@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Build the pronunciation pack: one file holding the audio of every single word the
+reader may ask to hear, served by the API straight from a memory-mapped byte slice.
+
+Words come from the lesson corpus (most frequent first), saved vocabulary and any
+word lists given with --words-file (one word per line, e.g. a frequency list).
+Rebuilds are incremental: words already in the pack are kept and only new words are
+synthesized, unless the TTS voice changed or --rebuild is given. The running API
+picks up the new pack within a few seconds.
+
+Usage:
+    python scripts/build_pronunciation_pack.py
+    python scripts/build_pronunciation_pack.py --words-file data/en_50k.txt --limit 20000
+    python scripts/build_pronunciation_pack.py --no-lessons --words-file words.txt --rebuild
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.core.config import settings  # type: ignore # pylint: disable=wrong-import-position
+from app.models.database import get_db_connection, init_db  # type: ignore # pylint: disable=wrong-import-position
+from app.services.pronunciation_pack import build_pack, corpus_words, normalize_word  # type: ignore # pylint: disable=wrong-import-position
+from app.services.tts_service import tts_service  # type: ignore # pylint: disable=wrong-import-position
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Synthesize single-word audio into a memory-mapped pronunciation pack")
+    parser.add_argument(
+        "--words-file", action="append", default=[], help="Word list, one word per line (repeatable; order is priority)"
+    )
+    parser.add_argument("--no-lessons", action="store_true", help="Do not collect words from lesson content")
+    parser.add_argument("--min-count", type=int, default=1, help="Minimum occurrences in the lesson corpus")
+    parser.add_argument("--no-vocabulary", action="store_true", help="Do not include saved vocabulary words")
+    parser.add_argument("--limit", type=int, help="Synthesize at most this many new words")
+    parser.add_argument("--workers", type=int, help="Words synthesized in parallel (default depends on the TTS engine)")
+    parser.add_argument("--rebuild", action="store_true", help="Discard the existing pack and synthesize every word")
+    parser.add_argument("--output", default=settings.PRONUNCIATION_PACK_PATH, help="Pack file to write")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    return parser.parse_args()
+
+
+def collect_words(args: argparse.Namespace) -> list:
+    """按优先级收集单词: 课程语料(按词频降序)、已保存的生词、词表文件(按文件顺序)。"""
+    words = []
+    conn = get_db_connection()
+    try:
+        if not args.no_lessons:
+            counts = corpus_words(row["content"] for row in conn.execute("SELECT content FROM lessons"))
+            words.extend(word for word, count in counts.most_common() if count >= args.min_count)
+        if not args.no_vocabulary:
+            for row in conn.execute("SELECT word FROM vocabulary ORDER BY id"):
+                word = normalize_word(row["word"])
+                if word:
+                    words.append(word)
+    finally:
+        conn.close()
+    for path in args.words_file:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                # 词频表常见格式为 "word count", 只取第一列
+                word = normalize_word(line.split()[0]) if line.strip() else None
+                if word:
+                    words.append(word)
+    return list(dict.fromkeys(words))
+
+
+def main() -> None:
+    args = parse_args()
+    init_db()
+    words = collect_words(args)
+    if not tts_service.ensure_loaded():
+        print("TTS engine is not available; nothing synthesized.")
+        sys.exit(1)
+    profile = tts_service.voice_profile()
+    workers = args.workers or (
+        settings.EDGE_TTS_MAX_CONCURRENCY if profile["engine"] == "edge-tts" else settings.EXECUTOR_TTS_WORKERS
+    )
+
+    def progress(done: int, total: int) -> None:
+        if not args.json and (done % 100 == 0 or done == total):
+            print(f"  {done}/{total} words synthesized")
+
+    if not args.json:
+        print(f"{len(words)} words collected; engine {profile['engine']}, voice {profile['voice']}, {workers} workers")
+    result = build_pack(
+        args.output, words, tts_service.synthesize_bytes, profile,
+        workers=workers, rebuild=args.rebuild, limit=args.limit, progress=progress,
+    )
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        print(
+            f"Pronunciation pack {result['path']}: {result['words']} words, {result['bytes'] / 1024 / 1024:.1f} MB "
+            f"({result['kept']} kept, {result['added']} added, {result['failed']} failed) in {result['seconds']:.1f}s"
+        )
+    if result["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import argparse
 import os
 import sys
 from huggingface_hub import hf_hub_download, snapshot_download
@@ -6,14 +7,16 @@ from huggingface_hub import hf_hub_download, snapshot_download
 MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "models")
 LLM_REPO_ID = "Qwen/Qwen2.5-7B-Instruct-GGUF"
 LLM_FILENAME = "qwen2.5-7b-instruct-q4_k_m.gguf"
+# Optional small model for quick word lookups; same tokenizer family, so it can also draft for the 7B model
+SMALL_LLM_REPO_ID = "Qwen/Qwen2.5-1.5B-Instruct-GGUF"
 TTS_REPO_ID = "coqui/XTTS-v2"
 
-def download_llm():
-    print(f"Checking LLM in repo: {LLM_REPO_ID}...")
-    os.makedirs(os.path.join(MODEL_DIR, "llm"), exist_ok=True)
+def download_llm(repo_id=LLM_REPO_ID, subdir="llm"):
+    print(f"Checking LLM in repo: {repo_id}...")
+    os.makedirs(os.path.join(MODEL_DIR, subdir), exist_ok=True)
     try:
         from huggingface_hub import list_repo_files
-        files = list_repo_files(repo_id=LLM_REPO_ID)
+        files = list_repo_files(repo_id=repo_id)
         gguf_files = [f for f in files if f.endswith(".gguf")]
         
         selected_base = None
@@ -53,9 +56,9 @@ def download_llm():
         for part in selected_parts:
             print(f"Downloading {part}...")
             hf_hub_download(
-                repo_id=LLM_REPO_ID,
+                repo_id=repo_id,
                 filename=part,
-                local_dir=os.path.join(MODEL_DIR, "llm"),
+                local_dir=os.path.join(MODEL_DIR, subdir),
                 local_dir_use_symlinks=False
             )
             
@@ -67,7 +70,7 @@ def download_llm():
         # BUT llama.cpp might need the original name pattern to find the second part.
         # So we should NOT rename.
         # We will create a 'model_info.txt' containing the filename.
-        with open(os.path.join(MODEL_DIR, "llm", "model_info.txt"), "w") as f:
+        with open(os.path.join(MODEL_DIR, subdir, "model_info.txt"), "w") as f:
             f.write(selected_base)
             
         print(f"LLM download complete. Main file: {selected_base}")
@@ -90,8 +93,16 @@ def download_tts():
         print(f"Error downloading TTS: {e}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download the GGUF LLM and XTTS models into data/models")
+    parser.add_argument(
+        "--small-llm", action="store_true", help=f"Also download {SMALL_LLM_REPO_ID} for routing quick lookups"
+    )
+    args = parser.parse_args()
+
     print("Starting model downloads... This may take a while.")
     download_llm()
+    if args.small_llm:
+        download_llm(SMALL_LLM_REPO_ID, "llm_small")
     # Note: XTTS download is large and we are using Edge-TTS as default now for stability.
     download_tts()
     print("Download complete.")
@@ -1,42 +1,91 @@
 #!/usr/bin/env python3
 """
-Import a structured English curriculum JSON file into the local SQLite database.
+Import (or re-sync) structured English curriculum JSON files into the local SQLite database.
+
+Each file describes one course. Paths may be files, directories (every *.json
+inside) or glob patterns. Re-importing is incremental: a course is matched by
+title and updated in place, lessons are matched by content hash (then by
+title), unchanged lessons are skipped and changed lessons keep their ids, so
+links and pre-rendered audio stay valid. Each file is written in one
+transaction. Large files are stream-parsed in a single pass when ijson is
+installed, and lessons are written in batches as they are read.
 
 Usage:
-    python scripts/import_curriculum.py --file data/curriculum_product_comm.json --replace
+    python scripts/import_curriculum.py                                  # data/curriculum_product_comm.json
+    python scripts/import_curriculum.py data/curricula/ "extra/**/*.json" --replace
+    python scripts/import_curriculum.py --file data/curriculum_product_comm.json --prerender
 """
 
 from __future__ import annotations
 
 import argparse
+import asyncio
+import glob
 import json
 import os
 import sys
-from typing import Any, Dict, List
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if ROOT_DIR not in sys.path:
     sys.path.insert(0, ROOT_DIR)
 
 from app.core.config import settings  # type: ignore # pylint: disable=wrong-import-position
-from app.models.database import get_db_connection  # type: ignore  # pylint: disable=wrong-import-position
+from app.models.database import get_db_connection, init_db  # type: ignore  # pylint: disable=wrong-import-position
+from app.services.course_importer import content_hash  # type: ignore # pylint: disable=wrong-import-position
+from app.services.lesson_segments import lesson_segmenter  # type: ignore # pylint: disable=wrong-import-position
+
+try:
+    import ijson  # type: ignore
+except ImportError:  # 未安装时整文件读入, 适合小文件
+    ijson = None
+
+COURSE_FIELDS = ("title", "description", "source")
+# 新增与变化的课时每攒够这么多条写入一次, 内存中不保留整个文件的课时
+FLUSH_BATCH = 500
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Import curriculum JSON into learning.db")
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        help="Curriculum files, directories or glob patterns (default: data/curriculum_product_comm.json)",
+    )
     parser.add_argument(
         "--file",
-        default=os.path.join(settings.DATA_DIR, "curriculum_product_comm.json"),
-        help="Path to the curriculum JSON file",
+        action="append",
+        default=[],
+        help="Path to a curriculum JSON file (repeatable, same as a positional path)",
     )
     parser.add_argument(
         "--replace",
         action="store_true",
-        help="If the course title already exists, delete and re-import it.",
+        help="Also delete lessons that are no longer in the file (existing courses are always updated in place).",
+    )
+    parser.add_argument(
+        "--prerender",
+        action="store_true",
+        help="Pre-render audio of courses that changed (see scripts/prerender_audio.py).",
     )
     return parser.parse_args()
 
 
+def expand_paths(patterns: Iterable[str]) -> List[str]:
+    """展开文件 / 目录 / glob 模式, 去重后按路径排序返回。"""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths.extend(glob.glob(os.path.join(pattern, "*.json")))
+        elif glob.has_magic(pattern):
+            paths.extend(glob.glob(pattern, recursive=True))
+        else:
+            paths.append(pattern)
+    return sorted(set(os.path.normpath(path) for path in paths))
+
+
 def load_curriculum(path: str) -> Dict[str, Any]:
     if not os.path.exists(path):
         raise FileNotFoundError(f"Curriculum file not found: {path}")
@@ -44,6 +93,58 @@ def load_curriculum(path: str) -> Dict[str, Any]:
         return json.load(f)
 
 
+def _stream_curriculum(path: str) -> Iterator[Tuple[str, Any, Any]]:
+    """只解析一遍文件, 依次产出 ("field", 字段名, 值) 与 ("lesson", 课时, None)。"""
+    with open(path, "rb") as f:
+        builder = None
+        for prefix, event, value in ijson.parse(f):
+            if builder is not None:
+                builder.event(event, value)
+                if prefix == "lessons.item" and event == "end_map":
+                    yield "lesson", builder.value, None
+                    builder = None
+            elif prefix == "lessons.item" and event == "start_map":
+                builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+            elif prefix in COURSE_FIELDS and event in ("string", "number", "null"):
+                yield "field", prefix, value
+
+
+def read_curriculum(path: str) -> Tuple[Dict[str, Any], Iterable[Dict[str, Any]]]:
+    """返回 (课程字段, 课时迭代器)。安装了 ijson 时只流式解析一遍, 内存占用与文件大小无关。
+
+    读到 title 之前出现的课时先暂存(title 通常在文件开头); title 之后的课程字段
+    在遍历课时的过程中补进返回的字典, 由 import_curriculum 在最后写回。
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Curriculum file not found: {path}")
+    if ijson is None:
+        data = load_curriculum(path)
+        return {field: data.get(field) for field in COURSE_FIELDS}, data.get("lessons", [])
+
+    items = _stream_curriculum(path)
+    fields: Dict[str, Any] = {}
+    pending: List[Dict[str, Any]] = []
+    for kind, key, value in items:
+        if kind == "lesson":
+            pending.append(key)
+            continue
+        fields[key] = value
+        if key == "title":
+            break
+
+    def lessons() -> Iterator[Dict[str, Any]]:
+        yield from pending
+        pending.clear()
+        for kind, key, value in items:
+            if kind == "lesson":
+                yield key
+            else:
+                fields[key] = value
+
+    return fields, lessons()
+
+
 def render_lesson_content(lesson: Dict[str, Any]) -> str:
     """Convert structured lesson info into markdown text for the lesson content field."""
     lines: List[str] = [
@@ -75,53 +176,192 @@ def render_lesson_content(lesson: Dict[str, Any]) -> str:
     return "\n".join([line for line in lines if line])
 
 
-def import_curriculum(data: Dict[str, Any], replace: bool = False) -> int:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    title = data["title"]
-
-    existing = cursor.execute("SELECT id FROM courses WHERE title = ?", (title,)).fetchone()
-    if existing:
-        if not replace:
-            conn.close()
-            raise ValueError(f"Course '{title}' already exists. Use --replace to overwrite.")
-        course_id = existing["id"]
-        cursor.execute("DELETE FROM lessons WHERE course_id = ?", (course_id,))
-        cursor.execute("DELETE FROM courses WHERE id = ?", (course_id,))
-        conn.commit()
+def _body_hash(content: str) -> str:
+    """去掉首行标题后的正文哈希, 用于识别只改了标题的课时。"""
+    first, _, rest = content.partition("\n")
+    return content_hash(rest if first.startswith("# ") else content)
 
-    cursor.execute(
-        "INSERT INTO courses (title, description, source_url) VALUES (?, ?, ?)",
-        (
-            title,
-            data.get("description"),
-            data.get("source"),
-        ),
-    )
-    course_id = cursor.lastrowid
 
-    lessons = data.get("lessons", [])
-    for lesson in lessons:
-        content = render_lesson_content(lesson)
+def _upsert_course(cursor, fields: Dict[str, Any]) -> Tuple[int, bool]:
+    """按标题查找课程并原地更新描述与来源, 不存在时创建。返回 (course_id, 是否新建)。"""
+    title = fields.get("title")
+    if not title:
+        raise ValueError("Curriculum has no title")
+    existing = cursor.execute(
+        "SELECT id, description, source_url FROM courses WHERE title = ? ORDER BY id LIMIT 1", (title,)
+    ).fetchone()
+    if existing is None:
+        cursor.execute(
+            "INSERT INTO courses (title, description, source_url) VALUES (?, ?, ?)",
+            (title, fields.get("description"), fields.get("source")),
+        )
+        return int(cursor.lastrowid), True
+    if (existing["description"], existing["source_url"]) != (fields.get("description"), fields.get("source")):
         cursor.execute(
-            "INSERT INTO lessons (course_id, title, content) VALUES (?, ?, ?)",
-            (course_id, lesson.get("title"), content),
+            "UPDATE courses SET description = ?, source_url = ? WHERE id = ?",
+            (fields.get("description"), fields.get("source"), existing["id"]),
         )
+    return int(existing["id"]), False
+
+
+def import_curriculum(
+    fields: Dict[str, Any], lessons: Iterable[Dict[str, Any]], replace: bool = False
+) -> Dict[str, Any]:
+    """把一个课程文件同步到数据库(一个事务), 返回 {course_id, created, inserted, changed, skipped, removed}。
+
+    课时依次按内容哈希(正文完全相同则跳过)、去掉标题后的正文(只改了标题)、标题(只改了正文)
+    匹配已有课时并原地更新, id 不变; 都匹配不到时新建。replace=True 时删除文件中已不存在的课时。
+    """
+    conn = get_db_connection()
+    try:
+        # 先取得写锁: 读取 MAX(id) 与插入之间不会混入其他连接写入的课时
+        conn.execute("BEGIN IMMEDIATE")
+        cursor = conn.cursor()
+        course_id, created = _upsert_course(cursor, fields)
+
+        existing_rows = cursor.execute(
+            "SELECT id, title, content, content_hash FROM lessons WHERE course_id = ? ORDER BY id", (course_id,)
+        ).fetchall()
+        by_hash: Dict[str, List[dict]] = defaultdict(list)
+        by_body: Dict[str, List[dict]] = defaultdict(list)
+        by_title: Dict[str, List[dict]] = defaultdict(list)
+        backfill: List[Tuple[str, int]] = []
+        for row in existing_rows:
+            lesson = dict(row)
+            if lesson["content_hash"] is None:
+                lesson["content_hash"] = content_hash(lesson["content"])
+                backfill.append((lesson["content_hash"], lesson["id"]))
+            by_hash[lesson["content_hash"]].append(lesson)
+            by_body[_body_hash(lesson["content"])].append(lesson)
+            by_title[lesson["title"]].append(lesson)
+        # 旧版本导入的课时没有 content_hash, 补写后下次导入可以直接按哈希匹配
+        cursor.executemany("UPDATE lessons SET content_hash = ? WHERE id = ?", backfill)
+        matched = set()
+
+        def take(candidates: List[dict]) -> Optional[dict]:
+            for candidate in candidates:
+                if candidate["id"] not in matched:
+                    matched.add(candidate["id"])
+                    return candidate
+            return None
+
+        inserts: List[Tuple[Any, ...]] = []
+        updates: List[Tuple[Any, ...]] = []
+        counts = {"inserted": 0, "changed": 0, "skipped": 0}
+
+        def flush() -> None:
+            cursor.executemany(
+                "UPDATE lessons SET title = ?, content = ?, content_hash = ?, audio_path = NULL WHERE id = ?",
+                updates,
+            )
+            last_id = cursor.execute("SELECT IFNULL(MAX(id), 0) FROM lessons").fetchone()[0]
+            cursor.executemany(
+                "INSERT INTO lessons (course_id, title, content, content_hash) VALUES (?, ?, ?, ?)",
+                inserts,
+            )
+            # executemany 不返回逐行的 lastrowid, 按插入顺序取回新课时的 id
+            new_ids = [
+                row["id"]
+                for row in cursor.execute(
+                    "SELECT id FROM lessons WHERE course_id = ? AND id > ? ORDER BY id", (course_id, last_id)
+                )
+            ]
+            for lesson_id, (_, _, content, _) in zip(new_ids, inserts):
+                lesson_segmenter.segment(conn, lesson_id, content)
+            for _, content, _, lesson_id in updates:
+                lesson_segmenter.segment(conn, lesson_id, content)
+            counts["inserted"] += len(inserts)
+            counts["changed"] += len(updates)
+            inserts.clear()
+            updates.clear()
 
-    conn.commit()
-    conn.close()
-    return int(course_id)
+        for lesson in lessons:
+            title = lesson.get("title")
+            content = render_lesson_content(lesson)
+            digest = content_hash(content)
+            existing = (
+                take(by_hash.get(digest, []))
+                or take(by_body.get(_body_hash(content), []))
+                or take(by_title.get(title, []))
+            )
+            if existing is None:
+                inserts.append((course_id, title, content, digest))
+            elif existing["content"] == content and existing["title"] == title:
+                counts["skipped"] += 1
+            else:
+                # 正文变化后旧的预渲染音频失效, 由下一次预渲染重新生成
+                updates.append((title, content, digest, existing["id"]))
+            if len(inserts) + len(updates) >= FLUSH_BATCH:
+                flush()
+        flush()
+        # 流式读取时, 位于 lessons 之后的课程字段要到这里才读到
+        _upsert_course(cursor, fields)
+
+        removed = []
+        if replace:
+            removed = [(row["id"],) for row in existing_rows if row["id"] not in matched]
+            cursor.executemany("DELETE FROM lessons WHERE id = ?", removed)
+
+        conn.commit()
+    finally:
+        conn.close()
+
+    return {
+        "course_id": course_id,
+        "created": created,
+        **counts,
+        "removed": len(removed),
+    }
 
 
 def main() -> None:
     args = parse_args()
-    curriculum = load_curriculum(args.file)
-    course_id = import_curriculum(curriculum, replace=args.replace)
+    paths = expand_paths(args.paths + args.file) or [os.path.join(settings.DATA_DIR, "curriculum_product_comm.json")]
+    init_db()
+
+    started = time.monotonic()
+    totals = defaultdict(int)
+    changed_courses = []
+    failed = []
+    for path in paths:
+        try:
+            fields, lessons = read_curriculum(path)
+            result = import_curriculum(fields, lessons, replace=args.replace)
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"Failed to import {path}: {e}")
+            failed.append(path)
+            continue
+        for key in ("inserted", "changed", "skipped", "removed"):
+            totals[key] += result[key]
+        totals["created"] += int(result["created"])
+        if result["inserted"] or result["changed"]:
+            changed_courses.append(result["course_id"])
+        print(
+            f"{path}: '{fields['title']}' (course_id={result['course_id']}) "
+            f"+{result['inserted']} new, {result['changed']} changed, {result['skipped']} unchanged"
+            + (f", {result['removed']} removed" if result["removed"] else "")
+        )
+
+    elapsed = time.monotonic() - started
+    lessons_seen = totals["inserted"] + totals["changed"] + totals["skipped"]
     print(
-        f"Imported course '{curriculum['title']}' with {len(curriculum.get('lessons', []))} lessons "
-        f"into database {settings.DB_PATH}. (course_id={course_id})"
+        f"\nSynced {len(paths) - len(failed)} files ({totals['created']} new courses) into {settings.DB_PATH} "
+        f"in {elapsed:.2f}s: {lessons_seen} lessons ({lessons_seen / elapsed if elapsed else 0:.0f}/s), "
+        f"{totals['inserted']} new, {totals['changed']} changed, {totals['skipped']} skipped, "
+        f"{totals['removed']} removed."
     )
 
+    if args.prerender and changed_courses:
+        from app.services.audio_prerender import audio_prerenderer  # type: ignore # pylint: disable=import-outside-toplevel
+
+        async def prerender_all() -> None:
+            for course_id in changed_courses:
+                await audio_prerenderer.prerender_course(course_id)
+
+        asyncio.run(prerender_all())
+    if failed:
+        sys.exit(1)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Import many web pages as courses at once.
+
+Pages are fetched concurrently (bounded per host) over pooled keep-alive
+connections. ETag / Last-Modified are stored per URL, so re-running the same
+list only re-imports pages that changed.
+
+Usage:
+    python scripts/import_urls.py --file data/news_urls.txt [--prerender]
+    python scripts/import_urls.py https://example.com/a https://example.com/b --force
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import List
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.core.config import settings  # type: ignore # pylint: disable=wrong-import-position
+from app.models.database import init_db  # type: ignore # pylint: disable=wrong-import-position
+from app.services.course_importer import course_importer  # type: ignore # pylint: disable=wrong-import-position
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Bulk import web pages into learning.db")
+    parser.add_argument("urls", nargs="*", help="URLs to import")
+    parser.add_argument("--file", help="Text file with one URL per line (blank lines and # comments ignored)")
+    parser.add_argument("--force", action="store_true", help="Ignore stored ETag / Last-Modified and refetch")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.IMPORT_MAX_CONCURRENCY,
+        help="Maximum number of pages fetched at the same time (at most IMPORT_MAX_CONCURRENCY)",
+    )
+    parser.add_argument(
+        "--per-host",
+        type=int,
+        default=settings.IMPORT_PER_HOST_CONCURRENCY,
+        help="Maximum concurrent fetches against a single host",
+    )
+    parser.add_argument(
+        "--prerender",
+        action="store_true",
+        help="Pre-render audio for imported or updated courses (see scripts/prerender_audio.py).",
+    )
+    parser.add_argument("--json", action="store_true", help="Print per-URL results as JSON")
+    args = parser.parse_args()
+    # 下载在 fetch 线程池中进行, 线程数为 IMPORT_MAX_CONCURRENCY, 更高的并发数会被线程数截断
+    if args.concurrency > settings.IMPORT_MAX_CONCURRENCY:
+        parser.error(
+            f"--concurrency {args.concurrency} exceeds IMPORT_MAX_CONCURRENCY={settings.IMPORT_MAX_CONCURRENCY}; "
+            "raise IMPORT_MAX_CONCURRENCY to fetch more pages at once"
+        )
+    return args
+
+
+def read_urls(args: argparse.Namespace) -> List[str]:
+    urls = list(args.urls)
+    if args.file:
+        with open(args.file, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    urls.append(line)
+    return urls
+
+
+async def run(args: argparse.Namespace, urls: List[str]) -> list:
+    course_importer.max_concurrency = max(1, args.concurrency)
+    course_importer.per_host_concurrency = max(1, args.per_host)
+    results = await course_importer.import_urls(urls, force=args.force)
+
+    if args.prerender:
+        from app.services.audio_prerender import audio_prerenderer
+
+        for result in results:
+            if result["status"] in ("imported", "updated"):
+                await audio_prerenderer.prerender_course(result["course_id"])
+    return results
+
+
+def main() -> None:
+    args = parse_args()
+    urls = read_urls(args)
+    if not urls:
+        print("No URLs given.")
+        sys.exit(2)
+
+    init_db()
+    started = time.monotonic()
+    results = asyncio.run(run(args, urls))
+    elapsed = time.monotonic() - started
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        for result in results:
+            detail = result["error"] or f"course {result['course_id']}"
+            print(f"[{result['status']}] {result['url']} - {detail}")
+
+    summary = course_importer.summarize(results)
+    print(
+        f"Processed {summary['total']} URLs in {elapsed:.1f}s: {summary['imported']} imported, "
+        f"{summary['updated']} updated, {summary['not_modified']} unchanged, {summary['failed']} failed."
+    )
+    if summary["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Pre-render lesson audio sentence by sentence so playback needs no TTS inference.
+
+Progress is stored per sentence, so an interrupted run can simply be restarted.
+Suitable for running from cron during off-peak hours.
+
+Usage:
+    python scripts/prerender_audio.py --all
+    python scripts/prerender_audio.py --course-id 3 --concurrency 4
+    python scripts/prerender_audio.py --lesson-id 12
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.core.config import settings  # type: ignore # pylint: disable=wrong-import-position
+from app.models.database import init_db  # type: ignore # pylint: disable=wrong-import-position
+from app.services.audio_prerender import audio_prerenderer  # type: ignore # pylint: disable=wrong-import-position
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Pre-render lesson audio into lessons.audio_path")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--all", action="store_true", help="Pre-render every lesson in the database")
+    target.add_argument("--course-id", type=int, help="Pre-render all lessons of one course")
+    target.add_argument("--lesson-id", type=int, action="append", help="Pre-render a single lesson (repeatable)")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.PRERENDER_CONCURRENCY,
+        help="Number of sentences synthesized at the same time",
+    )
+    return parser.parse_args()
+
+
+async def run(args: argparse.Namespace) -> list:
+    audio_prerenderer.concurrency = max(1, args.concurrency)
+    if args.all:
+        return await audio_prerenderer.prerender_all()
+    if args.course_id is not None:
+        return await audio_prerenderer.prerender_course(args.course_id)
+    return await audio_prerenderer.prerender_lessons(args.lesson_id)
+
+
+def main() -> None:
+    args = parse_args()
+    init_db()
+    started = time.monotonic()
+    summaries = asyncio.run(run(args))
+    rendered = sum(s.get("rendered", 0) for s in summaries)
+    skipped = sum(s.get("skipped", 0) for s in summaries)
+    failed = sum(s.get("failed", 0) for s in summaries)
+    print(
+        f"Pre-rendered {len(summaries)} lessons in {time.monotonic() - started:.1f}s: "
+        f"{rendered} sentences rendered, {skipped} already done, {failed} failed."
+    )
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
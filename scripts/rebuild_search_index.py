@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Rebuild the FTS5 full-text indexes (courses, lessons, vocabulary) from their source tables.
+
+Triggers keep the indexes in sync incrementally; run this after restoring an
+old database, after bulk edits made with triggers disabled, or if the index
+is ever suspected to be out of sync.
+
+Usage:
+    python scripts/rebuild_search_index.py
+    python scripts/rebuild_search_index.py --no-optimize
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.models.database import init_db  # type: ignore # pylint: disable=wrong-import-position
+from app.services.search import search_service  # type: ignore # pylint: disable=wrong-import-position
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Rebuild full-text search indexes")
+    parser.add_argument(
+        "--no-optimize",
+        action="store_true",
+        help="Skip merging index segments after the rebuild",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    init_db()
+    started = time.monotonic()
+    counts = search_service.rebuild(optimize=not args.no_optimize)
+    summary = ", ".join(f"{count} {table}" for table, count in counts.items())
+    print(f"Rebuilt search indexes in {time.monotonic() - started:.1f}s: {summary}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Split lesson content into sections and sentences (lesson_sections / lesson_sentences).
+
+New imports are segmented automatically; run this once to backfill lessons
+imported earlier. Re-segmenting keeps the ids of sentences whose text did not
+change.
+
+Usage:
+    python scripts/segment_lessons.py              # lessons that have no sentences yet
+    python scripts/segment_lessons.py --all        # re-segment every lesson
+    python scripts/segment_lessons.py --lesson-id 12
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.models.database import init_db  # type: ignore # pylint: disable=wrong-import-position
+from app.services.lesson_segments import lesson_segmenter  # type: ignore # pylint: disable=wrong-import-position
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Segment lessons into indexed sentences")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--all", action="store_true", help="Re-segment every lesson, not only missing ones")
+    target.add_argument("--lesson-id", type=int, action="append", help="Segment a single lesson (repeatable)")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    init_db()
+    lesson_ids = args.lesson_id or lesson_segmenter.lesson_ids(only_missing=not args.all)
+
+    started = time.monotonic()
+    sentences = 0
+    missing = []
+    for lesson_id in lesson_ids:
+        count = lesson_segmenter.segment_lesson(lesson_id)
+        if count is None:
+            missing.append(lesson_id)
+            continue
+        sentences += count
+
+    print(
+        f"Segmented {len(lesson_ids) - len(missing)} lessons into {sentences} sentences "
+        f"in {time.monotonic() - started:.1f}s."
+    )
+    if missing:
+        print(f"Lessons not found: {', '.join(map(str, missing))}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import os
+import sys
+import tempfile
+
+# 配置在导入 app 时读取, 必须先指向临时目录, 测试不会读写真实的数据库与音频
+_DATA_DIR = tempfile.mkdtemp(prefix="ela-tests-")
+os.environ.update(
+    DATA_DIR=_DATA_DIR,
+    DB_PATH=os.path.join(_DATA_DIR, "learning.db"),
+    AUDIO_DIR=os.path.join(_DATA_DIR, "audio"),
+    MODEL_DIR=os.path.join(_DATA_DIR, "models"),
+    PRONUNCIATION_PACK_PATH=os.path.join(_DATA_DIR, "pronunciations.pack"),
+    MODEL_LOAD_MODE="lazy",
+    INFERENCE_MODE="local",
+    TTS_AUDIO_GC_INTERVAL="0",
+    PRERENDER_ON_IMPORT="false",
+)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def db():
+    """初始化测试数据库(整个测试会话共用一个文件)。"""
+    from app.models.database import close_all_connections, init_db
+
+    init_db()
+    yield
+    close_all_connections()
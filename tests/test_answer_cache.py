@@ -0,0 +1,57 @@
+import time
+
+from app.models.database import get_db_connection
+from app.services.answer_cache import AnswerCache
+
+SAMPLING = {"temperature": 0.2, "max_tokens": 64}
+
+
+def _clear():
+    conn = get_db_connection()
+    try:
+        conn.execute("DELETE FROM llm_answer_cache")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_key_ignores_whitespace_but_not_model_or_sampling():
+    key = AnswerCache.make_key("What does  it mean?\n", "tutor", "model-a", SAMPLING)
+    assert key == AnswerCache.make_key(" What does it mean?", "tutor", "model-a", SAMPLING)
+    assert key != AnswerCache.make_key("What does it mean?", "tutor", "model-b", SAMPLING)
+    assert key != AnswerCache.make_key("What does it mean?", "tutor", "model-a", {**SAMPLING, "max_tokens": 32})
+
+
+def test_get_put_and_stats(db):
+    _clear()
+    cache = AnswerCache(ttl=60, max_entries=10)
+    key = AnswerCache.make_key("q", "s", "m", SAMPLING)
+    assert cache.get(key) is None
+    cache.put(key, "m", "answer")
+    cache.put(AnswerCache.make_key("empty", "s", "m", SAMPLING), "m", "")
+    assert cache.get(key) == "answer"
+    assert cache.get(key, record_stats=False) == "answer"
+    stats = cache.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"], stats["hit_ratio"]) == (1, 1, 1, 0.5)
+
+
+def test_expired_and_least_recent_entries_are_evicted(db):
+    _clear()
+    cache = AnswerCache(ttl=60, max_entries=2)
+    keys = [AnswerCache.make_key(f"q{n}", "s", "m", SAMPLING) for n in range(3)]
+    cache.put(keys[0], "m", "a0")
+    cache.put(keys[1], "m", "a1")
+    conn = get_db_connection()
+    try:
+        conn.execute("UPDATE llm_answer_cache SET last_access = ? WHERE cache_key = ?", (time.time() - 30, keys[0]))
+        conn.commit()
+    finally:
+        conn.close()
+    cache.put(keys[2], "m", "a2")
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[1]) == "a1" and cache.get(keys[2]) == "a2"
+
+    expired = AnswerCache(ttl=0, max_entries=10)
+    time.sleep(0.01)
+    assert expired.get(keys[1]) is None
+    assert cache.get(keys[1]) is None
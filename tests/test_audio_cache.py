@@ -0,0 +1,115 @@
+import os
+
+from app.services.audio_cache import AudioCache
+
+
+def _write(cache, filename, size):
+    os.makedirs(cache.audio_dir, exist_ok=True)
+    with open(cache.path_for(filename), "wb") as f:
+        f.write(b"\0" * size)
+
+
+def test_store_and_lookup(db, tmp_path):
+    cache = AudioCache(str(tmp_path), max_entries=10, max_bytes=1000)
+    key = AudioCache.make_key("Hello there", "edge-tts", "voice-a", "en")
+    assert cache.lookup(key) is None
+    _write(cache, f"{key}.mp3", 100)
+    url = cache.store(key, f"{key}.mp3", "Hello there", "edge-tts", "voice-a", "en")
+    assert cache.lookup(key) == url == f"/static/audio/{key}.mp3"
+
+
+def test_oversize_entry_is_not_cached(db, tmp_path):
+    cache = AudioCache(str(tmp_path), max_entries=10, max_bytes=1000)
+    small = AudioCache.make_key("small", "edge-tts", "voice-a", "en")
+    large = AudioCache.make_key("large", "edge-tts", "voice-a", "en")
+    _write(cache, f"{small}.mp3", 100)
+    _write(cache, f"{large}.mp3", 5000)
+    cache.store(small, f"{small}.mp3", "small", "edge-tts", "voice-a", "en")
+
+    url = cache.store(large, f"{large}.mp3", "large", "edge-tts", "voice-a", "en")
+    assert url.endswith(f"{large}.mp3")
+    assert cache.lookup(large) is None
+    # 超大的条目没有登记, 垃圾回收不会为它淘汰其他条目
+    assert cache.evict(10, 1000, 8, 800) == (0, 0)
+    assert cache.lookup(small) is not None
+
+
+def test_pinned_entries_do_not_count_toward_budget(db, tmp_path):
+    from app.models.database import get_db_connection
+
+    conn = get_db_connection()
+    try:
+        conn.execute("DELETE FROM audio_cache")
+        conn.commit()
+    finally:
+        conn.close()
+    cache = AudioCache(str(tmp_path), max_entries=10, max_bytes=1000)
+    keys = [AudioCache.make_key(f"lesson sentence {n}", "xtts", "voice-a", "en") for n in range(3)]
+    for key in keys:
+        _write(cache, f"{key}.mp3", 600)
+        cache.store(key, f"{key}.mp3", key, "xtts", "voice-a", "en", pin=True)
+    recent = AudioCache.make_key("on demand", "xtts", "voice-a", "en")
+    _write(cache, f"{recent}.mp3", 500)
+    cache.store(recent, f"{recent}.mp3", "on demand", "xtts", "voice-a", "en")
+
+    # 固定条目共 1800 字节, 超过预算, 但未固定的只有 500 字节, 不应淘汰
+    assert cache.evict(10, 1000, 9, 900) == (0, 0)
+    assert cache.lookup(recent) is not None
+    stats = cache.stats()
+    assert stats["pinned_bytes"] == 1800 and stats["bytes"] == 2300
+
+
+def test_unreferenced_lesson_audio_is_unpinned_and_evictable(db, tmp_path):
+    from app.models.database import get_db_connection
+
+    conn = get_db_connection()
+    try:
+        conn.execute("DELETE FROM audio_cache")
+        course_id = conn.execute("INSERT INTO courses (title, description) VALUES ('Pinned', '')").lastrowid
+        lesson_id = conn.execute(
+            "INSERT INTO lessons (course_id, title, content) VALUES (?, 'L', 'One. Two.')", (course_id,)
+        ).lastrowid
+        conn.commit()
+    finally:
+        conn.close()
+    cache = AudioCache(str(tmp_path), max_entries=10, max_bytes=1000)
+    keys = [AudioCache.make_key(f"sentence {n}", "xtts", "voice-a", "en") for n in range(3)]
+    for key in keys:
+        _write(cache, f"{key}.mp3", 600)
+        cache.store(key, f"{key}.mp3", key, "xtts", "voice-a", "en", pin=True)
+
+    def record(index, key):
+        conn = get_db_connection()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO lesson_audio (lesson_id, sentence_index, sentence_text, audio_url) VALUES (?, ?, ?, ?)",
+                (lesson_id, index, key, cache.url_for(f"{key}.mp3")),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    record(0, keys[0])
+    record(1, keys[1])
+    # 宽限期内刚固定、尚未写入 lesson_audio 的音频不取消固定
+    assert cache.unpin_unreferenced(grace=60) == 0
+    assert cache.unpin_unreferenced(grace=0) == 1
+    assert cache.stats()["pinned"] == 2
+
+    # 句子修改后重新预渲染(经 lookup 重新固定新句子的音频): 旧音频不再被引用
+    assert cache.lookup(keys[2], pin=True)
+    record(1, keys[2])
+    assert cache.unpin_unreferenced(grace=0) == 1
+    assert cache.evict(0, 0, 0, 0) == (1, 600)
+    assert cache.lookup(keys[1]) is None and cache.lookup(keys[0]) is not None
+
+    # 删除课时后其全部音频都可以淘汰
+    conn = get_db_connection()
+    try:
+        conn.execute("DELETE FROM lessons WHERE id = ?", (lesson_id,))
+        conn.commit()
+    finally:
+        conn.close()
+    assert cache.unpin_unreferenced(grace=0) == 2
+    assert cache.evict(0, 0, 0, 0) == (2, 1200)
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,115 @@
+import asyncio
+import hashlib
+import os
+
+from app.core.config import settings
+from app.models.database import get_db_connection
+from app.services import audio_prerender
+from app.services.audio_prerender import AudioPrerenderer
+from app.services.lesson_segments import lesson_segmenter
+
+
+class FakeTTS:
+    """把句子写成音频目录下的假文件, 记录被合成的文本。"""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.calls = []
+
+    async def agenerate_audio(self, text, pin=False):
+        self.calls.append(text)
+        if text in self.fail:
+            return None
+        filename = f"{hashlib.sha1(text.encode()).hexdigest()[:16]}.mp3"
+        os.makedirs(settings.AUDIO_DIR, exist_ok=True)
+        with open(os.path.join(settings.AUDIO_DIR, filename), "wb") as f:
+            f.write(text.encode())
+        return f"/static/audio/{filename}"
+
+
+def _lesson(content: str) -> int:
+    conn = get_db_connection()
+    try:
+        course_id = conn.execute("INSERT INTO courses (title, description) VALUES ('Prerender', '')").lastrowid
+        lesson_id = conn.execute(
+            "INSERT INTO lessons (course_id, title, content) VALUES (?, 'L', ?)", (course_id, content)
+        ).lastrowid
+        conn.commit()
+    finally:
+        conn.close()
+    return lesson_id
+
+
+def _set_content(lesson_id: int, content: str) -> None:
+    conn = get_db_connection()
+    try:
+        conn.execute("UPDATE lessons SET content = ? WHERE id = ?", (content, lesson_id))
+        conn.commit()
+    finally:
+        conn.close()
+    lesson_segmenter.segment_lesson(lesson_id)
+
+
+def _playlist(audio_path: str) -> list:
+    filename = audio_path[len("/static/audio/"):]
+    with open(os.path.join(settings.AUDIO_DIR, filename), encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def test_prerender_writes_playlist_and_skips_done_sentences(db, monkeypatch):
+    tts = FakeTTS()
+    monkeypatch.setattr(audio_prerender, "tts_service", tts)
+    prerenderer = AudioPrerenderer(concurrency=2)
+    lesson_id = _lesson("One fish. Two fish. Red fish.")
+
+    summary = asyncio.run(prerenderer.prerender_lesson(lesson_id))
+    assert (summary["sentences"], summary["rendered"], summary["skipped"], summary["failed"]) == (3, 3, 0, 0)
+    audio = prerenderer.lesson_audio(lesson_id)
+    assert audio["audio_path"] == summary["audio_path"]
+    urls = [s["audio_url"] for s in audio["sentences"]]
+    assert _playlist(summary["audio_path"]) == ["#EXTM3U"] + urls
+
+    # 重新运行时已完成的句子不再合成
+    tts.calls.clear()
+    summary = asyncio.run(prerenderer.prerender_lesson(lesson_id))
+    assert tts.calls == [] and summary["skipped"] == 3
+
+
+def test_prerender_rerenders_changed_sentences_and_drops_removed(db, monkeypatch):
+    tts = FakeTTS()
+    monkeypatch.setattr(audio_prerender, "tts_service", tts)
+    prerenderer = AudioPrerenderer(concurrency=2)
+    lesson_id = _lesson("One fish. Two fish. Red fish.")
+    asyncio.run(prerenderer.prerender_lesson(lesson_id))
+
+    tts.calls.clear()
+    _set_content(lesson_id, "One fish. Blue fish.")
+    summary = asyncio.run(prerenderer.prerender_lesson(lesson_id))
+    assert tts.calls == ["Blue fish."]
+    assert (summary["rendered"], summary["skipped"]) == (1, 1)
+    texts = [s["sentence_text"] for s in prerenderer.lesson_audio(lesson_id)["sentences"]]
+    assert texts == ["One fish.", "Blue fish."]
+    assert len(_playlist(summary["audio_path"])) == 3
+
+
+def test_failed_sentence_is_retried_and_lesson_not_finished(db, monkeypatch):
+    tts = FakeTTS(fail={"Two fish."})
+    monkeypatch.setattr(audio_prerender, "tts_service", tts)
+    prerenderer = AudioPrerenderer(concurrency=1)
+    lesson_id = _lesson("One fish. Two fish.")
+
+    summary = asyncio.run(prerenderer.prerender_lesson(lesson_id))
+    assert summary["failed"] == 1 and "audio_path" not in summary
+    assert prerenderer.lesson_audio(lesson_id)["audio_path"] is None
+
+    tts.fail.clear()
+    tts.calls.clear()
+    summary = asyncio.run(prerenderer.prerender_lesson(lesson_id))
+    assert tts.calls == ["Two fish."]
+    assert summary["failed"] == 0 and summary["audio_path"]
+
+
+def test_missing_lesson(db):
+    prerenderer = AudioPrerenderer(concurrency=1)
+    assert asyncio.run(prerenderer.prerender_lesson(10 ** 9)) == {"lesson_id": 10 ** 9, "error": "lesson not found"}
+    assert prerenderer.lesson_audio(10 ** 9) is None
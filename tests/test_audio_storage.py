@@ -0,0 +1,11 @@
+from app.core import metrics
+from app.services.audio_storage import audio_storage
+
+
+def test_usage_publishes_storage_gauges(db):
+    usage = audio_storage.usage()
+    text = metrics.registry.render()
+    for engine, stats in usage["by_engine"].items():
+        for fmt, counts in stats["formats"].items():
+            assert f'audio_storage_files{{engine="{engine}",format="{fmt}"}} {counts["files"]}' in text
+    assert sum(value for _, value in metrics.audio_storage_bytes.items()) == usage["bytes"]
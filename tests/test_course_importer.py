@@ -0,0 +1,102 @@
+import asyncio
+import sys
+import threading
+import time
+
+import pytest
+
+from app.services.course_importer import CourseImporter, normalize_url
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("HTTPS://Example.COM/Path?q=1#section", "https://example.com/Path?q=1"),
+        ("http://example.com:80/a", "http://example.com/a"),
+        ("https://example.com:8443/a", "https://example.com:8443/a"),
+        ("https://example.com", "https://example.com/"),
+        ("  https://example.com/a  ", "https://example.com/a"),
+    ],
+)
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+def test_busy_host_does_not_hold_global_slots(monkeypatch):
+    importer = CourseImporter(max_concurrency=2, per_host_concurrency=1)
+    started = {}
+    lock = threading.Lock()
+
+    def fetch(url, state):
+        with lock:
+            started[url] = time.monotonic()
+        time.sleep(0.2 if "slow.example" in url else 0.0)
+        return {"not_modified": True}
+
+    monkeypatch.setattr(importer, "_fetch_state", lambda url: {"course_id": 1})
+    monkeypatch.setattr(importer, "_fetch", fetch)
+
+    urls = [f"https://slow.example/{i}" for i in range(4)] + ["https://fast.example/"]
+    began = time.monotonic()
+    results = asyncio.run(importer.import_urls(urls))
+    assert [r["status"] for r in results] == ["not_modified"] * 5
+    # 等待 slow.example 站点槽位的 URL 不占用总槽位, fast.example 不必排在它们之后
+    assert started["https://fast.example/"] - began < 0.15
+
+
+def test_same_url_saved_twice_updates_one_course(db):
+    importer = CourseImporter(max_concurrency=1, per_host_concurrency=1)
+    url = "https://example.com/concurrent-import"
+    fetched = {"etag": None, "last_modified": None}
+
+    first = importer._save_course(url, {"title": "A", "content": "First version of the page."}, fetched, None)
+    # 第二个请求在抓取前查到的 course_id 仍为 None(两次导入同时进行)
+    second = importer._save_course(url, {"title": "A", "content": "Second version of the page."}, fetched, None)
+    same = importer._save_course(url, {"title": "A", "content": "Second version of the page."}, fetched, None)
+
+    assert first["status"] == "imported"
+    assert second == {"status": "updated", "course_id": first["course_id"]}
+    assert same == {"status": "duplicate", "course_id": first["course_id"]}
+
+
+def test_refetched_unchanged_page_is_not_rewritten(db):
+    from app.models.database import get_db_connection
+
+    importer = CourseImporter(max_concurrency=1, per_host_concurrency=1)
+    url = "https://example.com/unchanged-page"
+    data = {"title": "A", "content": "The page body has not changed at all."}
+
+    first = importer._save_course(url, data, {"etag": None, "last_modified": None}, None)
+    conn = get_db_connection()
+    try:
+        conn.execute(
+            "UPDATE lessons SET audio_path = '/static/audio/lessons/x.m3u' WHERE course_id = ?", (first["course_id"],)
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    # 没有校验头的页面或 force 重新抓取: 下一次导入带着已有的 course_id, 正文相同
+    again = importer._save_course(url, data, {"etag": '"v2"', "last_modified": None}, first["course_id"])
+    assert again == {"status": "not_modified", "course_id": first["course_id"]}
+    state = importer._fetch_state(url)
+    assert state["etag"] == '"v2"'
+    conn = get_db_connection()
+    try:
+        row = conn.execute("SELECT audio_path FROM lessons WHERE course_id = ?", (first["course_id"],)).fetchone()
+    finally:
+        conn.close()
+    assert row["audio_path"] == "/static/audio/lessons/x.m3u"
+
+    changed = importer._save_course(url, {"title": "A", "content": "The page body changed."}, {}, first["course_id"])
+    assert changed == {"status": "updated", "course_id": first["course_id"]}
+
+
+def test_import_urls_rejects_concurrency_above_fetch_pool(monkeypatch, capsys):
+    from app.core.config import settings
+    from scripts import import_urls
+
+    monkeypatch.setattr(sys, "argv", ["import_urls.py", "--concurrency", str(settings.IMPORT_MAX_CONCURRENCY + 1)])
+    with pytest.raises(SystemExit):
+        import_urls.parse_args()
+    assert "IMPORT_MAX_CONCURRENCY" in capsys.readouterr().err
@@ -0,0 +1,83 @@
+import sqlite3
+import threading
+
+import pytest
+
+from app.models.database import get_db_connection
+
+
+@pytest.fixture
+def conn(db):
+    conn = get_db_connection()
+    yield conn
+    conn.close()
+
+
+def _insert_course(conn, title: str) -> None:
+    conn.execute("INSERT INTO courses (title, description) VALUES (?, '')", (title,))
+
+
+def _count(title: str) -> int:
+    conn = get_db_connection()
+    try:
+        return conn.execute("SELECT COUNT(*) FROM courses WHERE title = ?", (title,)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_connection_is_reused_per_thread(conn):
+    other = get_db_connection()
+    try:
+        assert other is conn
+    finally:
+        other.close()
+
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(get_db_connection()))
+    thread.start()
+    thread.join()
+    assert seen[0] is not conn
+
+
+def test_close_rolls_back_uncommitted_write(conn):
+    _insert_course(conn, "rollback-on-close")
+    conn.close()
+    assert not conn.in_transaction
+    assert _count("rollback-on-close") == 0
+
+
+def test_close_after_leaked_connection_still_rolls_back(conn):
+    # 某个调用方出错后没有执行 close(): 本线程下一个调用方的 close() 仍须回滚它留下的事务
+    leaked = get_db_connection()
+    _insert_course(leaked, "leaked-write")
+    other = get_db_connection()
+    other.close()
+    assert not leaked.in_transaction
+
+    # 事务已结束, 其他线程可以立即写入, 不会遇到 "database is locked"
+    errors = []
+
+    def write():
+        c = get_db_connection()
+        try:
+            c.execute("PRAGMA busy_timeout = 100")
+            _insert_course(c, "other-thread-write")
+            c.commit()
+        except sqlite3.OperationalError as e:
+            errors.append(e)
+        finally:
+            c.close()
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    thread.join()
+    assert errors == []
+    assert _count("leaked-write") == 0
+    assert _count("other-thread-write") == 1
+
+
+def test_committed_write_survives_close(conn):
+    _insert_course(conn, "committed")
+    conn.commit()
+    conn.close()
+    assert _count("committed") == 1
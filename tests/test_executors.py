@@ -0,0 +1,35 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core import metrics
+from app.core.executors import get_executor, run_in
+
+
+def test_named_pools_are_reused_and_unknown_names_rejected():
+    assert get_executor("db") is get_executor("db")
+    assert get_executor("db") is not get_executor("io")
+    with pytest.raises(ValueError):
+        get_executor("gpu")
+
+
+def test_run_in_uses_the_pool_and_records_request_timing():
+    async def main():
+        timings = {}
+        metrics._request_timings.set(timings)
+        name = await run_in("io", lambda suffix: threading.current_thread().name + suffix, "!")
+        return name, timings
+
+    name, timings = asyncio.run(main())
+    assert name.startswith("io-worker") and name.endswith("!")
+    assert "io" in timings
+
+
+def test_run_in_propagates_exceptions():
+    def fail():
+        raise KeyError("missing")
+
+    with pytest.raises(KeyError):
+        asyncio.run(run_in("io", fail))
+    assert all(value == 0 for key, value in metrics.executor_tasks_in_flight.items() if key == ("io",))
@@ -0,0 +1,43 @@
+import pytest
+
+from app.services.extraction import ArticleExtractor, _decode, header_charset
+
+TEXT = "Café au lait, naïve façade."
+
+
+@pytest.mark.parametrize(
+    "content_type, expected",
+    [
+        ("text/html; charset=ISO-8859-1", "ISO-8859-1"),
+        ('text/html; charset="windows-1252"', "windows-1252"),
+        ("text/html", None),
+        (None, None),
+    ],
+)
+def test_header_charset(content_type, expected):
+    assert header_charset(content_type) == expected
+
+
+def test_header_charset_is_used_when_page_declares_none():
+    body = f"<html><body><p>{TEXT}</p></body></html>".encode("latin-1")
+    assert TEXT in _decode(body, "iso-8859-1")
+    assert TEXT not in _decode(body)
+
+
+def test_header_charset_wins_over_meta_but_not_bom():
+    body = f'<meta charset="utf-8"><p>{TEXT}</p>'.encode("latin-1")
+    assert TEXT in _decode(body, "iso-8859-1")
+    assert _decode(b"\xef\xbb\xbf" + TEXT.encode("utf-8"), "iso-8859-1") == TEXT
+
+
+def test_unknown_header_charset_falls_back_to_meta():
+    body = f'<meta charset="iso-8859-1"><p>{TEXT}</p>'.encode("latin-1")
+    assert TEXT in _decode(body, "no-such-charset")
+
+
+def test_extract_uses_header_charset():
+    paragraph = f"{TEXT} " * 5
+    body = f"<html><head><title>Menu</title></head><body><article><p>{paragraph}</p></article></body></html>"
+    result = ArticleExtractor("html.parser").extract(body.encode("latin-1"), "iso-8859-1")
+    assert result["title"] == "Menu"
+    assert TEXT in result["content"]
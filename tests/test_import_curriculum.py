@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from app.models.database import get_db_connection
+from app.services.course_importer import content_hash
+from scripts import import_curriculum as importer
+
+
+def _lesson(n, extra=""):
+    return {"title": f"Lesson {n}", "focus": f"Focus {n}{extra}", "activities": [{"type": "Drill", "description": "Repeat"}]}
+
+
+def _write(path, data):
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.skipif(importer.ijson is None, reason="ijson is not installed")
+def test_stream_reads_fields_after_lessons_in_one_pass(tmp_path, monkeypatch):
+    path = _write(tmp_path / "c.json", {"lessons": [_lesson(1), _lesson(2)], "title": "Late title", "source": "s"})
+    parses = []
+    parse = importer.ijson.parse
+    monkeypatch.setattr(importer.ijson, "parse", lambda f: parses.append(1) or parse(f))
+
+    fields, lessons = importer.read_curriculum(path)
+    assert fields["title"] == "Late title"
+    assert [lesson["title"] for lesson in lessons] == ["Lesson 1", "Lesson 2"]
+    assert fields["source"] == "s"
+    assert len(parses) == 1
+
+
+def test_reimport_is_incremental_and_batched(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(importer, "FLUSH_BATCH", 3)
+    title = "Batched course"
+    path = _write(tmp_path / "c.json", {"title": title, "lessons": [_lesson(n) for n in range(7)]})
+    first = importer.import_curriculum(*importer.read_curriculum(path))
+    assert (first["created"], first["inserted"], first["changed"]) == (True, 7, 0)
+
+    lessons = [_lesson(n, " v2" if n == 3 else "") for n in range(8)]
+    path = _write(tmp_path / "c.json", {"title": title, "description": "d", "lessons": lessons})
+    second = importer.import_curriculum(*importer.read_curriculum(path))
+    assert second["course_id"] == first["course_id"]
+    assert (second["created"], second["inserted"], second["changed"], second["skipped"]) == (False, 1, 1, 6)
+
+    conn = get_db_connection()
+    try:
+        rows = conn.execute("SELECT title FROM lessons WHERE course_id = ? ORDER BY id", (first["course_id"],)).fetchall()
+        description = conn.execute("SELECT description FROM courses WHERE id = ?", (first["course_id"],)).fetchone()[0]
+    finally:
+        conn.close()
+    assert [row["title"] for row in rows] == [f"Lesson {n}" for n in range(8)]
+    assert description == "d"
+
+
+def test_missing_hashes_are_backfilled(db, tmp_path):
+    path = _write(tmp_path / "c.json", {"title": "Backfill course", "lessons": [_lesson(1)]})
+    course_id = importer.import_curriculum(*importer.read_curriculum(path))["course_id"]
+    conn = get_db_connection()
+    try:
+        conn.execute("UPDATE lessons SET content_hash = NULL WHERE course_id = ?", (course_id,))
+        conn.commit()
+    finally:
+        conn.close()
+
+    result = importer.import_curriculum(*importer.read_curriculum(path))
+    assert result["skipped"] == 1
+    conn = get_db_connection()
+    try:
+        row = conn.execute("SELECT content, content_hash FROM lessons WHERE course_id = ?", (course_id,)).fetchone()
+    finally:
+        conn.close()
+    assert row["content_hash"] == content_hash(row["content"])
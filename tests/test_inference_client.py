@@ -0,0 +1,79 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services.inference_client import InferenceClient, InferenceError
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body: bytes, content_type="application/json", close=False):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if close:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+        if close:
+            self.close_connection = True
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path == "/echo":
+            self._send(200, json.dumps({"echo": payload, "port": self.client_address[1]}).encode())
+        elif self.path == "/fail":
+            self._send(503, json.dumps({"detail": "model not loaded"}).encode())
+        elif self.path == "/stream":
+            body = b"".join(json.dumps({"token": t}).encode() + b"\n" for t in payload["tokens"]) + b'{"done": true}\n'
+            self._send(200, body, "application/x-ndjson")
+        elif self.path == "/bye":
+            # 回答后关闭连接, 模拟服务器关闭空闲的长连接
+            self._send(200, b"{}", close=True)
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_json_requests_reuse_one_connection(server):
+    client = InferenceClient(server, timeout=5, connect_timeout=1)
+    first = client.post_json("/echo", {"n": 1})
+    second = client.post_json("/echo", {"n": 2})
+    assert first["echo"] == {"n": 1} and second["echo"] == {"n": 2}
+    assert first["port"] == second["port"]
+
+
+def test_closed_connection_is_replaced(server):
+    client = InferenceClient(server, timeout=5, connect_timeout=1)
+    client.post_json("/bye", {})
+    assert client.post_json("/echo", {"n": 3})["echo"] == {"n": 3}
+
+
+def test_errors_and_unreachable_server_raise_inference_error(server):
+    client = InferenceClient(server, timeout=5, connect_timeout=1)
+    with pytest.raises(InferenceError, match="model not loaded"):
+        client.post_json("/fail", {})
+    with pytest.raises(InferenceError):
+        InferenceClient("http://127.0.0.1:9", timeout=1, connect_timeout=0.5).post_json("/echo", {})
+    with pytest.raises(InferenceError):
+        InferenceClient("ftp://example", timeout=1, connect_timeout=0.5).post_json("/echo", {})
+
+
+def test_stream_json_yields_lines(server):
+    client = InferenceClient(server, timeout=5, connect_timeout=1)
+    lines = list(client.stream_json("/stream", {"tokens": ["a", "b"]}))
+    assert lines == [{"token": "a"}, {"token": "b"}, {"done": True}]
+    assert client.post_json("/echo", {"after": True})["echo"] == {"after": True}
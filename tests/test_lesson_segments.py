@@ -0,0 +1,60 @@
+from app.models.database import get_db_connection
+from app.services.lesson_segments import lesson_segmenter
+from app.services.segmentation import clean_for_speech, segment_document, split_sentences
+
+CONTENT = (
+    "Intro line. Mr. Smith said hi.\n"
+    "# Part one\n"
+    "First point. Second point!\n"
+    "- A list item\n"
+    "## Part two\n"
+    "Closing words."
+)
+
+
+def test_segment_document_sections_and_offsets():
+    document = segment_document(CONTENT)
+    texts = [s["text"] for s in document["sentences"]]
+    assert texts == split_sentences(CONTENT)
+    assert texts[:2] == ["Intro line.", "Mr. Smith said hi."]
+    assert [(s["index"], s["title"], s["sentence_count"]) for s in document["sections"]] == [
+        (0, None, 2), (1, "Part one", 4), (2, "Part two", 2),
+    ]
+    for sentence in document["sentences"]:
+        assert clean_for_speech(CONTENT[sentence["start"]:sentence["end"]]) == sentence["text"]
+
+
+def _lesson(content: str) -> int:
+    conn = get_db_connection()
+    try:
+        course_id = conn.execute("INSERT INTO courses (title, description) VALUES ('Segments', '')").lastrowid
+        lesson_id = conn.execute(
+            "INSERT INTO lessons (course_id, title, content) VALUES (?, 'L', ?)", (course_id, content)
+        ).lastrowid
+        conn.commit()
+    finally:
+        conn.close()
+    return lesson_id
+
+
+def test_sentences_are_paged_and_keep_ids_after_edit(db):
+    lesson_id = _lesson(CONTENT)
+    first = lesson_segmenter.sentences(lesson_id, start=0, limit=3)
+    assert first["total"] == 8 and first["next_start"] == 3
+    rest = lesson_segmenter.sentences(lesson_id, start=first["next_start"], limit=10)
+    assert rest["next_start"] is None and len(rest["sentences"]) == 5
+    section = lesson_segmenter.sentences(lesson_id, section=2)
+    assert [s["text"] for s in section["sentences"]] == ["Part two", "Closing words."]
+
+    ids = {s["text"]: s["id"] for s in first["sentences"] + rest["sentences"]}
+    assert lesson_segmenter.segment_lesson(lesson_id) == 8
+    conn = get_db_connection()
+    try:
+        lesson_segmenter.segment(conn, lesson_id, "New opening. " + CONTENT)
+        conn.commit()
+    finally:
+        conn.close()
+    edited = lesson_segmenter.sentences(lesson_id, limit=20)["sentences"]
+    assert edited[0]["text"] == "New opening."
+    assert all(ids[s["text"]] == s["id"] for s in edited[1:])
+    assert lesson_segmenter.sentences(10 ** 9) is None
@@ -0,0 +1,52 @@
+import threading
+
+import pytest
+
+from app.services.llm_service import LLMModel
+from benchmarks.fakes import FakeLlama
+
+
+@pytest.fixture
+def model(db):
+    model = LLMModel("large", "/nonexistent/model.gguf", 0)
+    model.model = FakeLlama(tokens_per_sec=10000.0, output_tokens=4, prompt_tokens_per_sec=1e6)
+    model.load_state = "ready"
+    return model
+
+
+def test_prefix_reuse_is_recorded_for_chat_and_stream(model):
+    model.chat("What does ubiquitous mean?", use_cache=False)
+    assert model.kv_cache_stats()["requests"] == 1
+
+    tokens = list(model.stream_chat("What does ubiquitous mean?", use_cache=False))
+    assert tokens
+    stats = model.kv_cache_stats()
+    assert stats["requests"] == 2
+    # 相同提示词的第二次请求可以复用上一次留在上下文中的前缀
+    assert stats["last_skipped"] > 0
+    assert stats["prompt_tokens"] > stats["skipped_tokens"] > 0
+
+
+def test_chat_caches_only_answers_that_stopped_naturally(model):
+    model.chat("cache me: truncated", max_tokens=2)
+    assert model.cached_answer("cache me: truncated", max_tokens=2) is None
+
+    answer = model.chat("cache me: complete")
+    assert model.cached_answer("cache me: complete") == answer
+
+
+def test_stream_caches_only_answers_that_stopped_naturally(model):
+    list(model.stream_chat("stream me: truncated", max_tokens=2))
+    assert model.cached_answer("stream me: truncated", max_tokens=2) is None
+
+    answer = "".join(model.stream_chat("stream me: complete"))
+    assert model.cached_answer("stream me: complete") == answer
+
+
+def test_cancelled_stream_is_not_cached(model):
+    cancel = threading.Event()
+    stream = model.stream_chat("stream me: cancelled", cancel_event=cancel)
+    next(stream)
+    cancel.set()
+    list(stream)
+    assert model.cached_answer("stream me: cancelled") is None
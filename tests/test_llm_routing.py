@@ -0,0 +1,64 @@
+import pytest
+
+from app.core.config import settings
+from app.services.llm_service import LLMModel, LLMService
+
+
+@pytest.fixture
+def service():
+    service = LLMService()
+    # 只需要小模型"存在", 路由判断不会加载模型
+    service.models["small"] = LLMModel("small", "/nonexistent/small.gguf", 0)
+    return service
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "explain present perfect tense",
+        "why is this wrong?",
+        "Is this grammar correct?",
+        "tell me a joke",
+        "how are you today",
+        "Why is the present perfect used in this sentence here?",
+        "请解释一下这个句子的语法, 顺便翻译",
+    ],
+)
+def test_free_form_chat_stays_on_large_model(service, message):
+    assert service.route_for("free", message) == "large"
+    assert service.route_for(None, message) == "large"
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "ubiquitous",
+        "ubiquitous?",
+        "What does 'take off' mean?",
+        "define serendipity",
+        "translate 你好 into English",
+        "how do you say 谢谢 in English",
+        "ubiquitous 是什么意思？",
+        "翻译: good morning",
+    ],
+)
+def test_single_words_and_explicit_lookups_go_to_small_model(service, message):
+    assert service.route_for("free", message) == "small"
+
+
+def test_kind_decides_before_message(service):
+    assert settings.LLM_SMALL_KINDS == ["word"]
+    assert service.route_for("word", "a long question about grammar and usage in general") == "small"
+    assert service.route_for("sentence", "ubiquitous") == "large"
+
+
+def test_context_or_long_message_stays_on_large_model(service):
+    assert service.route_for("free", "ubiquitous", context="The lesson text.") == "large"
+    assert service.route_for("free", "define " + "x" * settings.LLM_SMALL_MAX_CHARS) == "large"
+
+
+def test_missing_small_model_falls_back_to_large(service):
+    service.models["small"].load_state = "missing"
+    assert service.route_for("word", "ubiquitous") == "large"
+    del service.models["small"]
+    assert service.route_for("word", "ubiquitous") == "large"
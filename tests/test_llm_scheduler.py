@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from app.services.llm_scheduler import LLMScheduler, QueueFullError, QueueTimeoutError, RequestCancelledError
+
+
+def test_waiters_are_admitted_by_priority_then_arrival():
+    scheduler = LLMScheduler(max_concurrency=1, max_queue_size=10, queue_timeout=5)
+    order = []
+
+    async def request(name, priority):
+        async with scheduler.slot(priority):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    async def main():
+        async with scheduler.slot():
+            tasks = [
+                asyncio.create_task(request(name, priority))
+                for name, priority in [("low", "low"), ("normal-1", "normal"), ("high", "high"), ("normal-2", "normal")]
+            ]
+            await asyncio.sleep(0.01)
+            assert scheduler.queue_depth == 4
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert order == ["high", "normal-1", "normal-2", "low"]
+    assert scheduler.stats()["completed"] == 5
+    assert scheduler.stats()["active"] == 0
+
+
+def test_full_queue_is_rejected_and_timeouts_release_the_position():
+    scheduler = LLMScheduler(max_concurrency=1, max_queue_size=1, queue_timeout=0.05)
+
+    async def main():
+        async with scheduler.slot():
+            waiter = asyncio.create_task(scheduler.slot().__aenter__())
+            await asyncio.sleep(0.01)
+            with pytest.raises(QueueFullError) as error:
+                scheduler.check_capacity()
+            assert error.value.status_code == 429 and error.value.retry_after >= 1
+            with pytest.raises(QueueTimeoutError):
+                await waiter
+        assert scheduler.queue_depth == 0
+        async with scheduler.slot():
+            pass
+
+    asyncio.run(main())
+    stats = scheduler.stats()
+    assert (stats["rejected"], stats["timed_out"], stats["active"]) == (1, 1, 0)
+
+
+def test_disconnected_client_leaves_the_queue():
+    scheduler = LLMScheduler(max_concurrency=1, max_queue_size=5, queue_timeout=5)
+
+    async def disconnected():
+        return True
+
+    async def main():
+        async with scheduler.slot():
+            with pytest.raises(RequestCancelledError):
+                async with scheduler.slot(disconnected=disconnected):
+                    pass
+            assert scheduler.queue_depth == 0
+
+    asyncio.run(main())
+    assert scheduler.stats()["cancelled"] == 1
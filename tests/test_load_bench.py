@@ -0,0 +1,55 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks import load_bench
+
+
+def test_percentile_and_summarize():
+    assert load_bench.percentile([], 95) == 0.0
+    assert load_bench.percentile([3, 1, 2, 4, 5], 50) == 3
+    summary = load_bench.summarize([0.01, 0.02, 0.03], elapsed=1.5, errors=1)
+    assert summary["count"] == 3 and summary["errors"] == 1
+    assert summary["per_sec"] == 2.0
+    assert summary["p50_ms"] == pytest.approx(20.0)
+
+
+def test_parse_mix_rejects_unknown_scenarios():
+    assert load_bench.parse_mix("chat=2,lesson") == [("chat", 2.0), ("lesson", 1.0)]
+    with pytest.raises(SystemExit):
+        load_bench.parse_mix("nope=1")
+
+
+def test_compare_flags_regressions():
+    base = {"results": {"a": {"p95_ms": 10.0, "per_sec": 100.0}, "b": {"p95_ms": 10.0, "per_sec": 100.0}}}
+    now = {"results": {
+        "a": {"p95_ms": 10.5, "per_sec": 99.0},
+        "b": {"p95_ms": 20.0, "per_sec": 100.0},
+        "new": {"p95_ms": 1.0, "per_sec": 1.0},
+    }}
+    comparison = load_bench.compare(now, base, max_regression=15)
+    assert [row["name"] for row in comparison["rows"]] == ["a", "b"]
+    assert [row["regression"] for row in comparison["rows"]] == [False, True]
+    assert comparison["rows"][1]["ms_delta_pct"] == 100.0
+    assert len(comparison["regressions"]) == 1 and comparison["regressions"][0].startswith("b:")
+
+
+def test_json_output_includes_baseline_comparison(tmp_path):
+    script = load_bench.__file__
+    baseline = tmp_path / "baseline.json"
+    subprocess.run(
+        [sys.executable, script, "--micro", "--iterations", "3", "--output", str(baseline)],
+        check=True, capture_output=True,
+    )
+    result = subprocess.run(
+        [sys.executable, script, "--micro", "--iterations", "3", "--json",
+         "--baseline", str(baseline), "--max-regression", "100000"],
+        check=True, capture_output=True, text=True,
+    )
+    data = json.loads(result.stdout)
+    assert data["mode"] == "micro"
+    assert data["comparison"]["regressions"] == []
+    assert {row["name"] for row in data["comparison"]["rows"]} == set(data["results"])
+    assert "comparison" not in json.loads(baseline.read_text())
@@ -0,0 +1,68 @@
+import threading
+
+import pytest
+
+from app.core.metrics import MetricsRegistry, _Metric
+
+
+def test_metric_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        _Metric("m", "doc")
+
+    class Incomplete(_Metric):
+        type_name = "gauge"
+
+    with pytest.raises(TypeError):
+        Incomplete("m", "doc")
+
+
+def test_render_counter_gauge_and_histogram():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests.", ("route",))
+    depth = registry.gauge("queue_depth", "Depth.")
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    requests.inc(route="/a")
+    requests.inc(2, route="/a")
+    depth.set(3)
+    depth.dec()
+    latency.observe(0.05)
+    latency.observe(0.5)
+
+    text = registry.render()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{route="/a"} 3' in text
+    assert "queue_depth 2" in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 2' in text
+    assert "latency_seconds_count 2" in text
+    with pytest.raises(ValueError):
+        requests.inc()
+
+
+def test_replace_swaps_gauges_together():
+    registry = MetricsRegistry()
+    files = registry.gauge("files", "Files.", ("format",))
+    size = registry.gauge("bytes", "Bytes.", ("format",))
+    registry.replace({files: [({"format": "wav"}, 1)], size: [({"format": "wav"}, 10)]})
+    registry.replace({files: [({"format": "mp3"}, 2)], size: [({"format": "mp3"}, 20)]})
+    text = registry.render()
+    assert 'files{format="mp3"} 2' in text and 'bytes{format="mp3"} 20' in text
+    assert "wav" not in text
+
+    stop = threading.Event()
+
+    def churn():
+        n = 0
+        while not stop.is_set():
+            n += 1
+            registry.replace({files: [({"format": "mp3"}, n)], size: [({"format": "mp3"}, n * 10)]})
+
+    thread = threading.Thread(target=churn)
+    thread.start()
+    try:
+        for _ in range(200):
+            values = dict(line.rsplit(" ", 1) for line in registry.render().splitlines() if not line.startswith("#"))
+            assert int(values['bytes{format="mp3"}']) == 10 * int(values['files{format="mp3"}'])
+    finally:
+        stop.set()
+        thread.join()
@@ -0,0 +1,85 @@
+import asyncio
+
+from app.api import endpoints
+from app.core.config import settings
+from app.services.answer_cache import answer_cache
+from app.services.llm_service import llm_service
+from app.services.prompt_builder import BASE_SYSTEM_PROMPT, CONTEXT_PREFIX, prompt_builder
+
+STORY = (
+    "The ferry leaves at dawn. Gulls circle the harbour. "
+    "A negotiator arrives to settle the dispute about fishing rights. "
+    "Children play football on the beach. The market opens at nine."
+)
+
+
+def test_short_prompt_keeps_full_context_and_matches_draft():
+    prompt = prompt_builder.build("What is a negotiator?", STORY, "sentence")
+    draft = prompt_builder.draft("What is a negotiator?", STORY, "sentence")
+    assert prompt["context"] == "full"
+    assert prompt["system_prompt"] == BASE_SYSTEM_PROMPT + CONTEXT_PREFIX + STORY
+    assert {key: prompt[key] for key in draft} == draft
+    assert prompt["max_tokens"] == settings.LLM_MAX_TOKENS_BY_KIND["sentence"]
+
+
+def test_long_context_keeps_relevant_sentences(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_PROMPT_MAX_TOKENS", 80)
+    context = " ".join([STORY] * 20)
+    prompt = prompt_builder.build("What is a negotiator?", context, "sentence")
+    assert prompt["context"] == "selected"
+    assert "negotiator" in prompt["system_prompt"]
+    assert "football" not in prompt["system_prompt"]
+    assert prompt["prompt_tokens"] <= 80
+
+
+def test_select_context_marks_gaps():
+    text, tokens = prompt_builder.select_context("fishing rights dispute", STORY, 40)
+    assert "dispute" in text and tokens <= 40
+    assert prompt_builder.select_context("anything", "", 40) == ("", 0)
+
+
+def _seed(prompt: dict, answer: str) -> None:
+    model = llm_service.model_for(prompt["route"])
+    key = model._answer_key(prompt["message"], prompt["system_prompt"], model._sampling(prompt["max_tokens"]))
+    answer_cache.put(key, model.model_name, answer)
+
+
+def test_cache_is_checked_before_counting_tokens(db, monkeypatch):
+    request = endpoints.ChatRequest(message="Explain the word harbour", context=STORY, kind="sentence")
+    _seed(prompt_builder.draft(request.message, request.context, request.kind), "cached answer")
+    calls = []
+    monkeypatch.setattr(llm_service, "count_tokens", lambda texts, route="large": calls.append(texts) or [1] * len(texts))
+
+    hits = answer_cache.hits
+    prompt, cached = asyncio.run(endpoints._prepare_prompt(request))
+    assert cached == "cached answer"
+    assert calls == []
+    assert answer_cache.hits == hits + 1
+
+
+def test_trimmed_prompt_is_looked_up_after_building(db, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_PROMPT_MAX_TOKENS", 80)
+    request = endpoints.ChatRequest(message="What is a negotiator?", context=" ".join([STORY] * 20), kind="sentence")
+    built = prompt_builder.build(request.message, request.context, request.kind)
+    _seed(built, "trimmed answer")
+
+    misses = answer_cache.misses
+    prompt, cached = asyncio.run(endpoints._prepare_prompt(request))
+    assert cached == "trimmed answer"
+    assert prompt["context"] == "selected"
+    assert answer_cache.misses == misses
+
+
+def test_answer_for_trimmed_prompt_is_cached_under_raw_request(db, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_PROMPT_MAX_TOKENS", 80)
+    request = endpoints.ChatRequest(message="Who settles the dispute?", context=" ".join([STORY] * 20), kind="sentence")
+    prompt, cached = asyncio.run(endpoints._prepare_prompt(request))
+    assert cached is None and prompt["raw"]["system_prompt"] != prompt["system_prompt"]
+    _seed(prompt, "generated answer")
+    asyncio.run(endpoints._alias_answer(prompt))
+
+    calls = []
+    monkeypatch.setattr(llm_service, "count_tokens", lambda texts, route="large": calls.append(texts) or [1] * len(texts))
+    prompt, cached = asyncio.run(endpoints._prepare_prompt(request))
+    assert cached == "generated answer"
+    assert calls == []
@@ -0,0 +1,140 @@
+import pytest
+
+from app.api.endpoints import _parse_range
+from app.services import pronunciation_pack as pp
+
+PROFILE = {"engine": "xtts", "voice": "female-en-5", "language": "en"}
+
+
+def _synthesize(word):
+    return word.encode() * 3, "mp3"
+
+
+@pytest.fixture
+def pack(tmp_path):
+    return pp.PronunciationPack(str(tmp_path / "words.pack"))
+
+
+def _reload(pack):
+    pack._checked_at = 0.0
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Apple", "apple"),
+        (" apple. ", "apple"),
+        ("didn’t", "didn't"),
+        ("well-known", "well-known"),
+        ("two words", None),
+        ("42", None),
+        ("a" * 41, None),
+    ],
+)
+def test_normalize_word(text, expected):
+    assert pp.normalize_word(text) == expected
+
+
+def test_corpus_words_counts_normalized_tokens():
+    counts = pp.corpus_words(["The cat sat.", "the CAT didn’t"])
+    assert counts["the"] == 2 and counts["cat"] == 2 and counts["didn't"] == 1
+
+
+def test_build_then_lookup_and_read(pack):
+    result = pp.build_pack(pack.path, ["apple", "pear"], _synthesize, PROFILE)
+    assert result["words"] == 2 and result["added"] == 2
+
+    entry = pack.lookup("Apple!")
+    assert entry["word"] == "apple" and entry["format"] == "mp3"
+    assert pack.url_for(entry) == f"/api/tts/words/apple?v={entry['hash']}"
+    assert pack.read("apple") == (entry, b"appleappleapple")
+    assert pack.lookup("banana") is None
+    assert pack.lookup("two words") is None
+
+
+def test_incremental_build_keeps_existing_audio(pack):
+    pp.build_pack(pack.path, ["apple"], _synthesize, PROFILE)
+    calls = []
+
+    def synthesize(word):
+        calls.append(word)
+        return _synthesize(word)
+
+    result = pp.build_pack(pack.path, ["apple", "pear", "plum"], synthesize, PROFILE, limit=1)
+    assert calls == ["pear"]
+    assert (result["kept"], result["added"], result["words"]) == (1, 1, 2)
+
+    _reload(pack)
+    assert pack.read("apple")[1] == b"appleappleapple"
+
+
+def test_voice_change_rebuilds_and_lookup_respects_profile(pack):
+    pp.build_pack(pack.path, ["apple"], _synthesize, PROFILE)
+    other = {**PROFILE, "voice": "male-en-2"}
+    assert pack.lookup("apple", PROFILE) is not None
+    # 当前 TTS 已换音色, 发音包尚未重建: 不再使用旧音色的音频
+    assert pack.lookup("apple", other) is None
+
+    result = pp.build_pack(pack.path, ["pear"], _synthesize, other)
+    assert (result["kept"], result["words"]) == (0, 1)
+    _reload(pack)
+    assert pack.lookup("pear", other) is not None
+    assert pack.lookup("apple", other) is None
+
+
+def test_failed_words_are_skipped(pack):
+    result = pp.build_pack(pack.path, ["apple", "pear"], lambda w: None if w == "pear" else _synthesize(w), PROFILE)
+    assert (result["words"], result["failed"]) == (1, 1)
+
+
+def test_corrupt_pack_is_ignored(pack):
+    with open(pack.path, "wb") as f:
+        f.write(b"not a pack at all, just some bytes")
+    assert pack.lookup("apple") is None
+    assert pack.status()["loaded"] is False
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, None),
+        ("bytes=0-9", (0, 9)),
+        ("bytes=10-", (10, 99)),
+        ("bytes=-4", (96, 99)),
+        ("bytes=90-200", (90, 99)),
+        ("bytes=0-1,5-6", None),
+        ("items=0-1", None),
+        ("bytes=a-b", None),
+    ],
+)
+def test_parse_range(header, expected):
+    assert _parse_range(header, 100) == expected
+
+
+def test_word_click_uses_pack_without_loading_tts(pack, monkeypatch):
+    import asyncio
+
+    from app.api.endpoints import TTSRequest, generate_speech
+    from app.services.tts_service import tts_service
+
+    monkeypatch.setattr(tts_service, "tts", None)
+    expected = tts_service.expected_voice_profile()
+    pp.build_pack(pack.path, ["apple"], _synthesize, expected)
+    monkeypatch.setattr(pp, "pronunciation_pack", pack)
+    loads = []
+
+    def ensure_loaded():
+        loads.append(1)
+        return False
+
+    monkeypatch.setattr(tts_service, "ensure_loaded", ensure_loaded)
+    result = asyncio.run(generate_speech(TTSRequest(text="Apple")))
+    assert result["audio_url"].startswith("/api/tts/words/apple?v=")
+    assert loads == []
+
+    # 推断的音色与发音包不同: 未命中后才加载引擎; 引擎不可用时不限音色, 仍使用发音包
+    pp.build_pack(pack.path, ["apple"], _synthesize, {**expected, "voice": "someone-else"})
+    _reload(pack)
+    result = asyncio.run(generate_speech(TTSRequest(text="Apple")))
+    assert result["audio_url"].startswith("/api/tts/words/apple?v=")
+    assert loads == [1]
@@ -0,0 +1,49 @@
+from app.models.database import get_db_connection
+from app.services.search import SearchService, _highlight_pattern, build_match_query, make_snippet
+
+
+def test_build_match_query_quotes_terms_and_prefixes_last_word():
+    assert build_match_query("negotiate  deadl") == '"negotiate" "deadl"*'
+    assert build_match_query("negotiate a") == '"negotiate" "a"'
+    assert build_match_query("deadl", prefix=False) == '"deadl"'
+    assert build_match_query('"pitch deck"') == '"pitch deck"'
+    # FTS5 的运算符被当作普通词加引号
+    assert build_match_query("NEAR OR") == '"NEAR" "OR"*'
+    assert build_match_query("  !!! ") is None
+
+
+def test_make_snippet_marks_and_escapes_matches():
+    text = "Start " + "filler " * 40 + "the <b>deadline</b> moved. " + "tail " * 40
+    snippet = make_snippet(text, _highlight_pattern("deadl"))
+    assert "<mark>deadline</mark>" in snippet
+    assert "&lt;b&gt;" in snippet
+    assert snippet.startswith("…") and snippet.endswith("…")
+    assert make_snippet("nothing here", _highlight_pattern("deadline")) is None
+
+
+def test_search_ranks_pages_and_caps_broad_queries(db):
+    conn = get_db_connection()
+    try:
+        course_id = conn.execute(
+            "INSERT INTO courses (title, description) VALUES ('Zeppelin basics', 'All about the zeppelin')"
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO lessons (course_id, title, content) VALUES (?, ?, ?)",
+            [(course_id, f"Part {n}", f"The zeppelin story, chapter {n}.") for n in range(5)],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    service = SearchService(max_ranked=0)
+    page = service.search("zeppel", limit=4)
+    assert page["total"] == 6 and page["counts"] == {"course": 1, "lesson": 5, "vocabulary": 0}
+    assert page["results"][0]["type"] == "course"
+    assert page["next_offset"] == 4 and not page["approximate"]
+    assert all("<mark>" in item["snippet"] for item in page["results"])
+    rest = service.search("zeppel", limit=4, offset=4)
+    assert len(rest["results"]) == 2 and rest["next_offset"] is None
+
+    capped = SearchService(max_ranked=3).search("zeppelin", types=["lesson"])
+    assert capped["approximate"] and capped["counts"] == {"lesson": 3}
+    assert service.search("", limit=4)["results"] == []
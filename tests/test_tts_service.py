@@ -0,0 +1,149 @@
+import asyncio
+import contextlib
+import sys
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.tts_service import TTSService, XTTSEngine
+
+
+def test_edge_limit_is_created_inside_each_event_loop():
+    service = TTSService()
+    assert service._edge_semaphore is None
+
+    async def limit():
+        return service._edge_limit()
+
+    first = asyncio.run(limit())
+    assert asyncio.run(limit()) is not first
+
+    async def same_loop():
+        return service._edge_limit() is service._edge_limit()
+
+    assert asyncio.run(same_loop())
+
+
+def test_stream_reports_failed_sentence_and_continues(monkeypatch):
+    service = TTSService()
+
+    async def generate(sentence, pin=False):
+        if sentence.startswith("Second"):
+            raise RuntimeError("engine crashed")
+        return f"/static/audio/{sentence[:5]}.mp3"
+
+    monkeypatch.setattr(service, "agenerate_audio", generate)
+
+    async def collect():
+        return [segment async for segment in service.astream_audio("First one. Second one. Third one.")]
+
+    segments = asyncio.run(collect())
+    assert [s["audio_url"] for s in segments] == ["/static/audio/First.mp3", None, "/static/audio/Third.mp3"]
+    assert segments[1]["error"] == "engine crashed"
+    assert "error" not in segments[0]
+
+
+def test_stream_cancels_and_awaits_pending_tasks(monkeypatch):
+    service = TTSService()
+    finished = []
+
+    async def generate(sentence, pin=False):
+        try:
+            await asyncio.sleep(0 if sentence.startswith("First") else 10)
+            return "/static/audio/x.mp3"
+        finally:
+            finished.append(sentence)
+
+    monkeypatch.setattr(service, "agenerate_audio", generate)
+
+    async def first_only():
+        stream = service.astream_audio("First one. Second one. Third one.")
+        segment = await stream.__anext__()
+        await stream.aclose()
+        # aclose 返回时被取消的任务都已结束
+        return segment, len(finished)
+
+    segment, done = asyncio.run(first_only())
+    assert segment["index"] == 0
+    assert done == 3
+
+
+def test_edge_tts_cli_receives_text_as_single_argument(monkeypatch, tmp_path):
+    import subprocess
+
+    calls = []
+
+    def run(argv, **kwargs):
+        calls.append(argv)
+        return subprocess.CompletedProcess(argv, 1, stderr=b"")
+
+    monkeypatch.setattr(subprocess, "run", run)
+    TTSService()._run_engine("-5 degrees today", str(tmp_path / "out.mp3"), "edge-tts", "voice-a", "en")
+    assert "--text=-5 degrees today" in calls[0]
+
+
+def test_unreachable_inference_server_is_retried_on_next_request(monkeypatch):
+    from app.core.config import settings
+    from app.services import tts_service as module
+
+    monkeypatch.setattr(settings, "INFERENCE_MODE", "remote")
+    replies = [module.InferenceError("connection refused"), {"engine": "edge-tts"}]
+
+    def post_json(path, payload):
+        reply = replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    monkeypatch.setattr(module.inference_client, "post_json", post_json)
+    service = TTSService()
+    assert not service.ensure_loaded()
+    assert service.status()["state"] == "failed"
+    assert "connection refused" in service.status()["error"]
+
+    assert service.ensure_loaded()
+    assert service.status()["error"] is None
+    assert service.engine == "edge-tts"
+
+
+class _FakeXTTSModel:
+    """记录同时进行的 inference 调用数; 真实模型在并发调用时会互相覆盖条件状态。"""
+
+    def __init__(self):
+        self.config = types.SimpleNamespace(audio=types.SimpleNamespace(output_sample_rate=24000))
+        self.speaker_manager = types.SimpleNamespace(speakers={"voice-a": {"gpt_cond_latent": 0, "speaker_embedding": 0}})
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def inference(self, text, language, gpt_cond_latent, speaker_embedding, **_):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.02)
+        with self._lock:
+            self.active -= 1
+        return {"wav": [0.0] * 240}
+
+
+def test_xtts_inference_is_serialized(monkeypatch):
+    fake_torch = types.SimpleNamespace(inference_mode=contextlib.nullcontext)
+    monkeypatch.setitem(sys.modules, "torch", fake_torch)
+    model = _FakeXTTSModel()
+    service = TTSService()
+    engine = XTTSEngine(types.SimpleNamespace(synthesizer=types.SimpleNamespace(tts_model=model)), "cuda", service.model_lock)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda n: engine.synthesize(f"Sentence {n}. Another one.", "voice-a", "en"), range(4)))
+    assert model.max_active == 1
+    assert all(result["duration"] == 0.02 for result in results)
+
+    # tts_to_file 回退路径与引擎共用同一把锁
+    service.tts = types.SimpleNamespace(tts_to_file=lambda **_: model.inference("", "", 0, 0))
+    with service.model_lock:
+        worker = threading.Thread(target=service.tts_to_file, args=("Hi.", "/dev/null", "voice-a", "en"))
+        worker.start()
+        worker.join(0.05)
+        assert worker.is_alive()
+    worker.join()
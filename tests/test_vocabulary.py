@@ -0,0 +1,53 @@
+import asyncio
+
+from app.services import vocabulary_definer as definer_module
+from app.services.vocabulary import vocabulary_store
+from app.services.vocabulary_definer import VocabularyDefiner, parse_definitions
+
+
+def test_save_many_dedups_and_returns_ids(db):
+    result = vocabulary_store.save_many([
+        {"word": "Negotiate", "context_sentence": "We negotiate  prices."},
+        {"word": "negotiate", "context_sentence": "We negotiate prices.", "definition": "to discuss"},
+        {"word": "negotiate"},
+        {"word": "  "},
+    ])
+    assert result["received"] == 4
+    assert result["inserted"] == 2
+    assert result["existing"] == 0
+    assert result["invalid"] == 1
+    first, second, third, missing = result["ids"]
+    assert first == second and first != third and missing is None
+
+    again = vocabulary_store.save_many([
+        {"word": "NEGOTIATE"},
+        {"word": "négociation", "context_sentence": "La négociation."},
+    ])
+    assert again["inserted"] == 1
+    assert again["existing"] == 1
+    assert again["ids"][0] == third
+
+
+def test_save_many_resolves_ids_beyond_one_query_batch(db):
+    items = [{"word": f"batchword{i}"} for i in range(1200)]
+    result = vocabulary_store.save_many(items)
+    assert result["inserted"] == 1200
+    assert None not in result["ids"] and len(set(result["ids"])) == 1200
+
+
+def test_parse_definitions_json_and_numbered_lines():
+    words = [{"word": "apple"}, {"word": "run"}]
+    assert parse_definitions('[{"n": 2, "definition": "move fast"}]', words) == {2: "move fast"}
+    assert parse_definitions("1. apple: a fruit\n2. run - move fast", words) == {1: "a fruit", 2: "move fast"}
+
+
+def test_unparseable_answer_sets_last_error(db, monkeypatch):
+    vocabulary_store.save_many([{"word": "ambiguous"}])
+    monkeypatch.setattr(definer_module.llm_service, "ensure_loaded", lambda: True)
+    monkeypatch.setattr(definer_module.llm_service, "chat", lambda *args, **kwargs: "Sorry, I cannot help.")
+    definer = VocabularyDefiner(batch_size=500, tokens_per_word=10, max_attempts=1)
+
+    asyncio.run(definer.run())
+    assert definer.defined == 0
+    assert definer.failed > 0
+    assert "未能" in definer.status()["last_error"]